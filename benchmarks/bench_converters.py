@@ -0,0 +1,203 @@
+"""
+Benchmark dos conversores do FileConverter e de clean_text sobre o corpus sintético.
+
+Para cada formato e tamanho, chama o ``FileConverter._convert_<formato>``
+correspondente várias vezes e mede latência (p50/p99), vazão (MB/s sobre o
+p50) e pico de RSS. Cada caso roda em um processo novo, para que o pico de
+memória de um caso não contamine o seguinte. Os resultados podem ser
+gravados como linha de base e comparados em execuções futuras: casos mais
+lentos ou com mais memória que o limite tolerado encerram com código 1.
+
+Uso:
+    python benchmarks/bench_converters.py [--formats docx,pdf] [--sizes small,medium]
+        [--repeat 10] [--output resultados.json]
+        [--save-baseline benchmarks/baseline.json | --baseline benchmarks/baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from corpus import SEED, SIZES, WRITERS, build_corpus, clean_text_sample
+
+# Caso especial que mede FileConverter.clean_text sobre texto já extraído
+CLEAN_TEXT = 'clean_text'
+
+# Diferenças abaixo destes valores são tratadas como ruído na comparação
+MIN_LATENCY_DELTA_MS = 1.0
+MIN_RSS_DELTA_MB = 2.0
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil pelo método do posto mais próximo."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(format_name: str, size: str, path: Optional[str], repeat: int, warmup: int) -> dict:
+    """Executa um caso no processo atual (chamado em um processo novo)."""
+    from file_converter import FileConverter
+
+    converter = FileConverter()
+    if format_name == CLEAN_TEXT:
+        text = clean_text_sample(SIZES[size], random.Random(f"{SEED}:{CLEAN_TEXT}:{size}"))
+        input_bytes = len(text.encode('utf-8'))
+
+        def call():
+            return converter.clean_text(text)
+    else:
+        input_bytes = os.path.getsize(path)
+        convert = getattr(converter, f'_convert_{format_name}')
+        loop = asyncio.new_event_loop()
+
+        def call():
+            return loop.run_until_complete(convert(path))
+
+    rss_before = peak_rss_mb()
+    output_chars = 0
+    for _ in range(warmup):
+        output_chars = len(call())
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output_chars = len(call())
+        latencies.append(time.perf_counter() - started)
+
+    p50 = percentile(latencies, 0.50)
+    return {
+        'input_bytes': input_bytes,
+        'output_chars': output_chars,
+        'repeat': repeat,
+        'p50_ms': round(p50 * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'throughput_mb_s': round(input_bytes / (1024 * 1024) / p50, 3) if p50 else None,
+        'rss_peak_mb': round(peak_rss_mb(), 1),
+        'rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def run_isolated(format_name: str, size: str, path: Optional[str], repeat: int, warmup: int) -> dict:
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=1) as pool:
+        return pool.apply(run_case, (format_name, size, path, repeat, warmup))
+
+
+def run_benchmarks(formats: List[str], sizes: List[str], repeat: int, warmup: int) -> dict:
+    cases: Dict[str, dict] = {}
+    print(f"{'caso':<20}{'p50 (ms)':>12}{'p99 (ms)':>12}{'MB/s':>10}{'RSS (MB)':>10}{'+RSS':>8}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus = build_corpus(temp_dir, [f for f in formats if f != CLEAN_TEXT], sizes)
+        if CLEAN_TEXT in formats:
+            corpus[CLEAN_TEXT] = {size: None for size in sizes}
+        for format_name in formats:
+            for size, path in corpus.get(format_name, {}).items():
+                name = f"{format_name}/{size}"
+                try:
+                    result = run_isolated(format_name, size, path, repeat, warmup)
+                except Exception as e:
+                    print(f"{name:<20}erro: {e}")
+                    continue
+                cases[name] = result
+                throughput = result['throughput_mb_s'] or 0
+                print(f"{name:<20}{result['p50_ms']:>12.2f}{result['p99_ms']:>12.2f}"
+                      f"{throughput:>10.2f}{result['rss_peak_mb']:>10.1f}{result['rss_growth_mb']:>8.1f}")
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'warmup': warmup,
+        },
+        'cases': cases,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[str]:
+    """Compara com a linha de base e retorna os casos que regrediram."""
+    regressions = []
+    print(f"\n{'caso':<20}{'p50 base':>12}{'p50 atual':>12}{'variação':>10}{'+RSS base':>11}{'+RSS atual':>11}")
+    for name, current in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name)
+        if reference is None:
+            print(f"{name:<20}{'(sem linha de base)':>34}")
+            continue
+        change = current['p50_ms'] / reference['p50_ms'] - 1 if reference['p50_ms'] else 0.0
+        slower = (change > threshold
+                  and current['p50_ms'] - reference['p50_ms'] > MIN_LATENCY_DELTA_MS)
+        heavier = (current['rss_growth_mb'] > reference['rss_growth_mb'] * (1 + threshold)
+                   and current['rss_growth_mb'] - reference['rss_growth_mb'] > MIN_RSS_DELTA_MB)
+        marker = ''
+        if slower or heavier:
+            regressions.append(name)
+            marker = '  <- regressão'
+        print(f"{name:<20}{reference['p50_ms']:>12.2f}{current['p50_ms']:>12.2f}{change:>+10.1%}"
+              f"{reference['rss_growth_mb']:>11.1f}{current['rss_growth_mb']:>11.1f}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--formats', default=','.join(list(WRITERS) + [CLEAN_TEXT]))
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f"tamanhos separados por vírgula ({', '.join(SIZES)})")
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--output', help="grava os resultados desta execução em JSON")
+    parser.add_argument('--save-baseline', help="grava os resultados como linha de base")
+    parser.add_argument('--baseline', help="compara com a linha de base, se o arquivo existir")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="aumento relativo tolerado no p50 e no RSS (padrão: 0.25)")
+    args = parser.parse_args()
+
+    formats = args.formats.split(',')
+    sizes = args.sizes.split(',')
+    unknown = [f for f in formats if f not in WRITERS and f != CLEAN_TEXT] + [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"formatos ou tamanhos desconhecidos: {', '.join(unknown)}")
+
+    results = run_benchmarks(formats, sizes, args.repeat, args.warmup)
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {path}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"\nLinha de base {args.baseline} não encontrada; nada a comparar.")
+            return
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} caso(s) com regressão acima de {args.threshold:.0%}: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNenhuma regressão em relação à linha de base.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark da extração de texto de HTML/XML: BeautifulSoup vs. lxml em fluxo.
+
+Uso:
+    python benchmarks/bench_markup.py [--size-mb 5] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bs4 import BeautifulSoup
+
+from text_extractors import extract_html_text, extract_xml_text
+
+
+def write_html(path, size_bytes):
+    block = (
+        "<div class='secao'><h2>Seção {i}</h2><p>Parágrafo com <b>negrito</b>, "
+        "<a href='#'>link</a> e texto comum para preencher a linha.</p>"
+        "<script>var x{i} = {i};</script><table><tr><td>{i}</td><td>valor</td></tr></table></div>\n"
+    )
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("<html><head><style>p { color: red; }</style></head><body>\n")
+        written, i = 0, 0
+        while written < size_bytes:
+            chunk = block.format(i=i)
+            file.write(chunk)
+            written += len(chunk)
+            i += 1
+        file.write("</body></html>")
+
+
+def write_xml(path, size_bytes):
+    block = "<registro id='{i}'><nome>Item {i}</nome><descricao>Texto do item</descricao></registro>\n"
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="utf-8"?><exportacao>\n')
+        written, i = 0, 0
+        while written < size_bytes:
+            chunk = block.format(i=i)
+            file.write(chunk)
+            written += len(chunk)
+            i += 1
+        file.write("</exportacao>")
+
+
+def soup_html(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return BeautifulSoup(file.read(), 'html.parser').get_text(separator='\n', strip=True)
+
+
+def soup_xml(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return BeautifulSoup(file.read(), 'xml').get_text(separator='\n', strip=True)
+
+
+def best_of(function, path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=5.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    size_bytes = int(args.size_mb * 1024 * 1024)
+    cases = [
+        ('html', write_html, soup_html, extract_html_text),
+        ('xml', write_xml, soup_xml, extract_xml_text),
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'formato':<8}{'backend':<22}{'tempo (s)':>12}{'MB/s':>10}")
+        for name, writer, baseline, fast in cases:
+            path = os.path.join(temp_dir, f"amostra.{name}")
+            writer(path, size_bytes)
+            megabytes = os.path.getsize(path) / (1024 * 1024)
+            slow_time = best_of(baseline, path, args.repeat)
+            fast_time = best_of(fast, path, args.repeat)
+            print(f"{name:<8}{'beautifulsoup':<22}{slow_time:>12.3f}{megabytes / slow_time:>10.1f}")
+            print(f"{name:<8}{'lxml (fluxo)':<22}{fast_time:>12.3f}{megabytes / fast_time:>10.1f}")
+            print(f"{name:<8}{'ganho':<22}{slow_time / fast_time:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Corpus sintético para os benchmarks de conversão.
+
+Gera arquivos de cada formato em tamanhos fixos, sempre com o mesmo conteúdo
+(texto pseudoaleatório com semente fixa), para que execuções em máquinas e
+momentos diferentes meçam exatamente o mesmo trabalho.
+
+Uso:
+    python benchmarks/corpus.py <diretório> [--sizes small,medium]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+from typing import Callable, Dict, List
+
+# Multiplicador de unidades (parágrafos, linhas, slides, páginas) por tamanho
+SIZES = {
+    'small': 1,
+    'medium': 10,
+    'large': 100,
+}
+
+SEED = 1234
+
+_WORDS = (
+    "contrato cláusula pagamento fornecedor relatório trimestre receita despesa "
+    "análise cliente produto serviço prazo entrega proposta orçamento valor total "
+    "imposto nota fiscal documento anexo revisão aprovação diretoria reunião ata "
+    "projeto cronograma etapa meta resultado indicador processo equipe gestão"
+).split()
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    text = ' '.join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraphs(rng: random.Random, count: int) -> List[str]:
+    return [' '.join(_sentence(rng) for _ in range(3)) for _ in range(count)]
+
+
+def _ascii(text: str) -> str:
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+
+def write_docx(path: str, scale: int, rng: random.Random):
+    from docx import Document
+
+    document = Document()
+    for index, paragraph in enumerate(_paragraphs(rng, 40 * scale)):
+        if index % 10 == 0:
+            document.add_heading(f"Seção {index // 10 + 1}", level=2)
+        document.add_paragraph(paragraph)
+    table = document.add_table(rows=5 * scale, cols=4)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = rng.choice(_WORDS)
+    document.save(path)
+
+
+def write_xlsx(path: str, scale: int, rng: random.Random):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet_number in range(3):
+        sheet = workbook.create_sheet(f"Planilha{sheet_number + 1}")
+        sheet.append(['id', 'cliente', 'descricao', 'valor', 'quantidade'])
+        for row in range(300 * scale):
+            sheet.append([row, rng.choice(_WORDS), _sentence(rng, 6),
+                          round(rng.uniform(1, 10000), 2), rng.randint(1, 500)])
+    workbook.save(path)
+
+
+def write_pptx(path: str, scale: int, rng: random.Random):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for number in range(10 * scale):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {number + 1}: {rng.choice(_WORDS)}"
+        body = slide.placeholders[1].text_frame
+        body.text = _sentence(rng)
+        for _ in range(4):
+            body.add_paragraph().text = _sentence(rng)
+        box = slide.shapes.add_textbox(Inches(1), Inches(6), Inches(8), Inches(1))
+        box.text_frame.text = _sentence(rng, 6)
+    presentation.save(path)
+
+
+def _pdf_string(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: str, scale: int, rng: random.Random):
+    """PDF mínimo escrito à mão (fonte Helvetica, ~45 linhas por página)."""
+    pages = 5 * scale
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # /Pages, preenchido depois de conhecer os filhos
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for _ in range(pages):
+        lines = [_ascii(_sentence(rng, 10)) for _ in range(45)]
+        stream = "BT /F1 10 Tf 14 TL 50 790 Td " + ' '.join(
+            f"({_pdf_string(line)}) '" for line in lines
+        ) + " ET"
+        content = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b' '.join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    with open(path, 'wb') as file:
+        file.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(file.tell())
+            file.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = file.tell()
+        file.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            file.write(b"%010d 00000 n \n" % offset)
+        file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                   % (len(objects) + 1, xref))
+
+
+def write_odt(path: str, scale: int, rng: random.Random):
+    from odf.opendocument import OpenDocumentText
+    from odf.text import H, P
+
+    document = OpenDocumentText()
+    for index, paragraph in enumerate(_paragraphs(rng, 40 * scale)):
+        if index % 10 == 0:
+            document.text.addElement(H(outlinelevel=2, text=f"Seção {index // 10 + 1}"))
+        document.text.addElement(P(text=paragraph))
+    document.save(path)
+
+
+def write_csv(path: str, scale: int, rng: random.Random):
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['id', 'cliente', 'descricao', 'valor', 'data'])
+        for row in range(1000 * scale):
+            writer.writerow([row, rng.choice(_WORDS), _sentence(rng, 8),
+                             f"{rng.uniform(1, 10000):.2f}", f"2024-{rng.randint(1, 12):02d}-15"])
+
+
+def write_json(path: str, scale: int, rng: random.Random):
+    records = [
+        {
+            'id': index,
+            'cliente': {'nome': rng.choice(_WORDS), 'cidade': rng.choice(_WORDS)},
+            'itens': [{'produto': rng.choice(_WORDS), 'valor': rng.randint(1, 999)} for _ in range(3)],
+            'observacao': _sentence(rng),
+        }
+        for index in range(300 * scale)
+    ]
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'registros': records}, file, ensure_ascii=False)
+
+
+def write_xml(path: str, scale: int, rng: random.Random):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="utf-8"?>\n<exportacao>\n')
+        for index in range(500 * scale):
+            file.write(
+                f'<registro id="{index}"><nome>{rng.choice(_WORDS)}</nome>'
+                f'<descricao>{_sentence(rng)}</descricao>'
+                f'<valor>{rng.randint(1, 9999)}</valor></registro>\n'
+            )
+        file.write('</exportacao>\n')
+
+
+def write_html(path: str, scale: int, rng: random.Random):
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<!DOCTYPE html><html><head><title>Relatório</title>'
+                   '<style>p { margin: 0 }</style><script>var x = 1;</script></head><body>\n')
+        for index in range(200 * scale):
+            file.write(
+                f'<div class="secao"><h2>Seção {index}</h2><p>{_sentence(rng)} '
+                f'<b>{rng.choice(_WORDS)}</b> <a href="#s{index}">{rng.choice(_WORDS)}</a></p>'
+                f'<table><tr><td>{index}</td><td>{rng.choice(_WORDS)}</td></tr></table></div>\n'
+            )
+        file.write('</body></html>\n')
+
+
+def clean_text_sample(scale: int, rng: random.Random) -> str:
+    """Texto extraído típico (com ruído de DOC e URLs) para medir ``clean_text``."""
+    lines = []
+    for index in range(400 * scale):
+        line = _sentence(rng)
+        if index % 7 == 0:
+            line += ' bjbjX1Y2 CJOJQJ^J https://exemplo.com/doc.pdf'
+        if index % 11 == 0:
+            line = '---- ' + line + ' ****'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+WRITERS: Dict[str, Callable[[str, int, random.Random], None]] = {
+    'docx': write_docx,
+    'xlsx': write_xlsx,
+    'pptx': write_pptx,
+    'pdf': write_pdf,
+    'odt': write_odt,
+    'csv': write_csv,
+    'json': write_json,
+    'xml': write_xml,
+    'html': write_html,
+}
+
+
+def build_corpus(directory: str, formats: List[str], sizes: List[str]) -> Dict[str, Dict[str, str]]:
+    """
+    Gera o corpus em ``directory`` e retorna {formato: {tamanho: caminho}}.
+    Formatos cuja biblioteca de escrita não está instalada são omitidos.
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus: Dict[str, Dict[str, str]] = {}
+    for format_name in formats:
+        for size in sizes:
+            path = os.path.join(directory, f"{size}.{format_name}")
+            # A semente depende do caso, não da ordem em que os casos são gerados
+            rng = random.Random(f"{SEED}:{format_name}:{size}")
+            try:
+                WRITERS[format_name](path, SIZES[size], rng)
+            except ImportError as e:
+                print(f"Aviso: {format_name} omitido do corpus ({e})", file=sys.stderr)
+                break
+            corpus.setdefault(format_name, {})[size] = path
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory')
+    parser.add_argument('--formats', default=','.join(WRITERS))
+    parser.add_argument('--sizes', default='small,medium')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.directory, args.formats.split(','), args.sizes.split(','))
+    for format_name, paths in corpus.items():
+        for size, path in paths.items():
+            print(f"{format_name:<6}{size:<8}{os.path.getsize(path) / 1024:>10.1f} KB  {path}")
+
+
+if __name__ == "__main__":
+    main()
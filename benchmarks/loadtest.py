@@ -0,0 +1,453 @@
+"""
+Teste de carga de ponta a ponta contra a API.
+
+Gera requisições concorrentes para /convert/file, /convert/url (os arquivos
+são servidos por um servidor HTTP local), /generate e /temp/{file_id}, com
+pesos configuráveis, e reporta vazão, latências (p50/p90/p99), taxas de erro
+e a evolução da memória do servidor ao longo do tempo. Em paralelo, uma
+sonda consulta GET / periodicamente: se a latência da sonda sobe junto com a
+carga, algum conversor está bloqueando o loop de eventos.
+
+O servidor pode ser iniciado pelo próprio script (uvicorn em subprocesso,
+com --workers), rodar no mesmo processo (uvicorn em uma thread) ou já estar
+em execução (--url).
+
+Uso:
+    python benchmarks/loadtest.py [--mode launch|inprocess|external] [--workers 2]
+        [--url http://localhost:8000] [--api-key chave] [--concurrency 8]
+        [--duration 30] [--mix file=6,url=2,generate=1,temp=1]
+        [--formats docx,pdf,csv] [--sizes small] [--output resultados.json]
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from corpus import SIZES, WRITERS, build_corpus
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+SCENARIOS = ('file', 'url', 'generate', 'temp')
+
+GENERATE_HTML = (
+    "<html><body><h1>Relatório de carga</h1>"
+    + "".join(f"<p>Parágrafo {i} com texto para preencher o documento gerado.</p>" for i in range(30))
+    + "</body></html>"
+)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil pelo método do posto mais próximo (0 para lista vazia)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(fraction * len(ordered))) - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """RSS somado de ``pid`` e seus descendentes (workers do uvicorn), via /proc."""
+    if not os.path.isdir('/proc'):
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file:
+                # O nome do processo vem entre parênteses e pode conter espaços
+                fields = file.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError):
+            continue
+
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        try:
+            with open(f'/proc/{current}/status') as file:
+                for line in file:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+class Recorder:
+    """Resultados das requisições, acumulados entre as threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples: List[tuple] = []  # (instante, cenário, latência, status)
+
+    def add(self, scenario: str, latency: float, status: int):
+        with self.lock:
+            self.samples.append((time.monotonic(), scenario, latency, status))
+
+    def snapshot(self) -> List[tuple]:
+        with self.lock:
+            return list(self.samples)
+
+
+class FileServer:
+    """Servidor HTTP local que substitui as URLs externas em /convert/url."""
+
+    def __init__(self, directory: str):
+        handler = functools.partial(_QuietHandler, directory=directory)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class LaunchedServer:
+    """Uvicorn em um subprocesso, com o número de workers escolhido."""
+
+    def __init__(self, workers: int, api_key: str):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        env = dict(os.environ, API_KEY=api_key)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+             '--port', str(self.port), '--workers', str(workers), '--log-level', 'warning'],
+            # A saída de depuração dos endpoints é descartada; erros seguem no stderr
+            cwd=SRC_DIR, env=env, stdout=subprocess.DEVNULL,
+        )
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class InProcessServer:
+    """Uvicorn em uma thread do próprio script (a memória inclui o gerador de carga)."""
+
+    def __init__(self, api_key: str):
+        os.environ['API_KEY'] = api_key
+        sys.path.insert(0, SRC_DIR)
+        import uvicorn
+        from main import app
+
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=self.port,
+                                                    log_level='warning'))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+        self.thread.start()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return os.getpid()
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=15)
+
+
+def wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{url}/", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Servidor não respondeu em {timeout:.0f}s: {url}")
+
+
+class LoadTest:
+    """Executa os cenários com ``concurrency`` threads durante ``duration`` segundos."""
+
+    def __init__(self, base_url: str, api_key: str, corpus_files: List[str], file_server: FileServer,
+                 mix: Dict[str, int], concurrency: int, duration: float, seed: int = 42):
+        self.base_url = base_url
+        self.headers = {'x-api-key': api_key}
+        self.corpus_files = corpus_files
+        self.file_server = file_server
+        self.scenarios = [name for name in SCENARIOS if mix.get(name)]
+        self.weights = [mix[name] for name in self.scenarios]
+        self.concurrency = concurrency
+        self.duration = duration
+        self.seed = seed
+        self.recorder = Recorder()
+        self.probe = Recorder()
+        self.temp_ids: List[str] = []
+        self.stop_event = threading.Event()
+
+    def prepare_temp_files(self, count: int = 5):
+        """Gera arquivos hospedados para o cenário /temp/{file_id}."""
+        for _ in range(count):
+            try:
+                response = requests.post(f"{self.base_url}/generate/url", headers=self.headers,
+                                         json={'file': GENERATE_HTML, 'format': 'txt'}, timeout=60)
+                if response.status_code == 200:
+                    self.temp_ids.append(response.json()['file_id'])
+            except requests.RequestException:
+                pass
+        if not self.temp_ids and 'temp' in self.scenarios:
+            print("Aviso: /generate/url falhou; cenário temp desativado", file=sys.stderr)
+            position = self.scenarios.index('temp')
+            del self.scenarios[position], self.weights[position]
+
+    def _request(self, session: requests.Session, scenario: str, rng: random.Random) -> int:
+        if scenario == 'file':
+            path = rng.choice(self.corpus_files)
+            with open(path, 'rb') as file:
+                response = session.post(f"{self.base_url}/convert/file", headers=self.headers,
+                                        files={'file': (os.path.basename(path), file)}, timeout=300)
+        elif scenario == 'url':
+            name = os.path.basename(rng.choice(self.corpus_files))
+            response = session.post(f"{self.base_url}/convert/url", headers=self.headers,
+                                    json={'url': f"{self.file_server.base_url}/{name}"}, timeout=300)
+        elif scenario == 'generate':
+            response = session.post(f"{self.base_url}/generate", headers=self.headers,
+                                    json={'file': GENERATE_HTML, 'format': 'txt'}, timeout=300)
+        else:
+            response = session.get(f"{self.base_url}/temp/{rng.choice(self.temp_ids)}", timeout=300)
+        # Lê o corpo inteiro: a latência vai até o último byte
+        _ = response.content
+        return response.status_code
+
+    def _worker(self, number: int):
+        rng = random.Random(self.seed + number)
+        session = requests.Session()
+        while not self.stop_event.is_set():
+            scenario = rng.choices(self.scenarios, self.weights)[0]
+            started = time.perf_counter()
+            try:
+                status = self._request(session, scenario, rng)
+            except requests.RequestException:
+                status = 0
+            self.recorder.add(scenario, time.perf_counter() - started, status)
+
+    def _probe(self, interval: float = 0.25):
+        session = requests.Session()
+        while not self.stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                status = session.get(f"{self.base_url}/", timeout=30).status_code
+            except requests.RequestException:
+                status = 0
+            self.probe.add('probe', time.perf_counter() - started, status)
+            self.stop_event.wait(interval)
+
+    def run(self, server_pid: Optional[int], interval: float) -> dict:
+        if not self.scenarios:
+            raise RuntimeError("Nenhum cenário habilitado em --mix")
+        threads = [threading.Thread(target=self._worker, args=(number,), daemon=True)
+                   for number in range(self.concurrency)]
+        threads.append(threading.Thread(target=self._probe, daemon=True))
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        timeline = []
+        print(f"{'t (s)':>6}{'req/s':>9}{'p99 (ms)':>11}{'erros':>7}{'sonda p99':>11}{'RSS (MB)':>10}")
+        window_start = started
+        while time.monotonic() - started < self.duration:
+            time.sleep(min(interval, max(0.0, self.duration - (time.monotonic() - started))))
+            now = time.monotonic()
+            window = [s for s in self.recorder.snapshot() if window_start <= s[0] < now]
+            probes = [s for s in self.probe.snapshot() if window_start <= s[0] < now]
+            rss = process_tree_rss_mb(server_pid) if server_pid else None
+            point = {
+                'elapsed_s': round(now - started, 1),
+                'requests_per_s': round(len(window) / (now - window_start), 2),
+                'p99_ms': round(percentile([s[2] for s in window], 0.99) * 1000, 1),
+                'errors': sum(1 for s in window if not 200 <= s[3] < 400),
+                'probe_p99_ms': round(percentile([s[2] for s in probes], 0.99) * 1000, 1),
+                'server_rss_mb': round(rss, 1) if rss is not None else None,
+            }
+            timeline.append(point)
+            print(f"{point['elapsed_s']:>6.0f}{point['requests_per_s']:>9.2f}{point['p99_ms']:>11.1f}"
+                  f"{point['errors']:>7}{point['probe_p99_ms']:>11.1f}"
+                  f"{point['server_rss_mb'] if rss is not None else '-':>10}")
+            window_start = now
+
+        self.stop_event.set()
+        for thread in threads:
+            thread.join(timeout=300)
+        elapsed = time.monotonic() - started
+        return self.report(elapsed, timeline)
+
+    def report(self, elapsed: float, timeline: List[dict]) -> dict:
+        samples = self.recorder.snapshot()
+        scenarios = {}
+        for name in self.scenarios + ['total']:
+            selected = [s for s in samples if name == 'total' or s[1] == name]
+            latencies = [s[2] for s in selected]
+            errors: Dict[str, int] = {}
+            for s in selected:
+                if not 200 <= s[3] < 400:
+                    errors[str(s[3] or 'conexão')] = errors.get(str(s[3] or 'conexão'), 0) + 1
+            scenarios[name] = {
+                'requests': len(selected),
+                'requests_per_s': round(len(selected) / elapsed, 2) if elapsed else 0,
+                'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+                'p90_ms': round(percentile(latencies, 0.90) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+                'max_ms': round(max(latencies, default=0) * 1000, 1),
+                'error_rate': round(sum(errors.values()) / len(selected), 4) if selected else 0,
+                'errors': errors,
+            }
+        probes = [s[2] for s in self.probe.snapshot()]
+        memory = [point['server_rss_mb'] for point in timeline if point['server_rss_mb'] is not None]
+        return {
+            'duration_s': round(elapsed, 1),
+            'concurrency': self.concurrency,
+            'scenarios': scenarios,
+            'probe': {
+                'requests': len(probes),
+                'p50_ms': round(percentile(probes, 0.50) * 1000, 1),
+                'p99_ms': round(percentile(probes, 0.99) * 1000, 1),
+            },
+            'memory': {
+                'start_mb': memory[0] if memory else None,
+                'end_mb': memory[-1] if memory else None,
+                'peak_mb': max(memory) if memory else None,
+                'growth_mb': round(memory[-1] - memory[0], 1) if memory else None,
+            },
+            'timeline': timeline,
+        }
+
+
+def print_report(report: dict):
+    print(f"\n{'cenário':<10}{'req':>7}{'req/s':>9}{'p50 (ms)':>10}{'p90 (ms)':>10}"
+          f"{'p99 (ms)':>10}{'max (ms)':>10}{'erros':>8}")
+    for name, result in report['scenarios'].items():
+        print(f"{name:<10}{result['requests']:>7}{result['requests_per_s']:>9.2f}{result['p50_ms']:>10.1f}"
+              f"{result['p90_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}"
+              f"{result['error_rate']:>8.1%}")
+        if result['errors']:
+            print(f"{'':<10}erros por status: {result['errors']}")
+    probe = report['probe']
+    print(f"\nSonda GET /: p50 {probe['p50_ms']:.1f} ms, p99 {probe['p99_ms']:.1f} ms "
+          f"({probe['requests']} requisições)")
+    memory = report['memory']
+    if memory['start_mb'] is not None:
+        print(f"Memória do servidor: {memory['start_mb']:.1f} → {memory['end_mb']:.1f} MB "
+              f"(pico {memory['peak_mb']:.1f} MB, crescimento {memory['growth_mb']:+.1f} MB)")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"cenário desconhecido: {name}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', choices=('launch', 'inprocess', 'external'), default='launch')
+    parser.add_argument('--url', help="URL da API já em execução (modo external)")
+    parser.add_argument('--pid', type=int, help="PID do servidor externo, para medir a memória")
+    parser.add_argument('--workers', type=int, default=1, help="workers do uvicorn (modo launch)")
+    parser.add_argument('--api-key', default=os.getenv('API_KEY', 'loadtest-key'))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--interval', type=float, default=5.0, help="segundos entre linhas da linha do tempo")
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('file=6,url=2,generate=1,temp=1'))
+    parser.add_argument('--formats', default='docx,xlsx,pptx,pdf,csv,json,html')
+    parser.add_argument('--sizes', default='small')
+    parser.add_argument('--output', help="grava o relatório em JSON")
+    args = parser.parse_args()
+
+    if args.mode == 'external' and not args.url:
+        parser.error("--url é obrigatório no modo external")
+    unknown = [f for f in args.formats.split(',') if f not in WRITERS]
+    unknown += [s for s in args.sizes.split(',') if s not in SIZES]
+    if unknown:
+        parser.error(f"formatos ou tamanhos desconhecidos: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        corpus = build_corpus(corpus_dir, args.formats.split(','), args.sizes.split(','))
+        corpus_files = [path for paths in corpus.values() for path in paths.values()]
+        file_server = FileServer(corpus_dir)
+        file_server.start()
+
+        server = None
+        if args.mode == 'launch':
+            server = LaunchedServer(args.workers, args.api_key)
+        elif args.mode == 'inprocess':
+            server = InProcessServer(args.api_key)
+        base_url = server.url if server else args.url.rstrip('/')
+        server_pid = server.pid if server else args.pid
+
+        try:
+            wait_until_ready(base_url)
+            test = LoadTest(base_url, args.api_key, corpus_files, file_server,
+                            args.mix, args.concurrency, args.duration)
+            if args.mix.get('temp'):
+                test.prepare_temp_files()
+            report = test.run(server_pid, args.interval)
+        finally:
+            if server:
+                server.stop()
+            file_server.stop()
+
+    report['config'] = {
+        'mode': args.mode,
+        'workers': args.workers if args.mode == 'launch' else None,
+        'mix': args.mix,
+        'formats': args.formats.split(','),
+        'sizes': args.sizes.split(','),
+    }
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        print(f"\nRelatório gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Controle de admissão: limites de conversões simultâneas, global e por API key.
+
+Cada requisição pesada recebe um peso estimado pelo formato e pelo tamanho do
+arquivo (um PDF grande pesa mais que um CSV pequeno). O controlador admite a
+requisição enquanto a soma dos pesos em andamento couber no limite global e
+no limite da chave; caso contrário, ela espera em fila até o prazo
+``queue_timeout`` e, se não couber a tempo (ou a fila estiver cheia), é
+recusada com o tempo estimado para tentar de novo (``Retry-After``).
+
+A fila é atendida em ordem de chegada, mas uma requisição barrada apenas
+pelo limite da própria chave não bloqueia as de outras chaves: um cliente
+que envia 50 PDFs ocupa só a sua cota.
+
+Os limites valem por processo: com N workers do uvicorn, o total da
+instância é N vezes o limite configurado.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+import metrics
+
+# Peso relativo de cada formato (padrão 1); os mais caros usam ferramentas
+# externas ou carregam o documento inteiro em memória
+FORMAT_COSTS = {
+    '.pdf': 3,
+    '.ppt': 4,
+    '.doc': 2,
+    '.xlsx': 2,
+    '.xls': 2,
+    '.ods': 2,
+    '.odp': 2,
+}
+
+# Cada bloco deste tamanho acrescenta uma unidade de peso
+COST_BYTES_PER_UNIT = 4 * 1024 * 1024
+
+# Peso da geração de arquivos a partir de HTML, por formato de saída
+GENERATE_COSTS = {
+    'pdf': 4,
+    'docx': 2,
+}
+DEFAULT_GENERATE_COST = 3
+
+# Limites da estimativa do Retry-After, em segundos
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 300
+
+
+@dataclass
+class ApiKey:
+    """Chave de API e sua cota de peso simultâneo."""
+    key: str
+    name: str
+    max_weight: int
+
+
+def parse_api_keys(text: str, default_max_weight: int) -> Dict[str, ApiKey]:
+    """
+    Lê as chaves do arquivo de segredo (ou da variável API_KEY).
+
+    Uma chave por linha, opcionalmente seguida de ``name=<cliente>`` e
+    ``max_weight=<peso>``; linhas vazias e iniciadas por ``#`` são
+    ignoradas. Um arquivo com uma única chave continua válido.
+
+        chave-do-cliente-a name=cliente-a max_weight=8
+        chave-do-cliente-b name=cliente-b
+    """
+    keys: Dict[str, ApiKey] = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if not fields or fields[0].startswith('#'):
+            continue
+        options = {}
+        for field in fields[1:]:
+            name, separator, value = field.partition('=')
+            if not separator:
+                raise ValueError(f"Opção inválida para a chave {len(keys) + 1}: {field}")
+            options[name] = value
+        unknown = set(options) - {'name', 'max_weight'}
+        if unknown:
+            raise ValueError(f"Opções desconhecidas para a chave {len(keys) + 1}: {', '.join(sorted(unknown))}")
+        keys[fields[0]] = ApiKey(
+            key=fields[0],
+            name=options.get('name', f"chave-{len(keys) + 1}"),
+            max_weight=int(options.get('max_weight', default_max_weight)),
+        )
+    if not keys:
+        raise ValueError("Nenhuma API key configurada")
+    return keys
+
+
+def estimate_cost(extension: str, size_bytes: Optional[int] = None) -> int:
+    """Peso de uma conversão pelo formato e, se conhecido, pelo tamanho."""
+    cost = FORMAT_COSTS.get(extension.lower(), 1)
+    if size_bytes:
+        cost += size_bytes // COST_BYTES_PER_UNIT
+    return cost
+
+
+def estimate_generate_cost(output_format: str) -> int:
+    return GENERATE_COSTS.get(output_format.lower(), DEFAULT_GENERATE_COST)
+
+
+class AdmissionRejected(Exception):
+    """Requisição recusada; ``retry_after`` é a espera sugerida em segundos."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    """Admissão concedida; devolva com ``AdmissionController.release``."""
+    key: str
+    weight: int
+    started: float
+
+
+@dataclass
+class _Waiter:
+    key: str
+    weight: int
+    key_limit: int
+    future: asyncio.Future
+
+
+class AdmissionController:
+    """
+    Admite requisições pelo peso, com limite global e por chave.
+
+    ``queue_timeout`` é o tempo máximo de espera na fila (0 recusa
+    imediatamente) e ``max_queue`` o número máximo de requisições
+    esperando. Deve ser usado dentro de um único loop de eventos.
+    """
+
+    def __init__(self, max_weight: int, queue_timeout: float = 10.0, max_queue: int = 100):
+        if max_weight < 1:
+            raise ValueError("O limite global de admissão deve ser positivo")
+        self.max_weight = max_weight
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+
+        self.in_use = 0
+        self.key_in_use: Dict[str, int] = {}
+        self._queue: Deque[_Waiter] = deque()
+        # Média móvel do tempo de posse de uma admissão, para o Retry-After
+        self._average_hold = 1.0
+
+    def _fits(self, key: str, weight: int, key_limit: int) -> bool:
+        return (self.in_use + weight <= self.max_weight
+                and self.key_in_use.get(key, 0) + weight <= key_limit)
+
+    def _grant(self, key: str, weight: int) -> Ticket:
+        self.in_use += weight
+        self.key_in_use[key] = self.key_in_use.get(key, 0) + weight
+        metrics.registry.add(metrics.ADMISSION_WEIGHT_IN_USE, weight)
+        return Ticket(key=key, weight=weight, started=time.monotonic())
+
+    def _dispatch(self):
+        """Admite, em ordem, os que cabem; quem espera pela cota global bloqueia os seguintes."""
+        for waiter in list(self._queue):
+            if waiter.future.done():
+                continue
+            if self.key_in_use.get(waiter.key, 0) + waiter.weight > waiter.key_limit:
+                continue
+            if self.in_use + waiter.weight > self.max_weight:
+                break
+            self._remove(waiter)
+            waiter.future.set_result(self._grant(waiter.key, waiter.weight))
+
+    def _remove(self, waiter: _Waiter):
+        try:
+            self._queue.remove(waiter)
+        except ValueError:
+            return
+        metrics.registry.add(metrics.ADMISSION_QUEUE_DEPTH, -1)
+
+    def retry_after(self, weight: int) -> int:
+        """Estimativa de quando haverá espaço: fila à frente dividida pela capacidade."""
+        queued = sum(waiter.weight for waiter in self._queue) + weight
+        estimate = math.ceil(self._average_hold * queued / self.max_weight)
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, estimate))
+
+    def _reject(self, key: str, reason: str, weight: int):
+        metrics.registry.inc(metrics.ADMISSION_REJECTED, key=key, reason=reason)
+        raise AdmissionRejected(reason, self.retry_after(weight))
+
+    async def acquire(self, key: str, weight: int, key_limit: int,
+                      timeout: Optional[float] = None) -> Ticket:
+        """
+        Aguarda a admissão de uma requisição de peso ``weight`` da chave ``key``.
+
+        Pesos maiores que os limites são reduzidos a eles, para que uma
+        requisição muito grande ainda possa rodar sozinha. Levanta
+        ``AdmissionRejected`` se a fila estiver cheia ou o prazo expirar.
+        """
+        weight = max(1, min(weight, self.max_weight, key_limit))
+        timeout = self.queue_timeout if timeout is None else timeout
+
+        if not self._queue and self._fits(key, weight, key_limit):
+            return self._grant(key, weight)
+        if timeout <= 0:
+            self._reject(key, 'busy', weight)
+        if len(self._queue) >= self.max_queue:
+            self._reject(key, 'queue_full', weight)
+
+        waiter = _Waiter(key, weight, key_limit, asyncio.get_running_loop().create_future())
+        self._queue.append(waiter)
+        metrics.registry.add(metrics.ADMISSION_QUEUE_DEPTH, 1)
+        self._dispatch()
+
+        started = time.perf_counter()
+        try:
+            # O shield impede que o wait_for cancele o futuro: a remoção da
+            # fila e uma eventual admissão tardia são tratadas aqui
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitida no mesmo instante em que o prazo expirou: o peso já
+                # foi somado, então a admissão vale em vez de ser recusada
+                return waiter.future.result()
+            self._remove(waiter)
+            waiter.future.cancel()
+            self._reject(key, 'timeout', weight)
+        except asyncio.CancelledError:
+            # Cliente desconectou enquanto esperava
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter.future.result())
+            else:
+                self._remove(waiter)
+                waiter.future.cancel()
+            raise
+        finally:
+            metrics.registry.observe(metrics.ADMISSION_WAIT, time.perf_counter() - started)
+
+    def release(self, ticket: Ticket):
+        """Devolve o peso de uma admissão e admite quem estiver esperando."""
+        self.in_use -= ticket.weight
+        self.key_in_use[ticket.key] -= ticket.weight
+        if not self.key_in_use[ticket.key]:
+            del self.key_in_use[ticket.key]
+        metrics.registry.add(metrics.ADMISSION_WEIGHT_IN_USE, -ticket.weight)
+
+        held = time.monotonic() - ticket.started
+        self._average_hold = 0.8 * self._average_hold + 0.2 * held
+        self._dispatch()
@@ -0,0 +1,246 @@
+"""
+Divisão do texto extraído em trechos (chunks) para ingestão por LLMs.
+
+O texto chega em segmentos (páginas, planilhas, slides) e é dividido em
+janelas de tamanho máximo ``size`` com sobreposição ``overlap``, medidas por
+um tokenizador plugável. A estratégia define as unidades que nunca são
+partidas ao meio quando cabem na janela: parágrafos (linhas), frases ou
+palavras. Unidades maiores que a janela descem para o nível seguinte
+(parágrafo → frase → palavra → caracteres).
+
+Cada trecho traz seus deslocamentos no texto completo (segmentos unidos por
+``\\n``, como em ``segments``), a contagem de tokens e um hash SHA-256 do
+texto, que permite descartar trechos repetidos sem compará-los.
+
+Com uma função de limpeza, a divisão é feita no texto bruto, em que as
+quebras de linha ainda separam os parágrafos, e cada trecho é limpo ao ser
+produzido; os deslocamentos continuam se referindo ao texto bruto.
+"""
+
+import hashlib
+import re
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+from segments import SEGMENT_SEPARATOR
+
+# Estratégias de divisão
+STRATEGY_FIXED = 'fixed'
+STRATEGY_SENTENCE = 'sentence'
+STRATEGY_PARAGRAPH = 'paragraph'
+CHUNK_STRATEGIES = (STRATEGY_FIXED, STRATEGY_SENTENCE, STRATEGY_PARAGRAPH)
+
+# Prefixo dos tokenizadores do tiktoken (ex.: "tiktoken:cl100k_base")
+TIKTOKEN_PREFIX = 'tiktoken:'
+
+_PARAGRAPH_RE = re.compile(r'[^\n]+')
+_SENTENCE_RE = re.compile(r'\S[^\n]*?(?:[.!?…]+(?=\s|\Z)|(?=\n)|\Z)')
+_WORD_RE = re.compile(r'\S+')
+
+# Padrões de cada nível, do mais amplo ao mais fino
+_LEVELS = {
+    STRATEGY_PARAGRAPH: (_PARAGRAPH_RE, _SENTENCE_RE, _WORD_RE),
+    STRATEGY_SENTENCE: (_SENTENCE_RE, _WORD_RE),
+    STRATEGY_FIXED: (_WORD_RE,),
+}
+
+TokenCounter = Callable[[str], int]
+
+_TOKENIZERS: Dict[str, TokenCounter] = {
+    'chars': len,
+    'words': lambda text: len(text.split()),
+}
+
+
+def register_tokenizer(name: str, count: TokenCounter):
+    """Registra um contador de tokens, uma função ``texto -> quantidade``."""
+    _TOKENIZERS[name] = count
+
+
+def get_tokenizer(name: str) -> TokenCounter:
+    """
+    Retorna o contador de tokens registrado com ``name``.
+
+    Nomes ``tiktoken:<codificação>`` são carregados sob demanda quando o
+    tiktoken está instalado.
+    """
+    if name in _TOKENIZERS:
+        return _TOKENIZERS[name]
+    if name.startswith(TIKTOKEN_PREFIX):
+        if tiktoken is None:
+            raise ValueError("tiktoken não está instalado. Não é possível usar o tokenizador " + name)
+        try:
+            encoding = tiktoken.get_encoding(name[len(TIKTOKEN_PREFIX):])
+        except (KeyError, ValueError):
+            raise ValueError(f"Codificação do tiktoken desconhecida: {name}")
+        register_tokenizer(name, lambda text: len(encoding.encode(text, disallowed_special=())))
+        return _TOKENIZERS[name]
+    raise ValueError(f"Tokenizador desconhecido: {name}. Disponíveis: {', '.join(available_tokenizers())}")
+
+
+def available_tokenizers() -> List[str]:
+    names = list(_TOKENIZERS)
+    if tiktoken is not None:
+        names.append(f'{TIKTOKEN_PREFIX}<codificação>')
+    return names
+
+
+@dataclass
+class Chunk:
+    """Trecho pronto para ingestão, com sua posição no texto completo."""
+    index: int
+    text: str
+    start: int
+    end: int
+    tokens: int
+    hash: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# Unidade: (texto, início, fim, separador até a próxima unidade, custo em tokens)
+_Unit = Tuple[str, int, int, str, int]
+
+
+class Chunker:
+    """
+    Divide segmentos de texto em trechos, à medida que são recebidos.
+
+    Uso: chame ``add`` para cada segmento, na ordem, e ``finish`` ao final;
+    ambos produzem os trechos que já estão completos. Apenas as unidades da
+    janela atual ficam em memória.
+
+    Com ``clean``, o texto de cada trecho passa pela função antes de ser
+    produzido, e os trechos que ficam vazios são descartados.
+    """
+
+    def __init__(self, size: int = 1000, overlap: int = 0,
+                 strategy: str = STRATEGY_PARAGRAPH, tokenizer: str = 'chars',
+                 clean: Optional[Callable[[str], str]] = None):
+        if strategy not in CHUNK_STRATEGIES:
+            raise ValueError(f"Estratégia de divisão inválida: {strategy}")
+        if size < 1:
+            raise ValueError("O tamanho dos trechos deve ser positivo")
+        if not 0 <= overlap < size:
+            raise ValueError("A sobreposição deve ser menor que o tamanho dos trechos")
+
+        self.size = size
+        self.overlap = overlap
+        self.levels = _LEVELS[strategy]
+        self.count = get_tokenizer(tokenizer)
+        self.clean = clean
+
+        self._window: List[_Unit] = []
+        self._window_cost = 0
+        self._carried = 0
+        self._offset = 0
+        self._started = False
+        self._index = 0
+
+    def add(self, text: str) -> Iterator[Chunk]:
+        """Recebe o próximo segmento e produz os trechos completados por ele."""
+        if self._started:
+            self._offset += len(SEGMENT_SEPARATOR)
+            if self._window:
+                # O separador entre segmentos passa a fazer parte do trecho
+                last = self._window[-1]
+                self._window[-1] = last[:3] + (last[3] + SEGMENT_SEPARATOR,) + last[4:]
+        self._started = True
+
+        base = self._offset
+        self._offset += len(text)
+        units = list(self._split(text, 0, len(text), 0))
+        for position, (start, end) in enumerate(units):
+            next_start = units[position + 1][0] if position + 1 < len(units) else len(text)
+            gap = text[end:next_start]
+            unit_text = text[start:end]
+            unit = (unit_text, base + start, base + end, gap, self.count(unit_text) + self.count(gap))
+            yield from self._push(unit)
+
+    def chunk(self, texts: Iterable[str]) -> List[Chunk]:
+        """Divide todos os segmentos de ``texts`` e retorna a lista de trechos."""
+        chunks: List[Chunk] = []
+        for text in texts:
+            chunks.extend(self.add(text))
+        chunks.extend(self.finish())
+        return chunks
+
+    def finish(self) -> Iterator[Chunk]:
+        """Produz o último trecho pendente."""
+        if len(self._window) > self._carried:
+            yield from self._emit()
+        self._window = []
+        self._window_cost = 0
+        self._carried = 0
+
+    def _split(self, text: str, start: int, end: int, level: int) -> Iterator[Tuple[int, int]]:
+        """Divide ``text[start:end]`` em unidades que cabem na janela."""
+        for match in self.levels[level].finditer(text, start, end):
+            unit_start = match.start()
+            unit_end = unit_start + len(match.group().rstrip())
+            if unit_end <= unit_start:
+                continue
+            if self.count(text[unit_start:unit_end]) <= self.size:
+                yield unit_start, unit_end
+            elif level + 1 < len(self.levels):
+                yield from self._split(text, unit_start, unit_end, level + 1)
+            else:
+                # Palavra maior que a janela: corta em blocos de caracteres,
+                # que nunca têm mais tokens do que caracteres
+                for piece in range(unit_start, unit_end, self.size):
+                    yield piece, min(piece + self.size, unit_end)
+
+    def _push(self, unit: _Unit) -> Iterator[Chunk]:
+        if self._window and self._window_cost + unit[4] > self.size:
+            if len(self._window) > self._carried:
+                yield from self._emit()
+            self._keep_overlap()
+            while self._window and self._window_cost + unit[4] > self.size:
+                self._window_cost -= self._window.pop(0)[4]
+                self._carried -= 1
+        self._window.append(unit)
+        self._window_cost += unit[4]
+
+    def _emit(self) -> Iterator[Chunk]:
+        text = ''.join(unit[0] + unit[3] for unit in self._window[:-1]) + self._window[-1][0]
+        if self.clean is not None:
+            text = self.clean(text)
+            if not text:
+                return
+        chunk = Chunk(
+            index=self._index,
+            text=text,
+            start=self._window[0][1],
+            end=self._window[-1][2],
+            tokens=self.count(text),
+            hash=hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        )
+        self._index += 1
+        yield chunk
+
+    def _keep_overlap(self):
+        """Mantém no início da janela as últimas unidades que cabem na sobreposição."""
+        kept: List[_Unit] = []
+        cost = 0
+        for unit in reversed(self._window[1:]):
+            if cost + unit[4] > self.overlap:
+                break
+            kept.insert(0, unit)
+            cost += unit[4]
+        self._window = kept
+        self._window_cost = cost
+        # Unidades herdadas já foram produzidas: sozinhas não formam um trecho
+        self._carried = len(kept)
+
+
+def chunk_segments(texts: Iterable[str], size: int = 1000, overlap: int = 0,
+                   strategy: str = STRATEGY_PARAGRAPH, tokenizer: str = 'chars',
+                   clean: Optional[Callable[[str], str]] = None) -> List[Chunk]:
+    """Divide uma sequência de segmentos (ou um único texto em uma lista) em trechos."""
+    return Chunker(size, overlap, strategy, tokenizer, clean).chunk(texts)
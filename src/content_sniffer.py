@@ -0,0 +1,170 @@
+"""
+Detecção do formato de um arquivo pelo conteúdo (assinaturas de bytes).
+
+Lê apenas um prefixo de poucos KB (e, para ZIP e OLE2, o diretório interno)
+para escolher o conversor antes de carregar qualquer biblioteca pesada. A
+leitura passa por ``mmap_input``: com o arquivo mapeado, o prefixo e o
+diretório vêm do mesmo mapeamento usado depois pelo conversor.
+Assim, arquivos com extensão errada — por exemplo um ``.doc`` que na
+verdade é um DOCX — vão direto para o leitor certo. O ``python-magic``,
+quando instalado, é usado apenas como último recurso.
+"""
+
+import struct
+import zipfile
+from typing import BinaryIO, Optional
+
+from mmap_input import InputFile, open_input
+
+try:
+    import magic
+except ImportError:
+    magic = None
+
+# Quantidade de bytes lida do início do arquivo
+SNIFF_BYTES = 8 * 1024
+
+_PDF_SIGNATURE = b'%PDF-'
+_ZIP_SIGNATURE = b'PK\x03\x04'
+_OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Entradas que identificam os pacotes Office Open XML
+_OOXML_ENTRIES = (
+    ('word/document.xml', '.docx'),
+    ('xl/workbook.xml', '.xlsx'),
+    ('ppt/presentation.xml', '.pptx'),
+)
+
+# Conteúdo da entrada "mimetype" dos pacotes OpenDocument
+_ODF_MIMETYPES = {
+    'application/vnd.oasis.opendocument.text': '.odt',
+    'application/vnd.oasis.opendocument.spreadsheet': '.ods',
+    'application/vnd.oasis.opendocument.presentation': '.odp',
+}
+
+# Nomes (UTF-16) dos fluxos principais de documentos OLE2 do Office 97-2003
+_OLE2_STREAMS = (
+    ('WordDocument'.encode('utf-16-le'), '.doc'),
+    ('Workbook'.encode('utf-16-le'), '.xls'),
+    ('Book'.encode('utf-16-le'), '.xls'),
+    ('PowerPoint Document'.encode('utf-16-le'), '.ppt'),
+)
+
+# Tipos MIME (do python-magic ou do cabeçalho Content-Type) e suas extensões
+MIME_EXTENSIONS = {
+    'application/pdf': '.pdf',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': '.xlsx',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': '.pptx',
+    'application/msword': '.doc',
+    'application/vnd.ms-excel': '.xls',
+    'application/vnd.ms-powerpoint': '.ppt',
+    'application/json': '.json',
+    'application/xml': '.xml',
+    'text/xml': '.xml',
+    'application/yaml': '.yaml',
+    'application/x-yaml': '.yaml',
+    'text/yaml': '.yaml',
+    'text/html': '.html',
+    'text/csv': '.csv',
+    'text/plain': '.txt',
+    **{mimetype: extension for mimetype, extension in _ODF_MIMETYPES.items()},
+}
+
+# Extensões de formatos textuais, que não têm assinatura binária
+TEXT_EXTENSIONS = frozenset(['.txt', '.csv', '.json', '.xml', '.yml', '.yaml', '.html', '.htm'])
+
+_BOMS = (b'\xef\xbb\xbf', b'\xff\xfe', b'\xfe\xff')
+
+
+def extension_for_mime(content_type: Optional[str]) -> Optional[str]:
+    """Extensão correspondente a um Content-Type (parâmetros como charset são ignorados)."""
+    if not content_type:
+        return None
+    return MIME_EXTENSIONS.get(content_type.split(';', 1)[0].strip().lower())
+
+
+def _sniff_zip(source: InputFile) -> Optional[str]:
+    # Lê apenas o diretório central; nenhuma entrada é descompactada, exceto
+    # o "mimetype" dos pacotes OpenDocument, que tem poucos bytes
+    try:
+        with source.reader() as file, zipfile.ZipFile(file) as archive:
+            names = set(archive.namelist())
+            for entry, extension in _OOXML_ENTRIES:
+                if entry in names:
+                    return extension
+            if 'mimetype' in names:
+                mimetype = archive.read('mimetype')[:128].decode('ascii', 'ignore').strip()
+                return _ODF_MIMETYPES.get(mimetype)
+    except (zipfile.BadZipFile, OSError):
+        return None
+    return None
+
+
+def _sniff_ole2(file: BinaryIO, header: bytes) -> Optional[str]:
+    # O cabeçalho informa o tamanho do setor e o primeiro setor do diretório,
+    # cujas entradas trazem os nomes dos fluxos em UTF-16
+    if len(header) < 512:
+        return None
+    sector_shift = struct.unpack_from('<H', header, 0x1E)[0]
+    directory_sector = struct.unpack_from('<I', header, 0x30)[0]
+    if not 7 <= sector_shift <= 16:
+        return None
+    sector_size = 1 << sector_shift
+    file.seek((directory_sector + 1) * sector_size)
+    directory = file.read(sector_size)
+    for name, extension in _OLE2_STREAMS:
+        if name in directory:
+            return extension
+    return None
+
+
+def _sniff_text(prefix: bytes) -> Optional[str]:
+    for bom in _BOMS:
+        if prefix.startswith(bom):
+            prefix = prefix[len(bom):]
+            break
+    if b'\x00' in prefix[:1024]:
+        return None
+    head = prefix.lstrip()[:512].lower()
+    if head.startswith((b'<!doctype html', b'<html')):
+        return '.html'
+    if head.startswith(b'<?xml') or head.startswith(b'<'):
+        return '.html' if b'<html' in head else '.xml'
+    if head.startswith((b'{', b'[')):
+        return '.json'
+    if head.startswith(b'---') or head.startswith(b'%yaml'):
+        return '.yaml'
+    return None
+
+
+def _sniff_magic(prefix: bytes) -> Optional[str]:
+    if magic is None:
+        return None
+    try:
+        extension = extension_for_mime(magic.from_buffer(prefix, mime=True))
+    except Exception:
+        return None
+    # "text/plain" é o palpite genérico da libmagic para qualquer texto e não
+    # basta para contrariar a extensão do arquivo
+    return None if extension == '.txt' else extension
+
+
+def sniff_format(file_path: str) -> Optional[str]:
+    """
+    Detecta o formato de um arquivo e retorna a extensão correspondente (ex.: ``.docx``).
+
+    Reconhece PDF, pacotes ZIP do Office/OpenDocument, documentos OLE2 do
+    Office 97-2003 e, pelo início do texto, HTML, XML, JSON e YAML. Retorna
+    ``None`` quando o conteúdo não é reconhecido (ex.: texto simples ou CSV).
+    """
+    with open_input(file_path) as source:
+        prefix = source.head(SNIFF_BYTES)
+        if _PDF_SIGNATURE in prefix[:1024]:
+            return '.pdf'
+        if prefix.startswith(_OLE2_SIGNATURE):
+            with source.reader() as file:
+                return _sniff_ole2(file, prefix)
+        if prefix.startswith(_ZIP_SIGNATURE):
+            return _sniff_zip(source)
+    return _sniff_text(prefix) or _sniff_magic(prefix)
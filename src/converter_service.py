@@ -0,0 +1,279 @@
+"""
+Serviço de conversão: processos conversores pré-criados atrás de um socket Unix.
+
+O serviço roda separado da API e mantém um pool de processos filhos que já
+importaram as bibliotecas de conversão (pdfplumber, openpyxl, python-docx
+etc.). Os workers do uvicorn enviam pelo socket apenas o caminho do arquivo
+temporário e recebem o texto, então a conversão não disputa a CPU nem a
+memória do processo que atende HTTP, e o número de conversores é ajustado
+independentemente do número de workers da API. API e serviço precisam
+enxergar o mesmo diretório temporário.
+
+Os conversores são os do ``SandboxPool``, com os mesmos limites de memória,
+CPU e reciclagem. Cada mensagem é um JSON precedido do tamanho em 4 bytes
+(big-endian):
+
+    pedido:   {"method": "convert_file" | "convert_segments" | "ping",
+               "file_path": ..., "filename": ..., "content_type": ..., "clean": ...,
+               "timeout": segundos restantes do prazo ou null}
+    resposta: {"ok": true, "result": ..., "spans": {...}, "truncated": motivo ou null}
+              {"ok": false, "error": ..., "error_type": ..., "reason": ...}
+
+Uso:
+    python src/converter_service.py --socket /tmp/textify-converter.sock [--workers 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import struct
+import sys
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+import tracing
+from deadlines import Deadline, apply_truncation, remaining_seconds, run_with_deadline
+from sandbox import SandboxLimitExceeded, SandboxPool
+from segments import Segment
+
+# Tamanho máximo de uma mensagem (o texto extraído de um arquivo grande)
+MAX_MESSAGE_BYTES = 512 * 1024 * 1024
+
+_HEADER = struct.Struct('>I')
+
+
+class ConverterServiceError(Exception):
+    """Falha na comunicação com o serviço de conversão."""
+
+
+def parse_tag_list(value: Optional[str]) -> Optional[list]:
+    """Converte uma lista separada por vírgulas em lista de tags (None se vazia)"""
+    if not value:
+        return None
+    tags = [tag.strip() for tag in value.split(',') if tag.strip()]
+    return tags or None
+
+
+def converter_options_from_env() -> dict:
+    """Opções do FileConverter lidas das variáveis de ambiente (API e serviço)."""
+    return dict(
+        xml_include_tags=parse_tag_list(os.getenv("XML_INCLUDE_TAGS")),
+        xml_exclude_tags=parse_tag_list(os.getenv("XML_EXCLUDE_TAGS")),
+        structured_mode=os.getenv("STRUCTURED_OUTPUT_MODE", "pretty"),
+        csv_max_rows=int(os.getenv("CSV_MAX_ROWS")) if os.getenv("CSV_MAX_ROWS") else None,
+        csv_engine=os.getenv("CSV_ENGINE", "auto"),
+        spreadsheet_engine=os.getenv("SPREADSHEET_ENGINE", "stream"),
+        content_sniffing=os.getenv("CONTENT_SNIFFING", "true").lower() != "false",
+    )
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[dict]:
+    """Lê uma mensagem; None quando a conexão foi fechada."""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ConverterServiceError(f"Mensagem de {size} bytes excede o limite")
+    return json.loads(await reader.readexactly(size))
+
+
+async def write_message(writer: asyncio.StreamWriter, message: dict):
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def execute_request(converter, request: dict) -> dict:
+    """Executa um pedido de conversão no ``converter`` e monta a resposta."""
+    method = request.get('method')
+    if method == 'convert_file':
+        async def convert(deadline: Deadline):
+            return await converter.convert_file(
+                request['file_path'], request['filename'], request.get('content_type'),
+                deadline=deadline
+            )
+    elif method == 'convert_segments':
+        async def convert(deadline: Deadline):
+            segments = await converter.convert_segments(
+                request['file_path'], request['filename'], bool(request.get('clean')),
+                request.get('content_type'), deadline=deadline
+            )
+            return [segment.to_dict() for segment in segments]
+    else:
+        return {'ok': False, 'error': f"Método desconhecido: {method}", 'error_type': 'ValueError'}
+
+    trace, token = tracing.start_trace()
+    try:
+        result, truncated = await run_with_deadline(request.get('timeout'), convert)
+    except SandboxLimitExceeded as e:
+        return {'ok': False, 'error': str(e), 'error_type': 'SandboxLimitExceeded', 'reason': e.reason}
+    except Exception as e:
+        return {'ok': False, 'error': str(e), 'error_type': type(e).__name__}
+    finally:
+        tracing.end_trace(token)
+    return {'ok': True, 'result': result, 'spans': trace.spans, 'truncated': truncated}
+
+
+def unpack_response(response: dict, deadline: Optional[Deadline] = None):
+    """
+    Resultado de uma resposta; levanta o erro que ela carrega, com o tipo
+    original. O corte do texto pelo prazo é aplicado a ``deadline``.
+    """
+    for name, (duration, count) in response.get('spans', {}).items():
+        tracing.record(name, duration, count)
+    if response['ok']:
+        apply_truncation(deadline, response.get('truncated'))
+        return response['result']
+    if response['error_type'] == 'SandboxLimitExceeded':
+        raise SandboxLimitExceeded(response['reason'], response['error'])
+    if response['error_type'] == 'ValueError':
+        raise ValueError(response['error'])
+    raise RuntimeError(response['error'])
+
+
+class ConverterService:
+    """Servidor do socket Unix que repassa os pedidos ao ``SandboxPool``."""
+
+    def __init__(self, pool: SandboxPool, socket_path: str):
+        self.pool = pool
+        self.socket_path = socket_path
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        # Só o usuário do serviço (e o da API, o mesmo no contêiner) acessa o socket
+        os.chmod(self.socket_path, 0o600)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Uma conexão pode levar vários pedidos, atendidos em sequência
+        try:
+            while True:
+                request = await read_message(reader)
+                if request is None:
+                    break
+                await write_message(writer, await self._dispatch(request))
+        except (ConnectionError, ConverterServiceError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: dict) -> dict:
+        if request.get('method') == 'ping':
+            return {'ok': True, 'result': {'workers': self.pool.workers, 'pid': os.getpid()}}
+        return await execute_request(self.pool, request)
+
+
+class ConverterClient:
+    """
+    Cliente do serviço de conversão, com a interface de conversão do ``FileConverter``.
+
+    Abre uma conexão por pedido: no socket Unix isso custa microssegundos e
+    evita compartilhar uma conexão entre requisições concorrentes.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+
+    async def _call(self, request: dict, deadline: Optional[Deadline] = None):
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        except OSError as e:
+            raise ConverterServiceError(f"Serviço de conversão indisponível em {self.socket_path}: {e}")
+        try:
+            await write_message(writer, request)
+            response = await read_message(reader)
+        finally:
+            writer.close()
+        if response is None:
+            raise ConverterServiceError("O serviço de conversão fechou a conexão")
+        return unpack_response(response, deadline)
+
+    async def ping(self) -> dict:
+        return await self._call({'method': 'ping'})
+
+    async def convert_file(self, file_path: str, filename: str,
+                           content_type: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> str:
+        return await self._call({
+            'method': 'convert_file', 'file_path': os.path.abspath(file_path),
+            'filename': filename, 'content_type': content_type,
+            'timeout': remaining_seconds(deadline),
+        }, deadline)
+
+    async def convert_segments(self, file_path: str, filename: str, clean: bool = False,
+                               content_type: Optional[str] = None,
+                               deadline: Optional[Deadline] = None) -> List[Segment]:
+        segments = await self._call({
+            'method': 'convert_segments', 'file_path': os.path.abspath(file_path),
+            'filename': filename, 'clean': clean, 'content_type': content_type,
+            'timeout': remaining_seconds(deadline),
+        }, deadline)
+        return [Segment(**segment) for segment in segments]
+
+
+def add_pool_arguments(parser: argparse.ArgumentParser):
+    """Opções de linha de comando do pool de conversores (padrões do ambiente)."""
+    parser.add_argument('--workers', type=int, default=int(os.getenv("CONVERTER_WORKERS", os.cpu_count() or 2)))
+    parser.add_argument('--memory-mb', type=int, default=int(os.getenv("SANDBOX_MEMORY_MB", "256")))
+    parser.add_argument('--address-space-mb', type=int, default=int(os.getenv("SANDBOX_ADDRESS_SPACE_MB", "1024")))
+    parser.add_argument('--cpu-seconds', type=float, default=float(os.getenv("SANDBOX_CPU_SECONDS", "60")))
+    parser.add_argument('--max-jobs', type=int, default=int(os.getenv("SANDBOX_MAX_JOBS", "50")))
+
+
+def create_pool(args: argparse.Namespace) -> SandboxPool:
+    """Pool de conversores com os filhos já criados."""
+    pool = SandboxPool(
+        converter_options=converter_options_from_env(),
+        workers=args.workers,
+        memory_limit_mb=args.memory_mb,
+        address_space_mb=args.address_space_mb,
+        cpu_seconds=args.cpu_seconds,
+        max_jobs_per_worker=args.max_jobs,
+    )
+    pool.warm_up()
+    return pool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--socket', default=os.getenv("CONVERTER_SOCKET", "/tmp/textify-converter.sock"))
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+
+    pool = create_pool(args)
+    service = ConverterService(pool, args.socket)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+        await service.start()
+        print(f"Serviço de conversão em {args.socket} com {args.workers} conversores", flush=True)
+        await stop
+        await service.close()
+
+    try:
+        asyncio.run(run())
+    finally:
+        pool.shutdown()
+        metrics.registry.flush()
+
+
+if __name__ == "__main__":
+    main()
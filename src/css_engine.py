@@ -0,0 +1,493 @@
+"""
+Motor CSS mínimo para a conversão HTML -> DOCX.
+
+A folha de estilos é interpretada uma única vez e indexada por id, classe e
+tag do seletor mais à direita. O estilo computado de cada elemento é obtido
+em uma passada de cima para baixo, herdando as propriedades herdáveis do pai,
+de forma que o custo por elemento é proporcional às regras candidatas e não
+ao tamanho da folha de estilos.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Propriedades que o CSS herda do elemento pai. text-decoration não é
+# herdada pela especificação, mas se propaga visualmente aos descendentes
+# inline, e no DOCX cada run precisa carregá-la explicitamente.
+INHERITED_PROPERTIES = frozenset([
+    'color', 'font-family', 'font-size', 'font-style', 'font-weight',
+    'font-variant', 'line-height', 'letter-spacing', 'text-align',
+    'text-indent', 'text-transform', 'text-decoration', 'white-space',
+    'visibility', 'list-style-type',
+])
+
+# Estilos padrão do "navegador" (origem user-agent, menor prioridade)
+DEFAULT_STYLESHEET = """
+h1 { font-size: 24pt; font-weight: bold; }
+h2 { font-size: 20pt; font-weight: bold; }
+h3 { font-size: 18pt; font-weight: bold; }
+h4 { font-size: 16pt; font-weight: bold; }
+h5 { font-size: 14pt; font-weight: bold; }
+h6 { font-size: 12pt; font-weight: bold; }
+strong, b, th { font-weight: bold; }
+em, i, cite, var { font-style: italic; }
+u, ins { text-decoration: underline; }
+s, strike, del { text-decoration: line-through; }
+pre, code, kbd, samp { font-family: Courier New; }
+pre { white-space: pre; }
+"""
+
+# Tamanho base (pt) usado para resolver unidades relativas sem pai definido
+BASE_FONT_SIZE_PT = 14.0
+
+ORIGIN_USER_AGENT = 0
+ORIGIN_AUTHOR = 1
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+_COMPOUND_TOKEN_RE = re.compile(
+    r'(?P<tag>\*|[a-zA-Z][\w-]*)'
+    r'|#(?P<id>[\w-]+)'
+    r'|\.(?P<cls>[\w-]+)'
+    r'|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[~|^$*]?=)\s*'
+    r'(?P<val>"[^"]*"|\'[^\']*\'|[^\]\s]+)\s*)?\]'
+    r'|(?P<pseudo>::?[\w-]+(?:\([^)]*\))?)'
+)
+_FONT_SIZE_RE = re.compile(r'^(\d+(?:\.\d+)?)(px|pt|em|rem|%)$')
+
+# Pseudo-classes estruturais suportadas; as demais (:hover, ::before...)
+# nunca casam em um documento estático
+_SUPPORTED_PSEUDOS = frozenset([':first-child', ':last-child', ':only-child'])
+
+
+@dataclass
+class Compound:
+    """Seletor composto (ex.: ``div.nota#aviso[lang]``)."""
+    tag: Optional[str] = None
+    id: Optional[str] = None
+    classes: Tuple[str, ...] = ()
+    attributes: Tuple[Tuple[str, Optional[str], Optional[str]], ...] = ()
+    pseudos: Tuple[str, ...] = ()
+
+
+@dataclass
+class Selector:
+    """Seletor complexo: compostos ligados por combinadores, da esquerda para a direita."""
+    compounds: List[Compound]
+    combinators: List[str]
+    specificity: Tuple[int, int, int]
+
+    @property
+    def subject(self) -> Compound:
+        return self.compounds[-1]
+
+
+@dataclass
+class Rule:
+    """Regra indexada: um seletor e suas declarações."""
+    selector: Selector
+    declarations: List[Tuple[str, str, bool]]
+    origin: int
+    order: int
+
+
+@dataclass
+class Stylesheet:
+    """Conjunto de regras indexado por id, classe e tag do sujeito do seletor."""
+    by_id: Dict[str, List[Rule]] = field(default_factory=dict)
+    by_class: Dict[str, List[Rule]] = field(default_factory=dict)
+    by_tag: Dict[str, List[Rule]] = field(default_factory=dict)
+    universal: List[Rule] = field(default_factory=list)
+    rule_count: int = 0
+
+    def add_css(self, css_text: str, origin: int = ORIGIN_AUTHOR) -> None:
+        """Interpreta um bloco CSS e adiciona suas regras ao índice."""
+        for selector_text, block in _iter_rule_blocks(css_text):
+            declarations = parse_declarations(block)
+            if not declarations:
+                continue
+            for part in selector_text.split(','):
+                selector = parse_selector(part)
+                if selector is None:
+                    continue
+                self._index(Rule(selector, declarations, origin, self.rule_count))
+                self.rule_count += 1
+
+    def _index(self, rule: Rule) -> None:
+        subject = rule.selector.subject
+        if subject.id:
+            self.by_id.setdefault(subject.id, []).append(rule)
+        elif subject.classes:
+            self.by_class.setdefault(subject.classes[0], []).append(rule)
+        elif subject.tag:
+            self.by_tag.setdefault(subject.tag, []).append(rule)
+        else:
+            self.universal.append(rule)
+
+    def matching_rules(self, element) -> List[Rule]:
+        """Retorna as regras que casam com o elemento, em ordem de cascata."""
+        candidates: List[Rule] = []
+        element_id = element.get('id')
+        if element_id and element_id in self.by_id:
+            candidates.extend(self.by_id[element_id])
+        for class_name in _element_classes(element):
+            rules = self.by_class.get(class_name)
+            if rules:
+                candidates.extend(rules)
+        tag_rules = self.by_tag.get(element.name.lower())
+        if tag_rules:
+            candidates.extend(tag_rules)
+        candidates.extend(self.universal)
+
+        seen = set()
+        matched = []
+        for rule in candidates:
+            if rule.order in seen:
+                continue
+            seen.add(rule.order)
+            if _matches(rule.selector, element):
+                matched.append(rule)
+        matched.sort(key=lambda r: (r.origin, r.selector.specificity, r.order))
+        return matched
+
+    def compute(self, element, parent_style: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Calcula o estilo de um elemento a partir do estilo computado do pai.
+
+        Aplica, nesta ordem: propriedades herdadas do pai, regras da folha de
+        estilos (por origem, especificidade e ordem), estilo inline e, por
+        fim, as declarações ``!important``.
+        """
+        style: Dict[str, str] = {}
+        if parent_style:
+            for prop, value in parent_style.items():
+                if prop in INHERITED_PROPERTIES:
+                    style[prop] = value
+
+        important: List[Tuple[str, str]] = []
+        for rule in self.matching_rules(element):
+            for prop, value, is_important in rule.declarations:
+                if is_important:
+                    important.append((prop, value))
+                else:
+                    style[prop] = value
+
+        inline = element.get('style')
+        if inline:
+            inline_important = []
+            for prop, value, is_important in parse_declarations(inline):
+                if is_important:
+                    inline_important.append((prop, value))
+                else:
+                    style[prop] = value
+            important.extend(inline_important)
+
+        for prop, value in important:
+            style[prop] = value
+
+        for prop, value in list(style.items()):
+            if value.lower() == 'inherit':
+                if parent_style and prop in parent_style:
+                    style[prop] = parent_style[prop]
+                else:
+                    del style[prop]
+
+        if 'font-size' in style:
+            style['font-size'] = _resolve_font_size(style['font-size'], parent_style)
+
+        return style
+
+
+def parse_declarations(block: str) -> List[Tuple[str, str, bool]]:
+    """Interpreta ``prop: valor [!important]; ...`` em uma lista de declarações."""
+    declarations = []
+    for item in _COMMENT_RE.sub('', block).split(';'):
+        if ':' not in item:
+            continue
+        prop, value = item.split(':', 1)
+        prop = prop.strip().lower()
+        value = value.strip()
+        important = False
+        if value.lower().endswith('!important'):
+            important = True
+            value = value[:-len('!important')].rstrip()
+        if prop and value:
+            declarations.append((prop, value, important))
+    return declarations
+
+
+def parse_selector(text: str) -> Optional[Selector]:
+    """Interpreta um seletor complexo. Retorna ``None`` para seletores não suportados."""
+    text = text.strip()
+    if not text:
+        return None
+
+    tokens = _tokenize_selector(text)
+    if tokens is None:
+        return None
+
+    compounds: List[Compound] = []
+    combinators: List[str] = []
+    pending_combinator = ' '
+    for token in tokens:
+        if token in ('>', '+', '~'):
+            if not compounds:
+                return None
+            pending_combinator = token
+            continue
+        compound = _parse_compound(token)
+        if compound is None:
+            return None
+        if compounds:
+            combinators.append(pending_combinator)
+        compounds.append(compound)
+        pending_combinator = ' '
+
+    if not compounds:
+        return None
+
+    ids = sum(1 for c in compounds if c.id)
+    classes = sum(len(c.classes) + len(c.attributes) + len(c.pseudos) for c in compounds)
+    tags = sum(1 for c in compounds if c.tag and c.tag != '*')
+    return Selector(compounds, combinators, (ids, classes, tags))
+
+
+def _tokenize_selector(text: str) -> Optional[List[str]]:
+    """Separa compostos e combinadores, ignorando o conteúdo de ``[...]`` e aspas.
+
+    Retorna ``None`` para colchetes ou aspas não fechados.
+    """
+    tokens: List[str] = []
+    current: List[str] = []
+    quote = None
+    in_brackets = False
+    for char in text:
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif in_brackets:
+            current.append(char)
+            if char in '"\'':
+                quote = char
+            elif char == ']':
+                in_brackets = False
+        elif char == '[':
+            current.append(char)
+            in_brackets = True
+        elif char in '>+~' or char.isspace():
+            if current:
+                tokens.append(''.join(current))
+                current = []
+            if not char.isspace():
+                tokens.append(char)
+        else:
+            current.append(char)
+    if quote or in_brackets:
+        return None
+    if current:
+        tokens.append(''.join(current))
+    return tokens
+
+
+def _parse_compound(token: str) -> Optional[Compound]:
+    compound = Compound()
+    classes: List[str] = []
+    attributes = []
+    pseudos = []
+    position = 0
+    while position < len(token):
+        match = _COMPOUND_TOKEN_RE.match(token, position)
+        if not match:
+            return None
+        if match.group('tag'):
+            if position != 0:
+                return None
+            compound.tag = match.group('tag').lower()
+        elif match.group('id'):
+            compound.id = match.group('id')
+        elif match.group('cls'):
+            classes.append(match.group('cls'))
+        elif match.group('attr'):
+            value = match.group('val')
+            if value and value[0] in '"\'':
+                value = value[1:-1]
+            attributes.append((match.group('attr').lower(), match.group('op'), value))
+        else:
+            pseudo = match.group('pseudo').lower()
+            if pseudo not in _SUPPORTED_PSEUDOS:
+                return None
+            pseudos.append(pseudo)
+        position = match.end()
+    compound.classes = tuple(classes)
+    compound.attributes = tuple(attributes)
+    compound.pseudos = tuple(pseudos)
+    return compound
+
+
+def _iter_rule_blocks(css_text: str):
+    """Percorre as regras de primeiro nível, ignorando at-rules (@media, @font-face...)."""
+    css_text = _COMMENT_RE.sub('', css_text)
+    position = 0
+    length = len(css_text)
+    while position < length:
+        open_brace = css_text.find('{', position)
+        if open_brace == -1:
+            return
+        prelude = css_text[position:open_brace].strip()
+
+        # Diretivas sem bloco (@import, @charset) terminam em ';'
+        while prelude.startswith('@') and ';' in prelude:
+            prelude = prelude.split(';', 1)[1].strip()
+
+        depth = 1
+        cursor = open_brace + 1
+        while cursor < length and depth:
+            char = css_text[cursor]
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            cursor += 1
+        block = css_text[open_brace + 1:cursor - 1]
+        position = cursor
+
+        if prelude and not prelude.startswith('@'):
+            yield prelude, block
+
+
+def _element_classes(element) -> List[str]:
+    classes = element.get('class') or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return classes
+
+
+def _previous_element(element):
+    sibling = element.previous_sibling
+    while sibling is not None and sibling.name is None:
+        sibling = sibling.previous_sibling
+    return sibling
+
+
+def _next_element(element):
+    sibling = element.next_sibling
+    while sibling is not None and sibling.name is None:
+        sibling = sibling.next_sibling
+    return sibling
+
+
+def _parent_element(element):
+    parent = element.parent
+    if parent is None or parent.name in (None, '[document]'):
+        return None
+    return parent
+
+
+def _matches_compound(compound: Compound, element) -> bool:
+    if compound.tag and compound.tag != '*' and element.name.lower() != compound.tag:
+        return False
+    if compound.id and element.get('id') != compound.id:
+        return False
+    if compound.classes:
+        element_classes = _element_classes(element)
+        for class_name in compound.classes:
+            if class_name not in element_classes:
+                return False
+    for name, op, expected in compound.attributes:
+        actual = element.get(name)
+        if actual is None:
+            return False
+        if isinstance(actual, list):
+            actual = ' '.join(actual)
+        if op is None:
+            continue
+        if op == '=' and actual != expected:
+            return False
+        if op == '~=' and expected not in actual.split():
+            return False
+        if op == '|=' and not (actual == expected or actual.startswith(expected + '-')):
+            return False
+        if op == '^=' and not actual.startswith(expected):
+            return False
+        if op == '$=' and not actual.endswith(expected):
+            return False
+        if op == '*=' and expected not in actual:
+            return False
+    for pseudo in compound.pseudos:
+        if pseudo == ':first-child' and _previous_element(element) is not None:
+            return False
+        if pseudo == ':last-child' and _next_element(element) is not None:
+            return False
+        if pseudo == ':only-child' and (
+            _previous_element(element) is not None or _next_element(element) is not None
+        ):
+            return False
+    return True
+
+
+def _matches(selector: Selector, element) -> bool:
+    """Verifica o seletor da direita para a esquerda a partir do elemento."""
+    if not _matches_compound(selector.subject, element):
+        return False
+    return _matches_from(selector, len(selector.compounds) - 2, element)
+
+
+def _matches_from(selector: Selector, index: int, element) -> bool:
+    if index < 0:
+        return True
+    compound = selector.compounds[index]
+    combinator = selector.combinators[index]
+
+    if combinator == '>':
+        parent = _parent_element(element)
+        return (parent is not None and _matches_compound(compound, parent)
+                and _matches_from(selector, index - 1, parent))
+    if combinator == '+':
+        sibling = _previous_element(element)
+        return (sibling is not None and _matches_compound(compound, sibling)
+                and _matches_from(selector, index - 1, sibling))
+    if combinator == '~':
+        sibling = _previous_element(element)
+        while sibling is not None:
+            if _matches_compound(compound, sibling) and _matches_from(selector, index - 1, sibling):
+                return True
+            sibling = _previous_element(sibling)
+        return False
+
+    ancestor = _parent_element(element)
+    while ancestor is not None:
+        if _matches_compound(compound, ancestor) and _matches_from(selector, index - 1, ancestor):
+            return True
+        ancestor = _parent_element(ancestor)
+    return False
+
+
+def _resolve_font_size(value: str, parent_style: Optional[Dict[str, str]]) -> str:
+    """Converte tamanhos relativos (em, rem, %) em pontos usando o tamanho do pai."""
+    match = _FONT_SIZE_RE.match(value.strip().lower())
+    if not match:
+        return value
+    number, unit = float(match.group(1)), match.group(2)
+    if unit in ('px', 'pt'):
+        return value
+
+    parent_size = BASE_FONT_SIZE_PT
+    if unit != 'rem' and parent_style and 'font-size' in parent_style:
+        parent_match = _FONT_SIZE_RE.match(parent_style['font-size'].strip().lower())
+        if parent_match and parent_match.group(2) in ('px', 'pt'):
+            parent_size = float(parent_match.group(1))
+
+    factor = number / 100 if unit == '%' else number
+    return f"{parent_size * factor:g}pt"
+
+
+def build_stylesheet(css_texts=(), include_defaults: bool = True) -> Stylesheet:
+    """Cria uma folha de estilos indexada a partir de blocos CSS."""
+    stylesheet = Stylesheet()
+    if include_defaults:
+        stylesheet.add_css(DEFAULT_STYLESHEET, origin=ORIGIN_USER_AGENT)
+    for css_text in css_texts:
+        if css_text:
+            stylesheet.add_css(css_text)
+    return stylesheet
@@ -0,0 +1,126 @@
+"""
+Prazo das extrações, com texto parcial quando ele se esgota.
+
+Cada requisição pode ter um ``Deadline``. Os leitores que produzem o texto
+em unidades (páginas, planilhas, slides ou blocos de linhas) consultam o
+prazo entre uma unidade e outra. Esgotado o prazo, eles param e devolvem o
+que já extraíram, e o prazo fica marcado como cortado (``truncated``), com
+o motivo. Ferramentas externas (antiword, catdoc, LibreOffice) usam como
+tempo limite o menor entre o seu e o que resta do prazo.
+
+Quem chama o ``FileConverter`` passa o prazo no parâmetro ``deadline``.
+Durante a conversão ele fica em uma ``ContextVar``, de onde os conversores
+internos o leem sem receber parâmetros extras. Entre processos (sandbox,
+serviço de conversão, fila), o prazo viaja como segundos restantes
+(``remaining_seconds``). Do outro lado, o processo conversor executa a
+conversão com ``run_with_deadline``, que recria o prazo e devolve o motivo do
+corte, aplicado ao prazo original com ``apply_truncation``.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Motivo do corte do texto
+DEADLINE_EXCEEDED = 'deadline_exceeded'
+
+
+class Deadline:
+    """Prazo de uma conversão, contado a partir da criação; ``None`` não tem limite."""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = None if seconds is None else time.monotonic() + seconds
+        self.reason: Optional[str] = None
+
+    def remaining(self) -> Optional[float]:
+        """Segundos restantes (None sem limite)."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    @property
+    def truncated(self) -> bool:
+        return self.reason is not None
+
+    def truncate(self, reason: str = DEADLINE_EXCEEDED):
+        """Marca o texto como cortado; o primeiro motivo prevalece."""
+        if self.reason is None:
+            self.reason = reason
+
+    def check(self) -> bool:
+        """True, marcando o corte, se o prazo acabou (consultado entre unidades)."""
+        if self.expired:
+            self.truncate()
+            return True
+        return False
+
+    def timeout(self, default: float) -> float:
+        """Tempo limite de uma ferramenta externa: o menor entre ``default`` e o restante."""
+        remaining = self.remaining()
+        return default if remaining is None else min(default, remaining)
+
+    def copy(self) -> 'Deadline':
+        """Prazo com o mesmo vencimento, sem o corte (ex.: um por item de um lote)."""
+        deadline = Deadline()
+        deadline.seconds, deadline.expires_at = self.seconds, self.expires_at
+        return deadline
+
+
+def remaining_seconds(deadline: Optional[Deadline]) -> Optional[float]:
+    """Segundos restantes a enviar a outro processo (None sem prazo)."""
+    return None if deadline is None else deadline.remaining()
+
+
+def apply_truncation(deadline: Optional[Deadline], reason: Optional[str]):
+    """Aplica ao prazo original o corte ocorrido em outro processo."""
+    if deadline is not None and reason:
+        deadline.truncate(reason)
+
+
+async def run_with_deadline(timeout: Optional[float],
+                            convert: Callable[[Deadline], Awaitable[T]]) -> Tuple[T, Optional[str]]:
+    """
+    Lado do processo conversor: executa ``convert(deadline)`` com o prazo
+    recriado a partir de ``timeout`` (segundos restantes recebidos de
+    ``remaining_seconds``) e devolve o resultado e o motivo do corte.
+    """
+    deadline = Deadline(timeout)
+    result = await convert(deadline)
+    return result, deadline.reason
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar('textify_deadline', default=None)
+
+
+@contextmanager
+def use_deadline(deadline: Optional[Deadline]) -> Iterator[None]:
+    """Torna ``deadline`` o prazo da conversão em andamento dentro do bloco."""
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def deadline_reached() -> bool:
+    """``check`` do prazo da conversão em andamento (False sem prazo)."""
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.check()
+
+
+def tool_timeout(default: float) -> float:
+    """``timeout`` do prazo da conversão em andamento (``default`` sem prazo)."""
+    deadline = _current_deadline.get()
+    return default if deadline is None else deadline.timeout(default)
@@ -0,0 +1,312 @@
+"""
+Leitura de texto de documentos do Word 97-2003 (.doc) sem processos externos.
+
+O .doc é um contêiner OLE2 (Compound File Binary): ``CompoundFile`` segue a
+FAT e o diretório até os fluxos ``WordDocument`` e ``0Table``/``1Table``. O
+FIB, no início do WordDocument, aponta para a tabela de peças (Clx) no fluxo
+da tabela; cada peça é um trecho do texto em cp1252 (comprimido) ou UTF-16,
+e as peças até ``ccpText`` caracteres formam o corpo do documento, sem
+notas de rodapé, cabeçalhos e comentários.
+
+Os caracteres especiais do Word viram texto simples: fins de parágrafo e
+quebras viram ``\\n``, fins de célula viram tabulação, dos campos fica só o
+resultado e marcadores de figuras e notas são removidos. Documentos
+criptografados, anteriores ao Word 97 ou corrompidos levantam
+``DocReaderError``, e o ``FileConverter`` recorre ao antiword/catdoc.
+"""
+
+import re
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+# Valores especiais nas cadeias da FAT e no diretório
+_END_OF_CHAIN = 0xFFFFFFFE
+_MAX_REGULAR_SECTOR = 0xFFFFFFFA
+_NO_STREAM = 0xFFFFFFFF
+_DIRECTORY_ENTRY_SIZE = 128
+_STREAM_OBJECT = 2
+_HEADER_DIFAT_ENTRIES = 109
+
+# Campos do FIB (File Information Block) usados na leitura
+_FIB_IDENT = 0xA5EC
+_FIB_MIN_VERSION = 0x00C0  # Word 97; versões anteriores têm outro layout
+_FIB_FLAGS = 0x000A
+_FLAG_ENCRYPTED = 0x0100
+_FLAG_WHICH_TABLE = 0x0200
+_FIB_CCP_TEXT = 0x004C
+_FIB_FC_CLX = 0x01A2
+_FIB_LCB_CLX = 0x01A6
+
+# Elementos do Clx e posição de cada peça no WordDocument
+_CLX_PRC = 0x01
+_CLX_PCDT = 0x02
+_PIECE_COMPRESSED = 0x40000000
+_PIECE_OFFSET_MASK = 0x3FFFFFFF
+
+# Campos: início, separador entre código e resultado, e fim
+_FIELD_MARKS = re.compile('[\x13\x14\x15]')
+
+# Caracteres especiais do texto do Word convertidos em texto simples; os
+# demais caracteres de controle (figuras, notas, objetos) são descartados
+_SPECIAL_CHARS = {code: None for code in range(0x20) if code not in (0x09, 0x0A)}
+_SPECIAL_CHARS.update({
+    0x07: '\t',   # fim de célula
+    0x0B: '\n',   # quebra de linha manual
+    0x0C: '\n',   # quebra de página ou de seção
+    0x0D: '\n',   # fim de parágrafo
+    0x0E: '\n',   # quebra de coluna
+    0x1E: '-',    # hífen não separável
+    0xA0: ' ',    # espaço não separável
+})
+
+
+class DocReaderError(Exception):
+    """Documento que o leitor interno não consegue ler."""
+
+
+class CompoundFile:
+    """Leitor mínimo de contêineres OLE2: fluxos da raiz, lidos por nome."""
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        header = file.read(512)
+        if len(header) < 512 or not header.startswith(OLE2_SIGNATURE):
+            raise DocReaderError("não é um arquivo OLE2")
+        sector_shift, mini_shift = struct.unpack_from('<HH', header, 0x1E)
+        if sector_shift not in (9, 12) or mini_shift >= sector_shift:
+            raise DocReaderError(f"tamanho de setor inválido (2^{sector_shift})")
+        self.sector_size = 1 << sector_shift
+        self.mini_sector_size = 1 << mini_shift
+        self._version = struct.unpack_from('<H', header, 0x1A)[0]
+        (fat_count, directory_start, _, self._mini_cutoff, mini_fat_start,
+         mini_fat_count, difat_start, difat_count) = struct.unpack_from('<IIIIIIII', header, 0x2C)
+
+        self._fat = self._read_fat(header, fat_count, difat_start, difat_count)
+        directory = self._read_chain(self._fat, directory_start)
+        self.streams, root = self._read_directory(directory)
+        self._mini_fat = None
+        self._mini_fat_start = mini_fat_start
+        self._mini_stream_entry = root
+
+    def _sector(self, sector: int, count: int = 1) -> bytes:
+        self._file.seek((sector + 1) * self.sector_size)
+        data = self._file.read(self.sector_size * count)
+        if len(data) < self.sector_size * count:
+            raise DocReaderError(f"setor {sector} além do fim do arquivo")
+        return data
+
+    def _read_fat(self, header: bytes, fat_count: int, difat_start: int, difat_count: int) -> List[int]:
+        fat_sectors = list(struct.unpack_from(f'<{_HEADER_DIFAT_ENTRIES}I', header, 0x4C))
+        per_sector = self.sector_size // 4
+        sector, seen = difat_start, 0
+        while sector <= _MAX_REGULAR_SECTOR and seen < difat_count:
+            entries = struct.unpack(f'<{per_sector}I', self._sector(sector))
+            fat_sectors.extend(entries[:-1])
+            sector, seen = entries[-1], seen + 1
+        fat_sectors = [sector for sector in fat_sectors if sector <= _MAX_REGULAR_SECTOR][:fat_count]
+        if not fat_sectors:
+            raise DocReaderError("FAT vazia")
+        fat: List[int] = []
+        for sector in fat_sectors:
+            fat.extend(struct.unpack(f'<{per_sector}I', self._sector(sector)))
+        return fat
+
+    def _chain(self, fat: List[int], start: int) -> Iterator[int]:
+        sector, visited = start, 0
+        while sector != _END_OF_CHAIN:
+            if sector >= len(fat) or visited >= len(fat):
+                raise DocReaderError("cadeia de setores inválida")
+            yield sector
+            sector, visited = fat[sector], visited + 1
+
+    def _read_chain(self, fat: List[int], start: int, size: int = -1) -> bytes:
+        # Setores consecutivos (o caso comum) são lidos de uma vez
+        parts = []
+        run_start, run_length = None, 0
+        for sector in self._chain(fat, start):
+            if run_start is not None and sector == run_start + run_length:
+                run_length += 1
+                continue
+            if run_start is not None:
+                parts.append(self._sector(run_start, run_length))
+            run_start, run_length = sector, 1
+        if run_start is not None:
+            parts.append(self._sector(run_start, run_length))
+        data = b''.join(parts)
+        if size >= 0:
+            if len(data) < size:
+                raise DocReaderError("fluxo menor que o tamanho declarado")
+            data = data[:size]
+        return data
+
+    def _read_directory(self, directory: bytes) -> Tuple[Dict[str, Tuple[int, int]], Tuple[int, int]]:
+        entries = []
+        for offset in range(0, len(directory) - _DIRECTORY_ENTRY_SIZE + 1, _DIRECTORY_ENTRY_SIZE):
+            name_size = struct.unpack_from('<H', directory, offset + 0x40)[0]
+            name = directory[offset:offset + max(0, min(name_size, 64) - 2)].decode('utf-16-le', 'replace')
+            kind = directory[offset + 0x42]
+            left, right, child = struct.unpack_from('<III', directory, offset + 0x44)
+            start, size_low, size_high = struct.unpack_from('<III', directory, offset + 0x74)
+            # Na versão 3 a parte alta do tamanho não é confiável
+            size = size_low if self._version < 4 else size_low | (size_high << 32)
+            entries.append((name, kind, left, right, child, start, size))
+        if not entries:
+            raise DocReaderError("diretório vazio")
+
+        # Só os filhos diretos da raiz: documentos incorporados (ObjectPool)
+        # têm fluxos com os mesmos nomes dentro de suas próprias pastas
+        streams = {}
+        pending, visited = [entries[0][4]], set()
+        while pending:
+            index = pending.pop()
+            if index == _NO_STREAM or index in visited or index >= len(entries):
+                continue
+            visited.add(index)
+            name, kind, left, right, _, start, size = entries[index]
+            if kind == _STREAM_OBJECT:
+                streams[name] = (start, size)
+            pending.extend((left, right))
+        root = entries[0]
+        return streams, (root[5], root[6])
+
+    def _read_mini_stream(self, start: int, size: int) -> bytes:
+        if self._mini_fat is None:
+            mini_fat = self._read_chain(self._fat, self._mini_fat_start)
+            self._mini_fat = list(struct.unpack(f'<{len(mini_fat) // 4}I', mini_fat))
+            self._mini_stream = self._read_chain(self._fat, *self._mini_stream_entry)
+        parts = []
+        for sector in self._chain(self._mini_fat, start):
+            offset = sector * self.mini_sector_size
+            parts.append(self._mini_stream[offset:offset + self.mini_sector_size])
+        data = b''.join(parts)
+        if len(data) < size:
+            raise DocReaderError("fluxo menor que o tamanho declarado")
+        return data[:size]
+
+    def read_stream(self, name: str) -> bytes:
+        """Conteúdo do fluxo ``name`` da raiz do contêiner."""
+        if name not in self.streams:
+            raise DocReaderError(f"fluxo {name} ausente")
+        start, size = self.streams[name]
+        if size == 0:
+            return b''
+        if size < self._mini_cutoff:
+            return self._read_mini_stream(start, size)
+        return self._read_chain(self._fat, start, size)
+
+
+def _read_pieces(table: bytes, fc_clx: int, lcb_clx: int) -> List[Tuple[int, int, int]]:
+    """Peças do texto (cp inicial, cp final, posição no WordDocument) a partir do Clx."""
+    end = fc_clx + lcb_clx
+    if lcb_clx == 0 or end > len(table):
+        raise DocReaderError("tabela de peças ausente")
+    position = fc_clx
+    while True:
+        if position >= end:
+            raise DocReaderError("tabela de peças ausente")
+        kind = table[position]
+        if kind == _CLX_PRC:
+            # Propriedades aplicadas às peças, irrelevantes para o texto
+            size = struct.unpack_from('<h', table, position + 1)[0]
+            if size < 0:
+                raise DocReaderError("Clx inválido")
+            position += 3 + size
+        elif kind == _CLX_PCDT:
+            size = struct.unpack_from('<I', table, position + 1)[0]
+            plc = table[position + 5:position + 5 + size]
+            break
+        else:
+            raise DocReaderError("Clx inválido")
+
+    # PlcPcd: n + 1 posições de caractere seguidas de n descritores de 8 bytes
+    count = (len(plc) - 4) // 12
+    if count <= 0 or len(plc) != count * 12 + 4:
+        raise DocReaderError("tabela de peças inválida")
+    cps = struct.unpack_from(f'<{count + 1}I', plc)
+    descriptors = (count + 1) * 4
+    return [(cps[index], cps[index + 1],
+             struct.unpack_from('<I', plc, descriptors + index * 8 + 2)[0])
+            for index in range(count)]
+
+
+def _piece_text(word: bytes, pieces: List[Tuple[int, int, int]], ccp_text: int) -> str:
+    parts = []
+    for cp_start, cp_end, fc in pieces:
+        count = min(cp_end, ccp_text) - cp_start
+        if count <= 0:
+            continue
+        if fc & _PIECE_COMPRESSED:
+            offset = (fc & _PIECE_OFFSET_MASK) // 2
+            data, encoding = word[offset:offset + count], 'cp1252'
+        else:
+            offset = fc & _PIECE_OFFSET_MASK
+            data, encoding = word[offset:offset + 2 * count], 'utf-16-le'
+            count *= 2
+        if len(data) < count:
+            raise DocReaderError("peça além do fim do fluxo WordDocument")
+        parts.append(data.decode(encoding, 'replace'))
+    return ''.join(parts)
+
+
+def _strip_field_codes(text: str) -> str:
+    """Mantém só o resultado dos campos (inclusive aninhados), sem os códigos."""
+    if '\x13' not in text:
+        return text
+    parts = []
+    # Para cada campo aberto, se ainda estamos no código (antes do separador)
+    in_code: List[bool] = []
+    start = 0
+    for match in _FIELD_MARKS.finditer(text):
+        if True not in in_code:
+            parts.append(text[start:match.start()])
+        mark = match.group()
+        if mark == '\x13':
+            in_code.append(True)
+        elif mark == '\x14':
+            if in_code:
+                in_code[-1] = False
+        elif in_code:
+            in_code.pop()
+        start = match.end()
+    if True not in in_code:
+        parts.append(text[start:])
+    return ''.join(parts)
+
+
+def _plain_text(text: str) -> str:
+    """Texto simples a partir do texto do Word, com caracteres especiais."""
+    text = _strip_field_codes(text)
+    # Célula seguida da marca de fim de linha da tabela encerra a linha
+    text = text.replace('\x07\x07', '\n').translate(_SPECIAL_CHARS)
+    lines = (line.rstrip() for line in text.split('\n'))
+    return '\n'.join(line for line in lines if line.strip())
+
+
+def read_doc_text(file: BinaryIO) -> str:
+    """
+    Texto do corpo de um documento do Word 97-2003 lido de ``file``.
+
+    Levanta ``DocReaderError`` para documentos que o leitor não entende.
+    """
+    try:
+        container = CompoundFile(file)
+        word = container.read_stream('WordDocument')
+        if len(word) < _FIB_LCB_CLX + 4:
+            raise DocReaderError("FIB truncado")
+        ident, version = struct.unpack_from('<HH', word, 0)
+        if ident != _FIB_IDENT:
+            raise DocReaderError("FIB inválido")
+        if version < _FIB_MIN_VERSION:
+            raise DocReaderError(f"versão anterior ao Word 97 (nFib {version:#x})")
+        flags = struct.unpack_from('<H', word, _FIB_FLAGS)[0]
+        if flags & _FLAG_ENCRYPTED:
+            raise DocReaderError("documento criptografado")
+        table = container.read_stream('1Table' if flags & _FLAG_WHICH_TABLE else '0Table')
+        ccp_text = struct.unpack_from('<i', word, _FIB_CCP_TEXT)[0]
+        fc_clx, lcb_clx = struct.unpack_from('<II', word, _FIB_FC_CLX)
+        pieces = _read_pieces(table, fc_clx, lcb_clx)
+    except (struct.error, IndexError, ValueError, OSError) as e:
+        raise DocReaderError(f"estrutura inválida: {e}")
+    return _plain_text(_piece_text(word, pieces, ccp_text))
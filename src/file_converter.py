@@ -1,12 +1,15 @@
 import os
 import json
-import csv
-import yaml
 import re
+import asyncio
 import unicodedata
+import locale
 import subprocess
+import tempfile
+import time
+import zipfile
 from io import StringIO
-from typing import Optional
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 # Importações para diferentes formatos
@@ -61,12 +64,166 @@ try:
 except ImportError:
     xlrd = None
 
+import metrics
+import tracing
+from content_sniffer import TEXT_EXTENSIONS, extension_for_mime, sniff_format
+from deadlines import Deadline, deadline_reached, tool_timeout, use_deadline
+from doc_reader import DocReaderError, read_doc_text
+from mmap_input import open_input
+from segments import (
+    SEGMENT_BLOCK,
+    SEGMENT_DOCUMENT,
+    SEGMENT_PAGE,
+    SEGMENT_SHEET,
+    SEGMENT_SLIDE,
+    Segment,
+    SegmentBuilder,
+)
+from structured_text import (
+    MODE_PRETTY,
+    STRUCTURED_MODES,
+    iter_json_lines,
+    iter_yaml_lines,
+    load_yaml,
+)
+from tabular_text import (
+    SPREADSHEET_ENGINES,
+    iter_csv_rows,
+    iter_ods_sheets,
+    iter_xls_sheets,
+    sheet_header,
+)
+from text_extractors import (
+    default_html_parser,
+    extract_html_text,
+    extract_xml_text,
+    iter_html_text,
+    iter_xml_text,
+    lxml_available,
+)
+
+# Tamanho aproximado (em caracteres) dos blocos de linhas usados como
+# segmentos em formatos sem divisão natural em páginas, planilhas ou slides
+STREAM_CHUNK_CHARS = 64 * 1024
+
+# Formatos aceitos pelo FileConverter, como exibidos em GET /formats
+SUPPORTED_FORMATS = [
+    'DOCX', 'DOC', 'XML', 'YML', 'YAML', 'XLSX', 'XLS', 'CSV',
+    'PDF', 'TXT', 'PPTX', 'PPT', 'HTML', 'HTM',
+    'ODT', 'ODP', 'ODS', 'JSON'
+]
+
+# Unidade produzida pelos leitores: (nome da página/planilha/slide, texto)
+TextUnit = Tuple[Optional[str], str]
+
+# Marcador de fim usado ao consumir iteradores síncronos em uma thread
+_END_OF_STREAM = object()
+
+
+def _group_lines(lines: Iterable[str], max_chars: int = STREAM_CHUNK_CHARS) -> Iterator[str]:
+    """Agrupa linhas em trechos de até ``max_chars`` caracteres, sem partir linhas."""
+    block: List[str] = []
+    size = 0
+    for line in lines:
+        block.append(line)
+        size += len(line) + 1
+        if size >= max_chars:
+            yield '\n'.join(block)
+            block = []
+            size = 0
+    if block:
+        yield '\n'.join(block)
+
+
+def _slide_number(name: str) -> int:
+    digits = re.search(r'(\d+)\.xml$', name)
+    return int(digits.group(1)) if digits else 0
+
+
+def _join_units(units: Iterable[TextUnit]) -> str:
+    """
+    Une o texto das unidades não vazias, uma por linha. Esgotado o prazo da
+    conversão, para entre uma unidade e outra com o texto já extraído.
+    """
+    units = iter(units)
+    texts = []
+    for _, text in units:
+        if text:
+            texts.append(text)
+        if deadline_reached():
+            _close(units)
+            break
+    return '\n'.join(texts)
+
+
+def _close(units: Iterator):
+    """Encerra um leitor interrompido (fecha os arquivos que ele mantém abertos)."""
+    close = getattr(units, 'close', None)
+    if close is not None:
+        close()
+
+
+def _partial_output(error: subprocess.TimeoutExpired) -> str:
+    """Saída que a ferramenta externa produziu antes de ser interrompida."""
+    output = error.stdout or b''
+    if isinstance(output, bytes):
+        output = output.decode(locale.getpreferredencoding(False), 'replace')
+    return output
+
+
+def _unnamed(blocks: Iterable[str]) -> Iterator[TextUnit]:
+    for block in blocks:
+        yield None, block
+
+
+def _conversion_result(deadline: Optional[Deadline]) -> str:
+    """Resultado de uma conversão concluída nas métricas: completa ou cortada pelo prazo."""
+    return 'truncated' if deadline is not None and deadline.truncated else 'success'
+
+
+def _conversion_error(filename: str, errors: List[Tuple[str, Exception]]) -> Exception:
+    """Resume as falhas de cada conversor tentado em uma única exceção."""
+    if len(errors) == 1:
+        detail = str(errors[0][1])
+    else:
+        detail = '; '.join(f"como {extension}: {error}" for extension, error in errors)
+    return Exception(f"Erro ao converter arquivo {filename}: {detail}")
+
 class FileConverter:
     """Classe responsável por converter diferentes formatos de arquivo para texto"""
     
-    def __init__(self):
+    def __init__(self, xml_include_tags: Optional[List[str]] = None,
+                 xml_exclude_tags: Optional[List[str]] = None,
+                 structured_mode: str = MODE_PRETTY,
+                 csv_max_rows: Optional[int] = None,
+                 csv_engine: str = 'auto',
+                 spreadsheet_engine: str = 'stream',
+                 content_sniffing: bool = True):
+        if structured_mode not in STRUCTURED_MODES:
+            raise ValueError(f"Modo de saída estruturada inválido: {structured_mode}")
+        if spreadsheet_engine not in SPREADSHEET_ENGINES:
+            raise ValueError(f"Leitor de planilhas inválido: {spreadsheet_engine}")
+        
         self._antiword_available = self._check_antiword_availability()
         
+        # Filtros opcionais de tags para a extração de texto de XML
+        self.xml_include_tags = xml_include_tags
+        self.xml_exclude_tags = xml_exclude_tags
+        
+        # Saída de JSON/YAML: 'pretty' (padrão, documento indentado), 'paths'
+        # (caminho: valor) ou 'text' (só textos); os dois últimos leem em fluxo
+        self.structured_mode = structured_mode
+        
+        # Limite de linhas e leitor ('auto', 'python' ou 'pandas') para CSV
+        self.csv_max_rows = csv_max_rows
+        self.csv_engine = csv_engine
+        
+        # Leitor de XLS/ODS: 'stream' (linha a linha) ou 'pandas' (DataFrames)
+        self.spreadsheet_engine = spreadsheet_engine
+        
+        # Detecta o formato pelo conteúdo antes de confiar na extensão
+        self.content_sniffing = content_sniffing
+        
         self.supported_extensions = {
             '.docx': self._convert_docx,
             '.doc': self._convert_doc,
@@ -87,9 +244,32 @@ class FileConverter:
             '.ods': self._convert_ods,
             '.json': self._convert_json
         }
+        
+        # Leitores que produzem o texto em segmentos (página, planilha, slide ou
+        # bloco de linhas); os demais formatos viram um único segmento
+        self.segment_readers = {
+            '.pdf': (SEGMENT_PAGE, self._iter_pdf_pages),
+            '.xlsx': (SEGMENT_SHEET, self._iter_xlsx_sheets),
+            '.xls': (SEGMENT_SHEET, self._iter_xls_sheets),
+            '.ods': (SEGMENT_SHEET, self._iter_ods_sheets),
+            '.pptx': (SEGMENT_SLIDE, self._iter_pptx_slides),
+            '.csv': (SEGMENT_BLOCK, self._iter_csv_blocks),
+        }
+        if structured_mode != MODE_PRETTY:
+            self.segment_readers['.json'] = (SEGMENT_BLOCK, self._iter_json_blocks)
+            self.segment_readers['.yml'] = (SEGMENT_BLOCK, self._iter_yaml_blocks)
+            self.segment_readers['.yaml'] = (SEGMENT_BLOCK, self._iter_yaml_blocks)
+        if lxml_available():
+            self.segment_readers['.html'] = (SEGMENT_BLOCK, self._iter_html_blocks)
+            self.segment_readers['.htm'] = (SEGMENT_BLOCK, self._iter_html_blocks)
+            self.segment_readers['.xml'] = (SEGMENT_BLOCK, self._iter_xml_blocks)
     
     def clean_text(self, text: str) -> str:
         """Limpa o texto removendo caracteres estranhos e formatação desnecessária"""
+        with metrics.registry.timer(metrics.CLEAN_DURATION), tracing.span('clean'):
+            return self._clean_text(text)
+    
+    def _clean_text(self, text: str) -> str:
         if not text:
             return ""
         
@@ -168,26 +348,171 @@ class FileConverter:
         
         return result.strip()
     
-    async def convert_file(self, file_path: str, filename: str) -> str:
-        """Converte um arquivo para texto baseado na extensão"""
+    def resolve_extensions(self, file_path: str, filename: str,
+                           content_type: Optional[str] = None) -> List[str]:
+        """
+        Escolhe os conversores (pelas extensões) a tentar, em ordem.
+        
+        O formato detectado pelo conteúdo vem primeiro, seguido da extensão do
+        nome como alternativa (ex.: um ``.doc`` que na verdade é DOCX tenta
+        ``.docx`` e depois ``.doc``). Entre formatos textuais, que não têm
+        assinatura binária, prevalece a extensão. Sem extensão conhecida nem
+        formato detectado, usa o ``content_type`` informado, se houver.
+        """
         file_extension = Path(filename).suffix.lower()
-        
-        if file_extension not in self.supported_extensions:
-            raise ValueError(f"Formato de arquivo não suportado: {file_extension}")
-        
-        converter_func = self.supported_extensions[file_extension]
-        
+        supported = file_extension in self.supported_extensions
+        detected = None
+        if self.content_sniffing:
+            with tracing.span('sniff'):
+                detected = sniff_format(file_path)
+        
+        if detected is None or detected == file_extension or (
+            supported and file_extension in TEXT_EXTENSIONS and detected in TEXT_EXTENSIONS
+        ):
+            extensions = [file_extension] if supported else []
+        else:
+            extensions = [detected, file_extension] if supported else [detected]
+        
+        if not extensions:
+            hinted = extension_for_mime(content_type)
+            if hinted in self.supported_extensions:
+                extensions = [hinted]
+        if not extensions:
+            raise ValueError(f"Formato de arquivo não suportado: {file_extension or filename}")
+        return extensions
+    
+    async def convert_file(self, file_path: str, filename: str,
+                           content_type: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> str:
+        """
+        Converte um arquivo para texto baseado no conteúdo e na extensão.
+        
+        Com ``deadline``, páginas, planilhas e slides deixam de ser lidos
+        quando o prazo acaba: o texto volta parcial e o prazo, marcado como
+        cortado (``deadline.truncated`` e ``deadline.reason``).
+        """
+        errors = []
+        # A detecção e os conversores compartilham o mapeamento do arquivo
+        with open_input(file_path):
+            for extension in self.resolve_extensions(file_path, filename, content_type):
+                converter_func = self.supported_extensions[extension]
+                started = time.perf_counter()
+                try:
+                    with tracing.span('extract'), use_deadline(deadline):
+                        text = await converter_func(file_path)
+                except Exception as e:
+                    self._record_conversion(extension, time.perf_counter() - started, 'error')
+                    errors.append((extension, e))
+                else:
+                    self._record_conversion(extension, time.perf_counter() - started,
+                                            _conversion_result(deadline))
+                    return text
+        raise _conversion_error(filename, errors)
+    
+    def _record_conversion(self, extension: str, elapsed: float, result: str):
+        """Registra a duração e o resultado de uma conversão nas métricas."""
+        format_name = extension.lstrip('.')
+        metrics.registry.observe(metrics.CONVERSION_DURATION, elapsed, format=format_name)
+        metrics.registry.inc(metrics.CONVERSIONS_TOTAL, format=format_name, result=result)
+    
+    async def iter_segments(self, file_path: str, filename: str, clean: bool = False,
+                            content_type: Optional[str] = None,
+                            deadline: Optional[Deadline] = None) -> AsyncIterator[Segment]:
+        """
+        Converte um arquivo para texto produzindo segmentos à medida que são lidos.
+        
+        PDFs são divididos por página, planilhas por aba, apresentações PPTX
+        por slide e formatos textuais em blocos de linhas. Os leitores rodam
+        em uma thread para não bloquear o loop de eventos. Formatos sem leitor
+        incremental são convertidos inteiros em um único segmento.
+        
+        Com ``clean=True``, cada segmento passa por ``clean_text`` e os que
+        ficam vazios são descartados; os deslocamentos se referem ao texto
+        já limpo. Um conversor alternativo só é tentado se o anterior falhar
+        antes de produzir o primeiro segmento.
+        
+        Com ``deadline``, a leitura para entre dois segmentos quando o prazo
+        acaba, marcando-o como cortado (ver ``convert_file``).
+        """
+        errors = []
+        with open_input(file_path):
+            for extension in self.resolve_extensions(file_path, filename, content_type):
+                kind, reader = self.segment_readers.get(extension, (SEGMENT_DOCUMENT, None))
+                builder = SegmentBuilder(kind)
+                try:
+                    async for name, text in self._iter_units(extension, reader, file_path, deadline):
+                        if clean:
+                            text = self.clean_text(text)
+                        if text:
+                            yield builder.add(text, name)
+                    return
+                except Exception as e:
+                    errors.append((extension, e))
+                    if builder.index:
+                        break
+        raise _conversion_error(filename, errors)
+    
+    async def _iter_units(self, extension: str, reader, file_path: str,
+                          deadline: Optional[Deadline] = None) -> AsyncIterator[TextUnit]:
+        # Nas métricas conta apenas o tempo de leitura, não o de quem consome
+        # os segmentos (que, em fluxo, inclui o envio pela rede). No rastro da
+        # requisição, a primeira unidade inclui a abertura do arquivo ('open')
+        # e as demais são somadas em 'extract'
+        elapsed = 0.0
+        result = 'error'
         try:
-            return await converter_func(file_path)
-        except Exception as e:
-            raise Exception(f"Erro ao converter arquivo {filename}: {str(e)}")
+            if reader is None:
+                started = time.perf_counter()
+                with use_deadline(deadline):
+                    text = await self.supported_extensions[extension](file_path)
+                elapsed = time.perf_counter() - started
+                tracing.record('extract', elapsed)
+                result = _conversion_result(deadline)
+                yield None, text
+                return
+            
+            loop = asyncio.get_running_loop()
+            units = reader(file_path)
+            phase = previous_phase = 'open'
+            while True:
+                started = time.perf_counter()
+                unit = await loop.run_in_executor(None, next, units, _END_OF_STREAM)
+                duration = time.perf_counter() - started
+                elapsed += duration
+                if unit is _END_OF_STREAM:
+                    # O fim da leitura conta na fase da última unidade
+                    tracing.record(previous_phase, duration, count=0)
+                    result = 'success'
+                    break
+                tracing.record(phase, duration)
+                previous_phase, phase = phase, 'extract'
+                yield unit
+                if deadline is not None and deadline.check():
+                    _close(units)
+                    result = _conversion_result(deadline)
+                    break
+        except GeneratorExit:
+            # O consumidor parou antes do fim (ex.: cliente desconectado)
+            result = 'cancelled'
+            raise
+        finally:
+            self._record_conversion(extension, elapsed, result)
+    
+    async def convert_segments(self, file_path: str, filename: str,
+                               clean: bool = False,
+                               content_type: Optional[str] = None,
+                               deadline: Optional[Deadline] = None) -> List[Segment]:
+        """Converte um arquivo para uma lista de segmentos (ver ``iter_segments``)."""
+        return [segment async for segment in
+                self.iter_segments(file_path, filename, clean, content_type, deadline)]
     
     async def _convert_docx(self, file_path: str) -> str:
         """Converte arquivo DOCX para texto"""
         if Document is None:
             raise ImportError("python-docx não está instalado")
         
-        doc = Document(file_path)
+        with open_input(file_path) as source, source.reader() as file:
+            doc = Document(file)
         text_content = []
         
         for paragraph in doc.paragraphs:
@@ -198,21 +523,26 @@ class FileConverter:
     
     async def _convert_xml(self, file_path: str) -> str:
         """Converte arquivo XML para texto"""
+        if lxml_available():
+            return extract_xml_text(file_path, self.xml_include_tags, self.xml_exclude_tags)
+        
         if BeautifulSoup is None:
             raise ImportError("beautifulsoup4 não está instalado")
         
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        with open_input(file_path) as source:
+            content = source.read_text()
         
         soup = BeautifulSoup(content, 'xml')
         return soup.get_text(separator='\n', strip=True)
     
     async def _convert_yaml(self, file_path: str) -> str:
         """Converte arquivo YAML para texto"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = yaml.safe_load(file)
+        with open_input(file_path) as source, source.open_text() as file:
+            if self.structured_mode != MODE_PRETTY:
+                return '\n'.join(iter_yaml_lines(file, self.structured_mode))
+            data = load_yaml(file)
         
-        return json.dumps(data, indent=2, ensure_ascii=False)
+        return json.dumps(data, indent=2, ensure_ascii=False, default=str)
     
     async def _convert_xlsx(self, file_path: str) -> str:
         """Converte arquivo XLSX para texto usando openpyxl."""
@@ -220,65 +550,92 @@ class FileConverter:
             raise ImportError("openpyxl não está instalado. Não é possível converter arquivos .xlsx")
 
         try:
-            workbook = load_workbook(file_path)
-            text_content = []
-            
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                text_content.append(f"=== Planilha: {sheet_name} ===")
-                
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = '\t'.join([str(cell) if cell is not None else '' for cell in row])
-                    if row_text.strip():
-                        text_content.append(row_text)
-            
-            return '\n'.join(text_content)
+            return _join_units(self._iter_xlsx_sheets(file_path))
         except Exception as e:
             raise Exception(f"Falha ao converter .xlsx com openpyxl: {e}")
     
-    async def _convert_csv(self, file_path: str) -> str:
-        """Converte arquivo CSV para texto"""
-        text_content = []
-        
-        with open(file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            for row in csv_reader:
-                text_content.append('\t'.join(row))
+    def _iter_xlsx_sheets(self, file_path: str) -> Iterator[TextUnit]:
+        """Produz o texto de cada planilha de um XLSX."""
+        if load_workbook is None:
+            raise ImportError("openpyxl não está instalado. Não é possível converter arquivos .xlsx")
         
-        return '\n'.join(text_content)
+        with open_input(file_path) as source, source.reader() as file:
+            workbook = load_workbook(file)
+        for sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+            text_content = [sheet_header(sheet_name)]
+            
+            for row in sheet.iter_rows(values_only=True):
+                row_text = '\t'.join([str(cell) if cell is not None else '' for cell in row])
+                if row_text.strip():
+                    text_content.append(row_text)
+            
+            yield sheet_name, '\n'.join(text_content)
+    
+    async def _convert_csv(self, file_path: str) -> str:
+        """Converte arquivo CSV para texto, detectando codificação e delimitador"""
+        return '\n'.join(self._iter_csv_rows(file_path))
+    
+    def _iter_csv_rows(self, file_path: str) -> Iterator[str]:
+        return iter_csv_rows(file_path, max_rows=self.csv_max_rows, engine=self.csv_engine)
+    
+    def _iter_csv_blocks(self, file_path: str) -> Iterator[TextUnit]:
+        return _unnamed(_group_lines(self._iter_csv_rows(file_path)))
+    
+    def _iter_json_blocks(self, file_path: str) -> Iterator[TextUnit]:
+        with open_input(file_path) as source, source.open_text() as file:
+            yield from _unnamed(_group_lines(iter_json_lines(file, self.structured_mode)))
+    
+    def _iter_yaml_blocks(self, file_path: str) -> Iterator[TextUnit]:
+        with open_input(file_path) as source, source.open_text() as file:
+            yield from _unnamed(_group_lines(iter_yaml_lines(file, self.structured_mode)))
+    
+    def _iter_html_blocks(self, file_path: str) -> Iterator[TextUnit]:
+        return _unnamed(_group_lines(iter_html_text(file_path)))
+    
+    def _iter_xml_blocks(self, file_path: str) -> Iterator[TextUnit]:
+        return _unnamed(_group_lines(
+            iter_xml_text(file_path, self.xml_include_tags, self.xml_exclude_tags)
+        ))
     
     async def _convert_pdf(self, file_path: str) -> str:
         """Converte arquivo PDF para texto"""
-        text_content = []
-        
+        return _join_units(self._iter_pdf_pages(file_path))
+    
+    def _iter_pdf_pages(self, file_path: str) -> Iterator[TextUnit]:
+        """Produz o número e o texto de cada página (não vazia) de um PDF."""
         # Tenta usar pdfplumber primeiro (melhor para extração de texto)
         if pdfplumber is not None:
+            produced = False
             try:
                 with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
+                    for number, page in enumerate(pdf.pages, 1):
                         text = page.extract_text()
                         if text:
-                            text_content.append(text)
-                return '\n'.join(text_content)
+                            produced = True
+                            yield str(number), text
+                return
             except Exception:
-                pass
+                # Só é possível recomeçar com outra biblioteca antes da primeira página
+                if produced:
+                    raise
         
         # Fallback para PyPDF2
         if PyPDF2 is not None:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
+                for number, page in enumerate(pdf_reader.pages, 1):
                     text = page.extract_text()
                     if text:
-                        text_content.append(text)
-            return '\n'.join(text_content)
+                        yield str(number), text
+            return
         
         raise ImportError("Nenhuma biblioteca PDF está disponível")
     
     async def _convert_txt(self, file_path: str) -> str:
         """Converte arquivo TXT para texto"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read()
+        with open_input(file_path) as source:
+            return source.read_text()
     
     async def _extract_text_from_zip_xml(self, file_path: str, content_path_prefix: str, content_file: Optional[str] = None) -> str:
         """Extrai texto de arquivos baseados em zip/xml como .pptx e .odp"""
@@ -290,7 +647,8 @@ class FileConverter:
 
         text_content = []
         try:
-            with zipfile.ZipFile(file_path, 'r') as zf:
+            with open_input(file_path) as source, source.reader() as file, \
+                    zipfile.ZipFile(file, 'r') as zf:
                 if content_file:
                     files_to_process = [content_file]
                 else:
@@ -354,18 +712,19 @@ class FileConverter:
                 env['XDG_DATA_HOME'] = '/home/appuser/.local/share'
                 
                 # Converte PPT para PPTX usando LibreOffice com configurações específicas
-                result = subprocess.run([
-                    'libreoffice', 
-                    '--headless', 
-                    '--invisible',
-                    '--nodefault',
-                    '--nolockcheck',
-                    '--nologo',
-                    '--norestore',
-                    '--convert-to', 'pptx',
-                    '--outdir', temp_dir, 
-                    file_path
-                ], capture_output=True, text=True, timeout=120, env=env)
+                with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='soffice'):
+                    result = subprocess.run([
+                        'libreoffice', 
+                        '--headless', 
+                        '--invisible',
+                        '--nodefault',
+                        '--nolockcheck',
+                        '--nologo',
+                        '--norestore',
+                        '--convert-to', 'pptx',
+                        '--outdir', temp_dir, 
+                        file_path
+                    ], capture_output=True, text=True, timeout=tool_timeout(120), env=env)
                 
                 if result.returncode != 0:
                     error_msg = result.stderr or result.stdout or "Erro desconhecido"
@@ -388,17 +747,41 @@ class FileConverter:
 
     async def _convert_pptx(self, file_path: str) -> str:
         """Converte arquivo PPTX para texto usando a extração de zip/xml."""
-        return await self._extract_text_from_zip_xml(file_path, 'ppt/slides/slide')
+        return _join_units(self._iter_pptx_slides(file_path))
+    
+    def _iter_pptx_slides(self, file_path: str) -> Iterator[TextUnit]:
+        """Produz o número e o texto de cada slide de um PPTX, em ordem numérica."""
+        from xml.etree.ElementTree import fromstring
+        
+        try:
+            with open_input(file_path) as source, source.reader() as file, \
+                    zipfile.ZipFile(file, 'r') as zf:
+                slides = sorted(
+                    (name for name in zf.namelist()
+                     if name.startswith('ppt/slides/slide') and name.endswith('.xml')),
+                    key=_slide_number,
+                )
+                for slide in slides:
+                    tree = fromstring(zf.read(slide))
+                    texts = (elem.text.strip() for elem in tree.iter() if elem.text)
+                    yield str(_slide_number(slide)), '\n'.join(filter(None, texts))
+        except zipfile.BadZipFile:
+            raise Exception("Arquivo não é um formato zip válido (e.g., .pptx)")
     
     async def _convert_html(self, file_path: str) -> str:
         """Converte arquivo HTML para texto"""
+        if lxml_available():
+            return extract_html_text(file_path)
+        
         if BeautifulSoup is None:
             raise ImportError("beautifulsoup4 não está instalado")
         
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        with open_input(file_path) as source:
+            content = source.read_text()
         
-        soup = BeautifulSoup(content, 'html.parser')
+        soup = BeautifulSoup(content, default_html_parser())
+        for element in soup(['script', 'style']):
+            element.decompose()
         return soup.get_text(separator='\n', strip=True)
     
     async def _convert_odt(self, file_path: str) -> str:
@@ -439,25 +822,33 @@ class FileConverter:
     
     async def _convert_ods(self, file_path: str) -> str:
         """Converte arquivo ODS para texto"""
+        return _join_units(self._iter_ods_sheets(file_path))
+    
+    def _iter_ods_sheets(self, file_path: str) -> Iterator[TextUnit]:
+        """Produz o texto de cada planilha de um ODS."""
+        if self.spreadsheet_engine == 'stream':
+            for sheet_name, rows in iter_ods_sheets(file_path):
+                yield sheet_name, '\n'.join([sheet_header(sheet_name)] + rows)
+            return
+        
         if pd is None:
             raise ImportError("pandas não está instalado")
-        
-        # Lê todas as planilhas do arquivo ODS
-        sheets = pd.read_excel(file_path, sheet_name=None, engine='odf')
-        text_content = []
+        yield from self._iter_sheets_pandas(file_path, 'odf')
+    
+    def _iter_sheets_pandas(self, file_path: str, engine: str) -> Iterator[TextUnit]:
+        """Lê todas as planilhas com pandas e produz cada uma como texto tabulado."""
+        sheets = pd.read_excel(file_path, sheet_name=None, engine=engine)
         
         for sheet_name, df in sheets.items():
-            text_content.append(f"=== Planilha: {sheet_name} ===")
-            
             # Converte DataFrame para string
             csv_string = df.to_csv(index=False, sep='\t')
-            text_content.append(csv_string)
-        
-        return '\n'.join(text_content)
+            yield str(sheet_name), f"{sheet_header(sheet_name)}\n{csv_string}"
     
     async def _convert_json(self, file_path: str) -> str:
         """Converte arquivo JSON para texto"""
-        with open(file_path, 'r', encoding='utf-8') as file:
+        with open_input(file_path) as source, source.open_text() as file:
+            if self.structured_mode != MODE_PRETTY:
+                return '\n'.join(iter_json_lines(file, self.structured_mode))
             data = json.load(file)
         
         return json.dumps(data, indent=2, ensure_ascii=False)
@@ -492,13 +883,17 @@ class FileConverter:
     def _convert_doc_with_antiword(self, file_path: str) -> str:
         """Converte arquivo DOC usando antiword."""
         try:
-            result = subprocess.run(['antiword', '-t', file_path], 
-                                  capture_output=True, text=True, timeout=30)
+            with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='antiword'):
+                result = subprocess.run(['antiword', '-t', file_path], 
+                                      capture_output=True, text=True, timeout=tool_timeout(30))
             if result.returncode == 0:
                 return result.stdout
             else:
                 raise Exception(f"antiword falhou com código {result.returncode}: {result.stderr}")
-        except subprocess.TimeoutExpired:
+        except subprocess.TimeoutExpired as e:
+            # Interrompido pelo prazo da requisição: fica o texto já produzido
+            if deadline_reached():
+                return _partial_output(e)
             raise Exception("Timeout ao executar antiword")
         except Exception as e:
             raise Exception(f"Erro ao executar antiword: {e}")
@@ -506,21 +901,35 @@ class FileConverter:
     def _convert_doc_with_catdoc(self, file_path: str) -> str:
         """Converte arquivo DOC usando catdoc."""
         try:
-            result = subprocess.run(['catdoc', '-a', file_path], 
-                                  capture_output=True, text=True, timeout=30)
+            with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='catdoc'):
+                result = subprocess.run(['catdoc', '-a', file_path], 
+                                      capture_output=True, text=True, timeout=tool_timeout(30))
             if result.returncode == 0:
                 return result.stdout
             else:
                 raise Exception(f"catdoc falhou com código {result.returncode}: {result.stderr}")
-        except subprocess.TimeoutExpired:
+        except subprocess.TimeoutExpired as e:
+            # Interrompido pelo prazo da requisição: fica o texto já produzido
+            if deadline_reached():
+                return _partial_output(e)
             raise Exception("Timeout ao executar catdoc")
         except Exception as e:
             raise Exception(f"Erro ao executar catdoc: {e}")
 
     async def _convert_doc(self, file_path: str) -> str:
-        """Converte arquivo DOC para texto usando antiword ou catdoc como fallback."""
+        """
+        Converte arquivo DOC para texto lendo a tabela de peças no próprio
+        processo; antiword e catdoc ficam como alternativa para os documentos
+        que o leitor interno não entende (criptografados, Word 6/95).
+        """
         errors = []
         
+        try:
+            with open_input(file_path) as source, source.reader() as file:
+                return read_doc_text(file)
+        except DocReaderError as e:
+            errors.append(f"leitor interno: {e}")
+        
         # Tenta antiword primeiro
         if self._antiword_available:
             try:
@@ -542,26 +951,63 @@ class FileConverter:
         
         # Se nenhuma ferramenta funcionou
         if not self._antiword_available and not self._check_catdoc_availability():
-            raise Exception("Nenhuma ferramenta de conversão .doc está disponível (antiword ou catdoc)")
+            raise Exception("Nenhuma ferramenta de conversão .doc está disponível (antiword ou catdoc). "
+                            "Erros: " + "; ".join(errors))
         
         # Se as ferramentas estão disponíveis mas falharam
         error_msg = "Falha ao converter arquivo .doc. Erros: " + "; ".join(errors)
         raise Exception(error_msg)
     
     async def _convert_xls(self, file_path: str) -> str:
-        """Converte arquivo XLS para texto usando pandas."""
+        """Converte arquivo XLS para texto, linha a linha ou usando pandas."""
+        try:
+            return _join_units(self._iter_xls_sheets(file_path))
+        except ImportError:
+            raise
+        except Exception as e:
+            raise Exception(f"Falha ao converter .xls com {self.spreadsheet_engine}: {e}")
+    
+    def _iter_xls_sheets(self, file_path: str) -> Iterator[TextUnit]:
+        """Produz o texto de cada planilha de um XLS."""
+        if self.spreadsheet_engine == 'stream':
+            for sheet_name, rows in iter_xls_sheets(file_path):
+                yield sheet_name, '\n'.join([sheet_header(sheet_name)] + rows)
+            return
+        
         if pd is None:
             raise ImportError("pandas não está instalado. Não é possível converter arquivos .xls")
+        yield from self._iter_sheets_pandas(file_path, 'xlrd')
 
-        try:
-            sheets = pd.read_excel(file_path, sheet_name=None, engine='xlrd')
-            text_content = []
-            
-            for sheet_name, df in sheets.items():
-                text_content.append(f"=== Planilha: {sheet_name} ===")
-                csv_string = df.to_csv(index=False, sep='\t')
-                text_content.append(csv_string)
-            
-            return '\n'.join(text_content)
-        except Exception as e:
-            raise Exception(f"Falha ao converter .xls com pandas: {e}")
\ No newline at end of file
+
+_default_converter: Optional[FileConverter] = None
+
+
+def extract_text_from_file(file_content: bytes, file_format: str) -> dict:
+    """
+    Extrai o texto (sem limpeza) de um arquivo em memória.
+
+    Atalho síncrono para scripts e testes, com a configuração padrão do
+    FileConverter; ``file_format`` é a extensão, sem diferenciar maiúsculas
+    (ex.: "pdf" ou "PDF"). Não pode ser chamado de dentro de um loop de
+    eventos em execução: nesse caso, use ``FileConverter.convert_file``.
+    """
+    global _default_converter
+    if file_format.upper().lstrip('.') not in SUPPORTED_FORMATS:
+        raise ValueError(f"Formato de arquivo não suportado: {file_format}")
+    if _default_converter is None:
+        _default_converter = FileConverter()
+    
+    extension = '.' + file_format.lower().lstrip('.')
+    with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as temp_file:
+        temp_file.write(file_content)
+        temp_path = temp_file.name
+    try:
+        text = asyncio.run(_default_converter.convert_file(temp_path, f"arquivo{extension}"))
+    finally:
+        os.unlink(temp_path)
+    
+    return {
+        "success": True,
+        "extracted_text": text,
+        "file_size": len(file_content)
+    }
@@ -1,4 +1,5 @@
 from bs4 import BeautifulSoup
+from bs4.element import PreformattedString
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_BREAK
@@ -9,6 +10,13 @@ import os
 import base64
 from io import BytesIO
 
+from css_engine import build_stylesheet
+from text_extractors import default_html_parser
+
+# Backend do BeautifulSoup para o HTML de entrada ('lxml', 'html.parser', 'html5lib').
+# Sem configuração, usa o parser em C do lxml quando disponível.
+HTML_PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND")
+
 def hex_to_rgb(hex_color):
     """Converte cor hexadecimal para RGB."""
     if hex_color.startswith('#'):
@@ -85,111 +93,23 @@ def parse_font_size(size_value):
     
     return None
 
-def extract_inline_styles(element):
-    """Extrai estilos inline de um elemento."""
-    styles = {}
-    style_attr = element.get('style', '')
-    
-    if style_attr:
-        # Parse dos estilos inline
-        style_pairs = style_attr.split(';')
-        for pair in style_pairs:
-            if ':' in pair:
-                key, value = pair.split(':', 1)
-                styles[key.strip().lower()] = value.strip()
-    
-    return styles
-
 def extract_comprehensive_css_styles(soup):
-    """Extrai estilos CSS de forma mais abrangente."""
-    styles = {}
-    
-    # Estilos padrão
-    default_styles = {
-        'h1': {'font-size': '24pt', 'font-weight': 'bold'},
-        'h2': {'font-size': '20pt', 'font-weight': 'bold'},
-        'h3': {'font-size': '18pt', 'font-weight': 'bold'},
-        'h4': {'font-size': '16pt', 'font-weight': 'bold'},
-        'h5': {'font-size': '14pt', 'font-weight': 'bold'},
-        'h6': {'font-size': '12pt', 'font-weight': 'bold'},
-        'strong': {'font-weight': 'bold'},
-        'b': {'font-weight': 'bold'},
-        'em': {'font-style': 'italic'},
-        'i': {'font-style': 'italic'},
-        'u': {'text-decoration': 'underline'}
-    }
-    
-    styles.update(default_styles)
-    
-    # Procurar tags style
-    style_tags = soup.find_all('style')
-    for style_tag in style_tags:
-        css_content = style_tag.string
-        if css_content:
-            # Parse básico de CSS
-            css_rules = re.findall(r'([^{]+)\{([^}]+)\}', css_content, re.DOTALL)
-            
-            for selector, properties in css_rules:
-                selector = selector.strip()
-                
-                # Remover comentários
-                properties = re.sub(r'/\*.*?\*/', '', properties, flags=re.DOTALL)
-                
-                # Parse das propriedades
-                style_dict = {}
-                props = properties.split(';')
-                for prop in props:
-                    if ':' in prop:
-                        key, value = prop.split(':', 1)
-                        style_dict[key.strip().lower()] = value.strip()
-                
-                # Armazenar estilos por seletor
-                if selector.startswith('.'):
-                    class_name = selector[1:].strip()
-                    styles[f'class_{class_name}'] = style_dict
-                elif selector.startswith('#'):
-                    id_name = selector[1:].strip()
-                    styles[f'id_{id_name}'] = style_dict
-                else:
-                    # Tag selector
-                    tag_name = selector.strip().lower()
-                    if tag_name in styles:
-                        styles[tag_name].update(style_dict)
-                    else:
-                        styles[tag_name] = style_dict
-    
-    return styles
+    """
+    Extrai os estilos CSS do documento para uma folha de estilos indexada.
 
-def apply_comprehensive_styles(element, run, paragraph, styles):
-    """Aplica estilos de forma abrangente a um run."""
+    Todas as tags <style> são interpretadas uma única vez, junto com os
+    estilos padrão de cabeçalhos e ênfase, suportando seletores compostos,
+    descendentes, de filho e de irmão.
+    """
+    css_texts = [style_tag.string for style_tag in soup.find_all('style')]
+    return build_stylesheet(css_texts)
+
+def apply_comprehensive_styles(style, run, paragraph):
+    """Aplica um estilo computado a um run (e o alinhamento ao parágrafo)."""
     if not run:
         return
     
-    # Coletar todos os estilos aplicáveis
-    applicable_styles = {}
-    
-    # 1. Estilos da tag
-    tag_name = element.name.lower() if element.name else ''
-    if tag_name and tag_name in styles:
-        applicable_styles.update(styles[tag_name])
-    
-    # 2. Estilos de classe
-    classes = element.get('class', [])
-    for class_name in classes:
-        class_key = f'class_{class_name}'
-        if class_key in styles:
-            applicable_styles.update(styles[class_key])
-    
-    # 3. Estilos de ID
-    element_id = element.get('id')
-    if element_id:
-        id_key = f'id_{element_id}'
-        if id_key in styles:
-            applicable_styles.update(styles[id_key])
-    
-    # 4. Estilos inline (maior prioridade)
-    inline_styles = extract_inline_styles(element)
-    applicable_styles.update(inline_styles)
+    applicable_styles = style
     
     # Aplicar estilos ao run
     
@@ -239,6 +159,8 @@ def apply_comprehensive_styles(element, run, paragraph, styles):
         decoration = applicable_styles['text-decoration'].lower()
         if 'underline' in decoration:
             run.underline = True
+        if 'line-through' in decoration:
+            run.font.strike = True
     
     # Alinhamento do parágrafo
     if paragraph and 'text-align' in applicable_styles:
@@ -252,173 +174,230 @@ def apply_comprehensive_styles(element, run, paragraph, styles):
         elif align == 'left':
             paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
-def process_element_universal(element, doc, styles, parent_paragraph=None):
-    """Processa elementos HTML de forma universal."""
-    if element.name is None:
-        # Texto simples
-        text = str(element).strip()
-        if text and parent_paragraph:
-            run = parent_paragraph.add_run(text)
+# Elementos que iniciam um parágrafo próprio, mesmo vazios
+PARAGRAPH_ELEMENTS = frozenset([
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre', 'li',
+    'dt', 'dd', 'figcaption', 'address', 'caption',
+])
+
+# Contêineres de bloco: o conteúdo seguinte abre um novo parágrafo
+CONTAINER_ELEMENTS = frozenset([
+    'div', 'section', 'article', 'header', 'footer', 'main', 'nav', 'aside',
+    'figure', 'form', 'fieldset', 'dl', 'center', 'body', 'html', 'hr',
+])
+
+# Elementos cujo conteúdo nunca é renderizado
+SKIPPED_ELEMENTS = frozenset([
+    'head', 'style', 'script', 'noscript', 'template', 'title', 'meta', 'link',
+])
+
+TABLE_SECTION_ELEMENTS = frozenset(['thead', 'tbody', 'tfoot'])
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class _BlockContext:
+    """Destino do conteúdo de um bloco: contêiner (documento ou célula) e parágrafo atual."""
+
+    __slots__ = ('container', 'paragraph', 'reusable')
+
+    def __init__(self, container, paragraph=None, reusable=False):
+        self.container = container
+        self.paragraph = paragraph
+        # Parágrafo vazio já existente (ex.: primeiro parágrafo de uma célula)
+        self.reusable = reusable
+
+    def take_paragraph(self):
+        """
+        Entrega o parágrafo vazio reutilizável, se houver, para um bloco filho.
+
+        Em qualquer caso o conteúdo que vier depois do bloco filho abre um novo
+        parágrafo neste contexto.
+        """
+        if self.reusable and self.paragraph is not None:
+            paragraph = self.paragraph
+            self.paragraph = None
+            self.reusable = False
+            return paragraph
+        self.paragraph = None
+        return None
+
+    def ensure_paragraph(self, style):
+        """Retorna o parágrafo atual, criando-o na primeira vez que recebe conteúdo."""
+        if self.paragraph is None:
+            self.paragraph = self.container.add_paragraph()
+            _apply_paragraph_alignment(style, self.paragraph)
+        self.reusable = False
+        return self.paragraph
+
+
+def _apply_paragraph_alignment(style, paragraph):
+    align = style.get('text-align', '').lower()
+    if align == 'center':
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    elif align == 'right':
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+    elif align == 'justify':
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    elif align == 'left':
+        paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
+
+
+def _list_paragraph_style(lists):
+    """Estilo de parágrafo para um item de lista, conforme tipo e profundidade."""
+    if not lists:
+        return 'List Paragraph'
+    base = 'List Bullet' if lists[-1] == 'ul' else 'List Number'
+    depth = min(len(lists), 3)
+    return base if depth == 1 else f'{base} {depth}'
+
+
+def _table_rows(table_element):
+    """Linhas diretas da tabela (inclusive em thead/tbody/tfoot), sem tabelas aninhadas."""
+    rows = []
+    for child in table_element.children:
+        if child.name == 'tr':
+            rows.append(child)
+        elif child.name in TABLE_SECTION_ELEMENTS:
+            rows.extend(row for row in child.children if row.name == 'tr')
+    return rows
+
+
+def _column_span(cell):
+    try:
+        return max(1, int(cell.get('colspan', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+
+class DocxRenderer:
+    """
+    Renderiza uma árvore HTML em um documento Word com um único percurso iterativo.
+
+    Cada nó é visitado uma vez: o estilo computado é calculado ao entrar no
+    elemento (herdando do pai) e os runs são criados à medida que o texto é
+    encontrado. A pilha explícita mantém a profundidade de recursão constante
+    mesmo em HTML muito aninhado, e as tabelas aninhadas são tratadas pelas
+    linhas diretas de cada tabela.
+    """
+
+    def __init__(self, doc, stylesheet):
+        self.doc = doc
+        self.stylesheet = stylesheet
+
+    def render(self, root):
+        """Renderiza os filhos de ``root`` no documento."""
+        context = _BlockContext(self.doc)
+        root_style = {}
+        if root.name not in (None, '[document]'):
+            # Cascata dos ancestrais (html -> body) antes do percurso
+            ancestors = [parent for parent in root.parents if parent.name != '[document]']
+            for element in reversed([root] + ancestors):
+                root_style = self.stylesheet.compute(element, root_style)
+        # Itens da pilha: (nó, contexto de bloco, estilo do pai, listas abertas, alvos de célula)
+        stack = [(child, context, root_style, (), None) for child in reversed(root.contents)]
+
+        while stack:
+            node, context, parent_style, lists, cells = stack.pop()
+
+            if node.name is None:
+                self._render_text(node, context, parent_style)
+                continue
+
+            tag_name = node.name.lower()
+            if tag_name in SKIPPED_ELEMENTS:
+                continue
+
+            style = self.stylesheet.compute(node, parent_style)
+            if style.get('display', '').lower() == 'none':
+                continue
+
+            child_context = context
+            child_cells = cells
+
+            if tag_name in ('td', 'th') and cells is not None and id(node) in cells:
+                word_cell = cells[id(node)]
+                child_context = _BlockContext(
+                    word_cell, word_cell.paragraphs[0], reusable=True
+                )
+            elif tag_name == 'tr' or tag_name in TABLE_SECTION_ELEMENTS:
+                pass
+            elif tag_name == 'table':
+                child_cells = self._create_table(node, context)
+                if child_cells is None:
+                    continue
+            elif tag_name in ('ul', 'ol'):
+                context.take_paragraph()
+                lists = lists + (tag_name,)
+            elif tag_name == 'br':
+                context.ensure_paragraph(style).add_run().add_break()
+                continue
+            elif tag_name == 'img':
+                process_image_universal(node, self.doc, context.ensure_paragraph(style))
+                continue
+            elif tag_name in PARAGRAPH_ELEMENTS:
+                paragraph = context.take_paragraph() or context.container.add_paragraph()
+                if tag_name == 'li':
+                    paragraph.style = _list_paragraph_style(lists)
+                _apply_paragraph_alignment(style, paragraph)
+                child_context = _BlockContext(context.container, paragraph)
+            elif tag_name in CONTAINER_ELEMENTS:
+                paragraph = context.take_paragraph()
+                child_context = _BlockContext(
+                    context.container, paragraph, reusable=paragraph is not None
+                )
+
+            for child in reversed(node.contents):
+                stack.append((child, child_context, style, lists, child_cells))
+
+    def _render_text(self, node, context, style):
+        if isinstance(node, PreformattedString):
             return
-        elif text:
-            p = doc.add_paragraph()
-            run = p.add_run(text)
+        text = str(node)
+        if style.get('white-space', '').lower() not in ('pre', 'pre-wrap'):
+            text = _WHITESPACE_RE.sub(' ', text)
+            paragraph = context.paragraph
+            if paragraph is None or context.reusable or not paragraph.runs:
+                text = text.lstrip()
+            if not text:
+                return
+        elif not text:
             return
-    
-    if not element.name:
-        return
-        
-    tag_name = element.name.lower()
-    
-    # Elementos de bloco que criam novos parágrafos
-    block_elements = ['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'pre']
-    
-    if tag_name in block_elements:
-        # Criar novo parágrafo
-        paragraph = doc.add_paragraph()
-        
-        # Processar conteúdo do elemento
-        for child in element.children:
-            if child.name is None:
-                # Texto simples
-                text = str(child).strip()
-                if text:
-                    run = paragraph.add_run(text)
-                    apply_comprehensive_styles(element, run, paragraph, styles)
-            else:
-                # Elemento filho
-                if child.name.lower() in ['span', 'strong', 'b', 'em', 'i', 'u', 'a']:
-                    # Elementos inline
-                    text = child.get_text()
-                    if text:
-                        run = paragraph.add_run(text)
-                        apply_comprehensive_styles(child, run, paragraph, styles)
-                else:
-                    # Elemento de bloco aninhado
-                    process_element_universal(child, doc, styles)
-    
-    elif tag_name == 'table':
-        process_table_universal(element, doc, styles)
-    
-    elif tag_name == 'ul' or tag_name == 'ol':
-        process_list_universal(element, doc, styles)
-    
-    elif tag_name == 'br':
-        if parent_paragraph:
-            parent_paragraph.add_run().add_break()
-        else:
-            doc.add_paragraph()
-    
-    elif tag_name == 'img':
-        process_image_universal(element, doc, parent_paragraph)
-    
-    elif tag_name in ['span', 'strong', 'b', 'em', 'i', 'u', 'a']:
-        # Elementos inline
-        if parent_paragraph:
-            text = element.get_text()
-            if text:
-                run = parent_paragraph.add_run(text)
-                apply_comprehensive_styles(element, run, parent_paragraph, styles)
-        else:
-            # Criar parágrafo se não há pai
-            paragraph = doc.add_paragraph()
-            text = element.get_text()
-            if text:
-                run = paragraph.add_run(text)
-                apply_comprehensive_styles(element, run, paragraph, styles)
-    
-    else:
-        # Outros elementos - processar filhos
-        for child in element.children:
-            process_element_universal(child, doc, styles, parent_paragraph)
-
-def process_table_universal(table_element, doc, styles):
-    """Processa tabelas de forma universal."""
-    rows = table_element.find_all('tr')
-    if not rows:
-        return
-    
-    # Contar colunas
-    max_cols = 0
-    for row in rows:
-        cols = len(row.find_all(['td', 'th']))
-        max_cols = max(max_cols, cols)
-    
-    if max_cols == 0:
-        return
-    
-    # Criar tabela no Word
-    table = doc.add_table(rows=len(rows), cols=max_cols)
-    table.style = 'Table Grid'
-    
-    # Preencher tabela
-    for i, row in enumerate(rows):
-        cells = row.find_all(['td', 'th'])
-        for j, cell in enumerate(cells):
-            if j < max_cols:
-                word_cell = table.cell(i, j)
-                
-                # Limpar célula
-                word_cell.text = ''
-                
-                # Processar conteúdo da célula
-                cell_paragraph = word_cell.paragraphs[0]
-                
-                for child in cell.children:
-                    if child.name is None:
-                        text = str(child).strip()
-                        if text:
-                            run = cell_paragraph.add_run(text)
-                            apply_comprehensive_styles(cell, run, cell_paragraph, styles)
-                    else:
-                        if child.name.lower() in ['span', 'strong', 'b', 'em', 'i', 'u']:
-                            text = child.get_text()
-                            if text:
-                                run = cell_paragraph.add_run(text)
-                                apply_comprehensive_styles(child, run, cell_paragraph, styles)
-                        else:
-                            text = child.get_text()
-                            if text:
-                                run = cell_paragraph.add_run(text)
-                                apply_comprehensive_styles(child, run, cell_paragraph, styles)
-                
-                # Aplicar estilos da célula
-                if cell.name == 'th':
-                    for paragraph in word_cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.bold = True
-
-def process_list_universal(list_element, doc, styles):
-    """Processa listas de forma universal."""
-    items = list_element.find_all('li', recursive=False)
-    
-    for item in items:
-        paragraph = doc.add_paragraph()
-        
-        # Adicionar marcador
-        if list_element.name == 'ul':
-            paragraph.style = 'List Bullet'
-        else:
-            paragraph.style = 'List Number'
-        
-        # Processar conteúdo do item
-        for child in item.children:
-            if child.name is None:
-                text = str(child).strip()
-                if text:
-                    run = paragraph.add_run(text)
-                    apply_comprehensive_styles(item, run, paragraph, styles)
-            else:
-                if child.name.lower() in ['span', 'strong', 'b', 'em', 'i', 'u']:
-                    text = child.get_text()
-                    if text:
-                        run = paragraph.add_run(text)
-                        apply_comprehensive_styles(child, run, paragraph, styles)
-                else:
-                    text = child.get_text()
-                    if text:
-                        run = paragraph.add_run(text)
-                        apply_comprehensive_styles(child, run, paragraph, styles)
+        paragraph = context.ensure_paragraph(style)
+        run = paragraph.add_run(text)
+        apply_comprehensive_styles(style, run, paragraph)
+
+    def _create_table(self, table_element, context):
+        """Cria a tabela Word e retorna o mapa ``id(td) -> célula``."""
+        rows = _table_rows(table_element)
+        cells_per_row = [
+            [cell for cell in row.children if cell.name in ('td', 'th')] for row in rows
+        ]
+        max_cols = max(
+            (sum(_column_span(cell) for cell in cells) for cells in cells_per_row),
+            default=0,
+        )
+        if max_cols == 0:
+            return None
+
+        context.take_paragraph()
+        table = context.container.add_table(rows=len(rows), cols=max_cols)
+        table.style = 'Table Grid'
+
+        targets = {}
+        for i, cells in enumerate(cells_per_row):
+            column = 0
+            for cell in cells:
+                if column >= max_cols:
+                    break
+                span = _column_span(cell)
+                word_cell = table.cell(i, column)
+                last_column = min(column + span, max_cols) - 1
+                if last_column > column:
+                    word_cell = word_cell.merge(table.cell(i, last_column))
+                targets[id(cell)] = word_cell
+                column = last_column + 1
+        return targets
 
 def process_image_universal(img_element, doc, parent_paragraph=None):
     """Processa imagens de forma universal."""
@@ -474,28 +453,27 @@ def process_image_universal(img_element, doc, parent_paragraph=None):
             else:
                 doc.add_paragraph(f'[{alt_text}]')
 
-def convert_html_to_docx_universal(html_content, output_path):
-    """Converte HTML para DOCX de forma universal."""
+def convert_html_to_docx_universal(html_content, output_path, parser=None):
+    """
+    Converte HTML para DOCX de forma universal.
+
+    ``parser`` escolhe o backend do BeautifulSoup; o padrão vem de
+    HTML_PARSER_BACKEND ou, sem configuração, é o lxml quando instalado.
+    """
     try:
         # Parse do HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, default_html_parser(parser or HTML_PARSER_BACKEND))
         
         # Criar documento Word
         doc = Document()
         
-        # Extrair estilos CSS
-        styles = extract_comprehensive_css_styles(soup)
+        # Extrair estilos CSS (interpretados uma única vez)
+        stylesheet = extract_comprehensive_css_styles(soup)
         
-        # Processar o body do HTML
-        body = soup.find('body')
-        if body:
-            for child in body.children:
-                process_element_universal(child, doc, styles)
-        else:
-            # Se não há body, processar todo o conteúdo
-            for child in soup.children:
-                if hasattr(child, 'name') and child.name:
-                    process_element_universal(child, doc, styles)
+        # Processar o body do HTML (ou todo o conteúdo, se não houver body)
+        # em um único percurso que calcula estilos e cria os runs
+        renderer = DocxRenderer(doc, stylesheet)
+        renderer.render(soup.find('body') or soup)
         
         # Salvar documento
         doc.save(output_path)
@@ -0,0 +1,234 @@
+"""
+Cliente HTTP assíncrono compartilhado para baixar os arquivos a converter.
+
+Um único ``httpx.AsyncClient`` por processo mantém as conexões abertas
+(keep-alive) e reaproveita DNS e TLS entre requisições ao mesmo host, com
+HTTP/2 quando o pacote ``h2`` está instalado. Como o httpx só limita o total
+de conexões, um semáforo por host impede que um lote de URLs do mesmo
+storage ocupe todas elas.
+
+Falhas transitórias (erros de rede, timeouts e respostas 429/502/503/504)
+são repetidas com espera exponencial e jitter, respeitando o ``Retry-After``
+do servidor. Requisições condicionais enviam ``If-None-Match`` e
+``If-Modified-Since``; a resposta 304 volta como ``not_modified``, sem corpo.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+from spooling import SpoolHasher
+
+try:
+    import h2  # noqa: F401  (habilita HTTP/2 no httpx)
+except ImportError:
+    h2 = None
+
+# Respostas que indicam falha transitória do servidor
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Teto para o Retry-After informado pelo servidor, em segundos
+MAX_RETRY_AFTER = 30.0
+
+
+class FetchError(Exception):
+    """
+    Falha ao baixar uma URL (após as tentativas).
+
+    ``status_code`` é o status HTTP devolvido pelo servidor, se houve
+    resposta; ``invalid_url`` indica que a própria URL foi recusada antes de
+    qualquer requisição (esquema não suportado ou URL malformada).
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 invalid_url: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.invalid_url = invalid_url
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class FetchResult:
+    """
+    Resultado de um download; ``content`` é None quando gravado em arquivo ou
+    em 304. ``sha256`` (e ``xxhash``, com ``SPOOL_FAST_HASH``) é o hash do
+    corpo, calculado durante o download.
+    """
+    url: str
+    status_code: int
+    headers: httpx.Headers
+    content: Optional[bytes] = None
+    size: int = 0
+    sha256: Optional[str] = None
+    attempts: int = 1
+    xxhash: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get('last-modified')
+
+    @property
+    def content_type(self) -> Optional[str]:
+        return self.headers.get('content-type')
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After em segundos (a forma com data HTTP é ignorada)."""
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpFetcher:
+    """
+    Downloads com pool de conexões, limite por host e novas tentativas.
+
+    ``max_per_host`` limita os downloads simultâneos do mesmo host,
+    ``retries`` é o número de novas tentativas após a primeira e
+    ``backoff`` a espera base entre elas (dobra a cada tentativa).
+    """
+
+    def __init__(self, max_connections: int = 100, max_per_host: int = 8,
+                 timeout: float = 30.0, retries: int = 2, backoff: float = 0.5,
+                 http2: bool = True, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.http2 = http2 and h2 is not None
+        self._transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # O pool de conexões pertence ao loop em que foi criado
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=self.timeout,
+                http2=self.http2,
+                follow_redirects=True,
+                transport=self._transport,
+            )
+            self._client_loop = loop
+            self._host_semaphores = {}
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return semaphore
+
+    def _delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after
+        # Jitter para que downloads que falharam juntos não voltem juntos
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    async def fetch(self, url: str, destination: Optional[str] = None,
+                    etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchResult:
+        """
+        Baixa ``url`` para a memória ou, com ``destination``, direto para o arquivo.
+
+        Com ``etag``/``last_modified``, a requisição é condicional e pode
+        retornar um resultado ``not_modified``. Levanta ``FetchError``.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        client = self._get_client()
+        semaphore = self._host_semaphore(url)
+        for attempt in range(self.retries + 1):
+            async with semaphore:
+                try:
+                    return await self._get(client, url, headers, destination, attempt + 1)
+                except _RetryableError as e:
+                    error = e
+            if attempt == self.retries:
+                raise FetchError(f"{error} ao baixar {url} após {attempt + 1} tentativa(s)")
+            await asyncio.sleep(self._delay(attempt, error.retry_after))
+        raise AssertionError("inalcançável")
+
+    async def _get(self, client: httpx.AsyncClient, url: str, headers: dict,
+                   destination: Optional[str], attempt: int) -> FetchResult:
+        try:
+            async with client.stream('GET', url, headers=headers) as response:
+                status = response.status_code
+                if status == 304:
+                    return FetchResult(url, status, response.headers, attempts=attempt)
+                if status in RETRY_STATUS_CODES:
+                    raise _RetryableError(f"HTTP {status}",
+                                          _parse_retry_after(response.headers.get('retry-after')))
+                if status >= 400:
+                    raise FetchError(f"HTTP {status} ao baixar {url}", status_code=status)
+
+                hasher = SpoolHasher()
+                if destination:
+                    content = None
+                    with open(destination, 'wb') as file:
+                        async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            file.write(chunk)
+                            hasher.update(chunk)
+                else:
+                    content = await response.aread()
+                    hasher.update(content)
+                return FetchResult(url, status, response.headers, content=content,
+                                   size=hasher.size, sha256=hasher.sha256,
+                                   attempts=attempt, xxhash=hasher.xxhash)
+        except (httpx.UnsupportedProtocol, httpx.InvalidURL) as e:
+            raise FetchError(str(e), invalid_url=True)
+        except httpx.TransportError as e:
+            raise _RetryableError(str(e) or type(e).__name__)
+        except httpx.HTTPError as e:
+            # Redirecionamentos em excesso, corpo com compressão inválida etc.
+            raise FetchError(f"{str(e) or type(e).__name__} ao baixar {url}")
+
+    async def fetch_many(self, urls: Sequence[str],
+                         destinations: Optional[Sequence[Optional[str]]] = None
+                         ) -> List[Union[FetchResult, FetchError]]:
+        """Baixa várias URLs em paralelo; falhas voltam como ``FetchError`` na posição da URL."""
+        destinations = destinations or [None] * len(urls)
+        results = await asyncio.gather(
+            *(self.fetch(url, destination) for url, destination in zip(urls, destinations)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, FetchError):
+                raise result
+        return results
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
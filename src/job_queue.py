@@ -0,0 +1,466 @@
+"""
+Fila de conversões distribuída entre réplicas.
+
+No modo fila (``JOB_QUEUE_URL``), os nós da API não convertem: gravam o
+arquivo no armazenamento compartilhado, enfileiram o pedido e esperam o
+resultado. Os nós conversores (``python src/job_queue.py``) retiram trabalhos
+da fila só quando têm um conversor livre, então uma rajada de PPTs que chega a
+uma réplica é dividida entre todos os nós ociosos.
+
+Entrada e saída de cada trabalho ficam no diretório temporário, que precisa
+ser um volume compartilhado entre os nós (``TMPDIR``): o pedido leva o caminho
+do arquivo, e o resultado é gravado ao lado dele em ``<arquivo>.result.json``.
+Pela fila passam apenas mensagens pequenas, no mesmo formato do protocolo do
+serviço de conversão (``converter_service.py``).
+
+Backends, escolhidos pela URL:
+
+    sqlite:///caminho/fila.db   arquivo SQLite (uma máquina; testes)
+    redis://[:senha@]host:6379/0   Redis ou servidor compatível com o protocolo RESP
+
+A entrega é de no máximo uma vez: se um nó conversor cai no meio do trabalho,
+a API responde 503 ao fim do prazo. Trabalhos que saem da fila com o prazo
+vencido são descartados sem converter.
+
+Quando a API desiste de um trabalho (prazo vencido ou requisição cancelada),
+ela remove o arquivo de entrada e, depois, o resultado. O nó conversor confere
+a entrada de novo depois de gravar o resultado e o apaga se ela sumiu, de modo
+que nenhum dos dois arquivos fica para trás no volume compartilhado.
+
+Uso (nó conversor):
+    JOB_QUEUE_URL=redis://redis:6379/0 python src/job_queue.py [--workers 4]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import unquote, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+from converter_service import (ConverterServiceError, add_pool_arguments, create_pool,
+                               execute_request, unpack_response)
+from deadlines import Deadline, remaining_seconds
+from segments import Segment
+
+# Espera máxima de cada chamada bloqueante ao backend; esperas mais longas
+# repetem a chamada, para reagir a cancelamentos e ao encerramento do nó
+POLL_TIMEOUT = 1.0
+
+# Por quanto tempo um resultado não retirado fica guardado na fila
+RESULT_TTL_SECONDS = 600
+
+RESULT_SUFFIX = '.result.json'
+
+
+class SQLiteQueueBackend:
+    """
+    Fila em um arquivo SQLite, compartilhável entre processos da mesma máquina.
+
+    O SQLite não tem espera bloqueante: ``pop_job`` e ``pop_result`` consultam
+    as tabelas a cada ``poll_interval`` até o prazo.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.05,
+                 result_ttl: float = RESULT_TTL_SECONDS):
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False,
+                                           isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (seq INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (job_id TEXT PRIMARY KEY, payload TEXT, created_at REAL)"
+            )
+
+    def _take(self, select: str, delete: str, params: tuple) -> Optional[str]:
+        # BEGIN IMMEDIATE impede que dois processos retirem a mesma linha
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(select, params).fetchone()
+                if row is not None:
+                    self._connection.execute(delete, (row[0],))
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+        return row[1] if row is not None else None
+
+    def _wait(self, take, timeout: float) -> Optional[str]:
+        deadline = time.monotonic() + timeout
+        while True:
+            payload = take()
+            if payload is not None or time.monotonic() >= deadline:
+                return payload
+            time.sleep(self.poll_interval)
+
+    def push_job(self, payload: str):
+        with self._lock:
+            self._connection.execute("INSERT INTO jobs (payload) VALUES (?)", (payload,))
+
+    def pop_job(self, timeout: float) -> Optional[str]:
+        return self._wait(lambda: self._take(
+            "SELECT seq, payload FROM jobs ORDER BY seq LIMIT 1",
+            "DELETE FROM jobs WHERE seq = ?", (),
+        ), timeout)
+
+    def push_result(self, job_id: str, payload: str):
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (job_id, payload, now)
+            )
+            # Resultados que ninguém retirou (a API desistiu de esperar)
+            self._connection.execute(
+                "DELETE FROM results WHERE created_at < ?", (now - self.result_ttl,)
+            )
+
+    def pop_result(self, job_id: str, timeout: float) -> Optional[str]:
+        return self._wait(lambda: self._take(
+            "SELECT job_id, payload FROM results WHERE job_id = ?",
+            "DELETE FROM results WHERE job_id = ?", (job_id,),
+        ), timeout)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class _RespConnection:
+    """Conexão com um servidor que fala o protocolo RESP do Redis."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.timeout = timeout
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._socket.makefile('rb')
+
+    def command(self, *args, timeout: Optional[float] = None):
+        parts = [b'*%d\r\n' % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._socket.settimeout(self.timeout if timeout is None else timeout)
+        self._socket.sendall(b''.join(parts))
+        return self._read()
+
+    def _read(self):
+        line = self._file.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError("conexão fechada pelo servidor")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            raise ConverterServiceError(f"Erro do servidor da fila: {rest.decode('utf-8')}")
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            size = int(rest)
+            return None if size < 0 else self._file.read(size + 2)[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self._read() for _ in range(count)]
+        raise ConnectionError(f"resposta RESP inválida: {line[:50]!r}")
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+
+class RedisQueueBackend:
+    """
+    Fila em listas do Redis: ``RPUSH`` para enfileirar e ``BLPOP`` para
+    esperar trabalhos e resultados sem consultas repetidas.
+
+    Como o ``BLPOP`` prende a conexão, cada thread usa a sua.
+    """
+
+    def __init__(self, url: str = 'redis://localhost:6379/0', namespace: str = 'textify',
+                 result_ttl: float = RESULT_TTL_SECONDS, socket_timeout: float = 10.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.strip('/') or 0)
+        self.namespace = namespace
+        self.result_ttl = result_ttl
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+        self._connections: List[_RespConnection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> _RespConnection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = _RespConnection(self.host, self.port, self.socket_timeout)
+            if self.password:
+                connection.command('AUTH', self.password)
+            if self.db:
+                connection.command('SELECT', self.db)
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _command(self, *args, timeout: Optional[float] = None):
+        try:
+            return self._connection().command(*args, timeout=timeout)
+        except OSError as e:
+            # Depois de uma falha a conexão pode estar no meio de uma resposta
+            connection = getattr(self._local, 'connection', None)
+            if connection is not None:
+                self._local.connection = None
+                with self._lock:
+                    self._connections.remove(connection)
+                connection.close()
+            raise ConverterServiceError(f"Fila indisponível em {self.host}:{self.port}: {e}")
+
+    def _blocking_pop(self, key: str, timeout: float) -> Optional[str]:
+        timeout = max(timeout, 0.01)
+        reply = self._command('BLPOP', key, f"{timeout:.3f}",
+                              timeout=timeout + self.socket_timeout)
+        return reply[1].decode('utf-8') if reply else None
+
+    def _result_key(self, job_id: str) -> str:
+        return f"{self.namespace}:result:{job_id}"
+
+    def push_job(self, payload: str):
+        self._command('RPUSH', f"{self.namespace}:jobs", payload)
+
+    def pop_job(self, timeout: float) -> Optional[str]:
+        return self._blocking_pop(f"{self.namespace}:jobs", timeout)
+
+    def push_result(self, job_id: str, payload: str):
+        key = self._result_key(job_id)
+        self._command('RPUSH', key, payload)
+        self._command('EXPIRE', key, int(self.result_ttl))
+
+    def pop_result(self, job_id: str, timeout: float) -> Optional[str]:
+        return self._blocking_pop(self._result_key(job_id), timeout)
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+
+def create_backend(url: str):
+    """Backend da fila a partir da URL (``sqlite:///...`` ou ``redis://...``)."""
+    scheme = urlsplit(url).scheme
+    if scheme == 'sqlite':
+        return SQLiteQueueBackend(url[len('sqlite://'):])
+    if scheme == 'redis':
+        return RedisQueueBackend(url)
+    raise ValueError(f"Backend de fila desconhecido: {url}")
+
+
+def _read_output(path: str) -> dict:
+    """Resposta gravada pelo nó conversor; o arquivo é removido após a leitura."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        raise ConverterServiceError(f"Resultado da conversão ilegível em {path}: {e}")
+    finally:
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def _abandon(file_path: str):
+    """Marca o trabalho como abandonado removendo a entrada e, depois, o resultado."""
+    for path in (file_path, file_path + RESULT_SUFFIX):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class JobQueue:
+    """
+    Lado da API: enfileira conversões e espera o resultado, com a interface de
+    conversão do ``FileConverter``.
+
+    As esperas ocupam threads de um executor próprio (``max_waiting``); a
+    admissão já limita quantas conversões cada worker tem em andamento.
+    """
+
+    def __init__(self, backend, timeout: float = 300.0, max_waiting: int = 32):
+        self.backend = backend
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_waiting, thread_name_prefix='job-queue')
+
+    async def submit(self, request: dict, deadline: Optional[Deadline] = None):
+        """
+        Enfileira um pedido e devolve o resultado (ou levanta o erro da
+        conversão). O prazo de ``deadline`` vai no trabalho como um instante
+        (``timeout_at``), para a espera na fila também contar.
+
+        Se a espera expira ou é cancelada, o arquivo de entrada é removido
+        junto com um eventual resultado (ver ``_abandon``).
+        """
+        loop = asyncio.get_running_loop()
+        job_id = uuid.uuid4().hex
+        started = time.monotonic()
+        job = dict(request, id=job_id, deadline=time.time() + self.timeout)
+        timeout = remaining_seconds(deadline)
+        if timeout is not None:
+            job['timeout_at'] = time.time() + timeout
+        await loop.run_in_executor(self._executor, self.backend.push_job,
+                                   json.dumps(job, ensure_ascii=False))
+
+        reply = None
+        try:
+            while reply is None:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    raise ConverterServiceError(
+                        f"Nenhum nó conversor respondeu em {self.timeout:g} s"
+                    )
+                reply = await loop.run_in_executor(self._executor, self.backend.pop_result,
+                                                   job_id, min(remaining, POLL_TIMEOUT))
+        except (ConverterServiceError, asyncio.CancelledError):
+            _abandon(request['file_path'])
+            raise
+        metrics.registry.observe(metrics.JOB_WAIT, time.monotonic() - started)
+        return unpack_response(_read_output(json.loads(reply)['output']), deadline)
+
+    async def convert_file(self, file_path: str, filename: str,
+                           content_type: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> str:
+        return await self.submit({
+            'method': 'convert_file', 'file_path': os.path.abspath(file_path),
+            'filename': filename, 'content_type': content_type,
+        }, deadline)
+
+    async def convert_segments(self, file_path: str, filename: str, clean: bool = False,
+                               content_type: Optional[str] = None,
+                               deadline: Optional[Deadline] = None) -> List[Segment]:
+        segments = await self.submit({
+            'method': 'convert_segments', 'file_path': os.path.abspath(file_path),
+            'filename': filename, 'clean': clean, 'content_type': content_type,
+        }, deadline)
+        return [Segment(**segment) for segment in segments]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.backend.close()
+
+
+class QueueWorker:
+    """
+    Lado do nó conversor: ``concurrency`` laços retiram trabalhos da fila, cada
+    um só depois de terminar o anterior, e gravam a resposta ao lado do arquivo
+    de entrada antes de avisar a API pela fila.
+    """
+
+    def __init__(self, backend, converter, concurrency: int = 2):
+        self.backend = backend
+        self.converter = converter
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job-worker')
+
+    async def run(self, stop: asyncio.Event):
+        """Processa trabalhos até ``stop``; o trabalho em andamento é concluído."""
+        await asyncio.gather(*(self._loop(stop) for _ in range(self.concurrency)))
+
+    async def _loop(self, stop: asyncio.Event):
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            try:
+                payload = await loop.run_in_executor(self._executor, self.backend.pop_job, POLL_TIMEOUT)
+                if payload is not None:
+                    await self.process(json.loads(payload))
+            except (ConverterServiceError, OSError) as e:
+                # Fila fora do ar ou volume compartilhado inacessível
+                print(f"Erro na fila de conversões: {e}", flush=True)
+                await asyncio.sleep(POLL_TIMEOUT)
+
+    async def process(self, job: dict):
+        if _abandoned(job):
+            metrics.registry.inc(metrics.JOBS_PROCESSED, result='expired')
+            return
+
+        if 'timeout_at' in job:
+            job['timeout'] = max(0.0, job['timeout_at'] - time.time())
+        response = await execute_request(self.converter, job)
+        metrics.registry.inc(metrics.JOBS_PROCESSED, result='ok' if response['ok'] else 'error')
+
+        output = job['file_path'] + RESULT_SUFFIX
+        loop = asyncio.get_running_loop()
+        if _abandoned(job):
+            return
+        await loop.run_in_executor(self._executor, _write_output, output, response)
+        # A API pode ter desistido durante a gravação: sem a entrada, ninguém
+        # mais vai ler o resultado
+        if not os.path.exists(job['file_path']):
+            os.unlink(output)
+            return
+        await loop.run_in_executor(self._executor, self.backend.push_result,
+                                   job['id'], json.dumps({'output': output}))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.backend.close()
+
+
+def _abandoned(job: dict) -> bool:
+    """A API já desistiu do trabalho (prazo vencido) ou removeu a entrada."""
+    return time.time() > job['deadline'] or not os.path.exists(job['file_path'])
+
+
+def _write_output(path: str, response: dict):
+    # Grava em um nome provisório para a API nunca ler um arquivo pela metade
+    partial = path + '.partial'
+    with open(partial, 'w', encoding='utf-8') as file:
+        json.dump(response, file, ensure_ascii=False)
+    os.replace(partial, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--queue', default=os.getenv("JOB_QUEUE_URL"),
+                        help="URL da fila (sqlite:///... ou redis://...)")
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+    if not args.queue:
+        parser.error("informe --queue ou JOB_QUEUE_URL")
+
+    pool = create_pool(args)
+    worker = QueueWorker(create_backend(args.queue), pool, concurrency=args.workers)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        print(f"Nó conversor na fila {urlsplit(args.queue).scheme} com {args.workers} conversores",
+              flush=True)
+        await worker.run(stop)
+
+    try:
+        asyncio.run(run())
+    finally:
+        worker.close()
+        pool.shutdown()
+        metrics.registry.flush()
+
+
+if __name__ == "__main__":
+    main()
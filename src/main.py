@@ -1,17 +1,28 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, BackgroundTasks, Header, Request
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.background import BackgroundTask
 from pydantic import BaseModel, HttpUrl
 import aiofiles
-import requests
 import tempfile
 import os
-from typing import Optional, Annotated
-from file_converter import FileConverter
+from typing import List, Optional, Annotated, Tuple
+from file_converter import FileConverter, SUPPORTED_FORMATS
+from chunking import Chunker
+from sandbox import SandboxLimitExceeded, SandboxPool
+from converter_service import ConverterClient, ConverterServiceError, converter_options_from_env
+from job_queue import JobQueue, create_backend
+from spooling import SpoolResult, spool_bytes, spool_upload
+from deadlines import Deadline
+from http_fetcher import FetchError, HttpFetcher
+from url_cache import HIT, MISS, REVALIDATED, UNCHANGED, MemoryCacheBackend, SQLiteCacheBackend, UrlCache
+from admission import AdmissionController, AdmissionRejected, ApiKey, estimate_cost, estimate_generate_cost, parse_api_keys
+import metrics
+import tracing
 import logging
 import asyncio
+import cProfile
 import base64
 import subprocess
 import re
@@ -64,7 +75,7 @@ def check_dependencies():
         'fastapi': 'fastapi',
         'uvicorn': 'uvicorn', 
         'aiofiles': 'aiofiles',
-        'requests': 'requests',
+        'httpx': 'httpx',
         'beautifulsoup4': 'bs4',
         'lxml': 'lxml'
     }
@@ -86,6 +97,12 @@ def check_dependencies():
     
     print("✓ Todas as dependências críticas estão disponíveis")
 
+# Configuração do controle de admissão (limites por processo)
+ADMISSION_MAX_WEIGHT = int(os.getenv("ADMISSION_MAX_WEIGHT", "8"))
+ADMISSION_KEY_MAX_WEIGHT = int(os.getenv("ADMISSION_KEY_MAX_WEIGHT", "4"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+
 # Configuração de autenticação
 def get_api_key():
     # Primeiro tenta ler de arquivo (Docker secret)
@@ -97,7 +114,14 @@ def get_api_key():
     # Fallback para variável de ambiente
     return os.getenv("API_KEY", "default-api-key-change-me")
 
-API_KEY = get_api_key()
+# O arquivo de segredo pode trazer várias chaves, uma por linha, com cota própria
+API_KEYS = parse_api_keys(get_api_key(), ADMISSION_KEY_MAX_WEIGHT)
+
+admission_controller = AdmissionController(
+    max_weight=ADMISSION_MAX_WEIGHT,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    max_queue=ADMISSION_MAX_QUEUE,
+)
 
 # Configuração da duração dos arquivos temporários
 TEMP_FILE_DURATION_MINUTES = int(os.getenv("TEMP_FILE_DURATION_MINUTES", "15"))
@@ -178,21 +202,460 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Métricas no formato do Prometheus, agregadas entre os workers (GET /metrics)
+METRICS_ENABLED = metrics.registry.enabled
+
+def temp_dir_usage():
+    """Uso de disco dos arquivos temporários, calculado a cada coleta"""
+    hosted_bytes, hosted_files = metrics.directory_usage(TEMP_FILES_DIR)
+    # Uploads e downloads em conversão ficam na raiz do diretório temporário
+    upload_bytes, upload_files = metrics.directory_usage(tempfile.gettempdir(), recursive=False)
+    return [
+        (metrics.TEMP_DIR_BYTES, {"dir": "hosted"}, hosted_bytes),
+        (metrics.TEMP_DIR_FILES, {"dir": "hosted"}, hosted_files),
+        (metrics.TEMP_DIR_BYTES, {"dir": "tmp"}, upload_bytes),
+        (metrics.TEMP_DIR_FILES, {"dir": "tmp"}, upload_files),
+    ]
+
+metrics.registry.register_collector(temp_dir_usage)
+
+@app.middleware("http")
+async def collect_request_metrics(request: Request, call_next):
+    """
+    Conta requisições, bytes e duração por endpoint (o caminho da rota, como
+    /temp/{file_id}). A duração vai até o último byte da resposta, de modo
+    que respostas em fluxo são medidas por inteiro.
+    """
+    if not METRICS_ENABLED:
+        return await call_next(request)
+    
+    started = time.perf_counter()
+    metrics.registry.add(metrics.IN_FLIGHT_REQUESTS, 1)
+    
+    def record(endpoint: str, status: int, sent: int):
+        metrics.registry.add(metrics.IN_FLIGHT_REQUESTS, -1)
+        metrics.registry.inc(metrics.REQUESTS_TOTAL, endpoint=endpoint,
+                             method=request.method, status=status)
+        metrics.registry.observe(metrics.REQUEST_DURATION, time.perf_counter() - started,
+                                 endpoint=endpoint)
+        metrics.registry.inc(metrics.BYTES_RECEIVED, int(request.headers.get("content-length") or 0),
+                             endpoint=endpoint)
+        metrics.registry.inc(metrics.BYTES_SENT, sent, endpoint=endpoint)
+        # Arquivo gravado pela própria requisição (upload, download ou HTML)
+        spool = getattr(request.state, "spool", None)
+        if spool is not None:
+            metrics.registry.inc(metrics.BYTES_SPOOLED, spool.size, endpoint=endpoint)
+    
+    def endpoint_name() -> str:
+        route = request.scope.get("route")
+        return getattr(route, "path", "unmatched")
+    
+    try:
+        response = await call_next(request)
+    except Exception:
+        record(endpoint_name(), 500, 0)
+        raise
+    
+    endpoint = endpoint_name()
+    body = response.body_iterator
+    
+    async def counted_body():
+        sent = 0
+        try:
+            async for chunk in body:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            record(endpoint, response.status_code, sent)
+    
+    response.body_iterator = counted_body()
+    return response
+
+# Um perfil por vez: o cProfile mede a thread do loop de eventos inteira
+profile_lock = asyncio.Lock()
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Mede as fases da requisição e as devolve no cabeçalho Server-Timing.
+    
+    Com ?profile=1 (exige a API key), a requisição roda sob o cProfile e o
+    resumo das funções mais custosas é anexado à resposta: no campo "profile"
+    das respostas JSON ou como um registro {"type": "profile"} ao final das
+    respostas em NDJSON. O perfil cobre apenas a thread do loop de eventos;
+    o tempo dos leitores em threads aparece como espera nas fases.
+    """
+    profile = request.query_params.get("profile", "").lower() in ("1", "true")
+    if profile and request.headers.get("x-api-key") not in API_KEYS:
+        return JSONResponse(status_code=401, content={"detail": "API Key inválida"})
+    
+    trace, token = tracing.start_trace()
+    try:
+        if not profile:
+            response = await call_next(request)
+            response.headers["Server-Timing"] = trace.server_timing()
+            return response
+        
+        await profile_lock.acquire()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = await call_next(request)
+        except Exception:
+            profiler.disable()
+            profile_lock.release()
+            raise
+    finally:
+        tracing.end_trace(token)
+    
+    body = response.body_iterator
+    media_type = response.headers.get("content-type", "").split(";")[0]
+    
+    def summary() -> dict:
+        return {**tracing.profile_summary(profiler), "spans": trace.to_dict()}
+    
+    if media_type == "application/json":
+        try:
+            content = json.loads(b"".join([chunk async for chunk in body]))
+        finally:
+            profiler.disable()
+            profile_lock.release()
+        if isinstance(content, dict):
+            content["profile"] = summary()
+        headers = {name: value for name, value in response.headers.items()
+                   if name not in ("content-length", "content-type")}
+        headers["Server-Timing"] = trace.server_timing()
+        return JSONResponse(content=content, status_code=response.status_code, headers=headers)
+    
+    async def profiled_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            profiler.disable()
+            profile_lock.release()
+        if media_type == NDJSON_MEDIA_TYPE:
+            yield ndjson_record({"type": "profile", **summary()})
+    
+    response.headers["Server-Timing"] = trace.server_timing()
+    response.body_iterator = profiled_body()
+    return response
+
 # Função para verificar a API Key
-async def verify_api_key(x_api_key: Annotated[str, Header()]):
-    if x_api_key != API_KEY:
+async def verify_api_key(x_api_key: Annotated[str, Header()]) -> ApiKey:
+    api_key = API_KEYS.get(x_api_key)
+    if api_key is None:
         raise HTTPException(
             status_code=401,
             detail="API Key inválida"
         )
-    return x_api_key
+    return api_key
+
+async def request_cost(request: Request) -> int:
+    """
+    Estima o peso da requisição pelo formato e tamanho do arquivo.
+    
+    O corpo já foi lido pelo FastAPI e fica em cache no Request, então
+    consultá-lo aqui não lê o upload de novo.
+    """
+    if request.url.path == "/convert/file":
+        upload = (await request.form()).get("file")
+        filename = getattr(upload, "filename", None) or ""
+        return estimate_cost(os.path.splitext(filename)[1], getattr(upload, "size", None))
+    
+    body = await request.json()
+    if not isinstance(body, dict):
+        return 1
+    if request.url.path.startswith("/generate"):
+        return estimate_generate_cost(str(body.get("format", "")))
+    # /convert/url(s): o tamanho só é conhecido depois do download
+    items = body.get("urls") if request.url.path == "/convert/urls" else [body]
+    if not isinstance(items, list):
+        return 1
+    return sum(url_cost(item) for item in items if isinstance(item, dict)) or 1
+
+def url_cost(item: dict) -> int:
+    filename = item.get("filename") or str(item.get("url", "")).split("?")[0]
+    return estimate_cost(os.path.splitext(filename)[1])
+
+async def admit_request(request: Request, api_key: ApiKey = Depends(verify_api_key)):
+    """
+    Reserva a capacidade da conversão até o fim da resposta.
+    
+    Espera na fila de admissão até ADMISSION_QUEUE_TIMEOUT segundos; se não
+    houver espaço, responde 429 com Retry-After. A liberação acontece depois
+    do envio do último byte, inclusive nas respostas em streaming.
+    """
+    weight = await request_cost(request)
+    try:
+        ticket = await admission_controller.acquire(api_key.name, weight, api_key.max_weight)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Limite de conversões simultâneas atingido, tente novamente mais tarde",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    try:
+        yield api_key
+    finally:
+        admission_controller.release(ticket)
+
+CONVERTER_OPTIONS = converter_options_from_env()
+converter = FileConverter(**CONVERTER_OPTIONS)
+
+# Conversões isoladas em processos com orçamento de memória e CPU. As
+# respostas em streaming continuam no processo do worker: os leitores em
+# fluxo mantêm só um segmento por vez em memória.
+SANDBOX_ENABLED = os.getenv("SANDBOX_ENABLED", "false").lower() == "true"
+sandbox_pool = SandboxPool(
+    converter_options=CONVERTER_OPTIONS,
+    workers=int(os.getenv("SANDBOX_WORKERS", "2")),
+    memory_limit_mb=int(os.getenv("SANDBOX_MEMORY_MB", "256")),
+    address_space_mb=int(os.getenv("SANDBOX_ADDRESS_SPACE_MB", "1024")),
+    cpu_seconds=float(os.getenv("SANDBOX_CPU_SECONDS", "60")),
+    max_jobs_per_worker=int(os.getenv("SANDBOX_MAX_JOBS", "50")),
+) if SANDBOX_ENABLED else None
+
+# Com CONVERTER_SOCKET, as conversões vão para o serviço de conversão
+# (converter_service.py), que mantém os conversores fora dos workers da API
+CONVERTER_SOCKET = os.getenv("CONVERTER_SOCKET")
+
+# Com JOB_QUEUE_URL, as conversões são enfileiradas e feitas pelos nós
+# conversores (job_queue.py) que tiverem capacidade livre; o diretório
+# temporário precisa ser compartilhado entre a API e os nós
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL")
+job_queue = JobQueue(
+    create_backend(JOB_QUEUE_URL),
+    timeout=float(os.getenv("JOB_TIMEOUT", "300")),
+) if JOB_QUEUE_URL else None
+
+if job_queue is not None:
+    isolated_converter = job_queue
+elif CONVERTER_SOCKET:
+    isolated_converter = ConverterClient(CONVERTER_SOCKET)
+else:
+    isolated_converter = sandbox_pool or converter
+
+# Cliente HTTP compartilhado para /convert/url e /convert/urls
+http_fetcher = HttpFetcher(
+    max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+    max_per_host=int(os.getenv("HTTP_MAX_PER_HOST", "8")),
+    timeout=float(os.getenv("HTTP_TIMEOUT", "30")),
+    retries=int(os.getenv("HTTP_RETRIES", "2")),
+)
+
+# Cache das conversões de URLs: revalida com ETag/Last-Modified e devolve o
+# texto guardado em um 304. Com URL_CACHE_PATH, o SQLite é compartilhado
+# entre os workers; sem ele, cada worker tem o seu cache em memória.
+URL_CACHE_ENABLED = os.getenv("URL_CACHE_ENABLED", "true").lower() != "false"
+URL_CACHE_PATH = os.getenv("URL_CACHE_PATH")
+URL_CACHE_MAX_ENTRIES = int(os.getenv("URL_CACHE_MAX_ENTRIES", "1000"))
+
+def create_url_cache() -> Optional[UrlCache]:
+    if not URL_CACHE_ENABLED:
+        return None
+    if URL_CACHE_PATH:
+        backend = SQLiteCacheBackend(URL_CACHE_PATH, max_entries=URL_CACHE_MAX_ENTRIES)
+    else:
+        backend = MemoryCacheBackend(max_entries=URL_CACHE_MAX_ENTRIES)
+    return UrlCache(
+        backend,
+        ttl_seconds=float(os.getenv("URL_CACHE_TTL_SECONDS", "3600")),
+        fresh_seconds=float(os.getenv("URL_CACHE_FRESH_SECONDS", "0")),
+        max_text_chars=int(os.getenv("URL_CACHE_MAX_TEXT_MB", "10")) * 1024 * 1024,
+        # Outra configuração do conversor produz outro texto
+        namespace=json.dumps(CONVERTER_OPTIONS, sort_keys=True),
+    )
+
+url_cache = create_url_cache()
+
+# Limites do endpoint de conversão em lote
+BULK_MAX_URLS = int(os.getenv("BULK_MAX_URLS", "50"))
+BULK_CONVERSION_CONCURRENCY = int(os.getenv("BULK_CONVERSION_CONCURRENCY", "4"))
+
+@app.on_event("shutdown")
+async def close_shared_resources():
+    if sandbox_pool is not None:
+        sandbox_pool.shutdown()
+    if job_queue is not None:
+        job_queue.close()
+    await http_fetcher.aclose()
+
+# Prazo das extrações, contado a partir da admissão da requisição: ao acabar,
+# o texto volta parcial com "truncated": true. EXTRACTION_TIMEOUT é o padrão
+# (0 = sem prazo) e EXTRACTION_MAX_TIMEOUT o maior ?timeout= aceito
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "0"))
+EXTRACTION_MAX_TIMEOUT = float(os.getenv("EXTRACTION_MAX_TIMEOUT", "300"))
+
+def extraction_deadline(timeout: Optional[float] = None) -> Deadline:
+    """Prazo da extração: parâmetro de query ``timeout`` (segundos) ou o padrão"""
+    if timeout is None:
+        return Deadline(EXTRACTION_TIMEOUT or None)
+    if timeout <= 0 or (EXTRACTION_MAX_TIMEOUT and timeout > EXTRACTION_MAX_TIMEOUT):
+        raise HTTPException(
+            status_code=400,
+            detail=f"timeout deve estar entre 0 e {EXTRACTION_MAX_TIMEOUT:g} segundos"
+        )
+    return Deadline(timeout)
+
+def truncation_fields(deadline: Optional[Deadline]) -> dict:
+    """Campos da resposta sobre o corte do texto pelo prazo da extração"""
+    if deadline is None or not deadline.truncated:
+        return {"truncated": False}
+    return {"truncated": True, "truncated_reason": deadline.reason}
+
+# Tipo de conteúdo das respostas em fluxo: um objeto JSON por linha
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Formatos de resposta dos endpoints de conversão: texto único, segmentos
+# (páginas, planilhas, slides) ou trechos prontos para ingestão por LLMs
+RESPONSE_FORMATS = ("text", "segments", "chunks")
+
+# Padrões da divisão em trechos (format=chunks), ajustáveis por requisição
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "paragraph")
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "0"))
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "chars")
 
-converter = FileConverter()
+def chunking_options(chunk_strategy: str = CHUNK_STRATEGY, chunk_size: int = CHUNK_SIZE,
+                     chunk_overlap: int = CHUNK_OVERLAP, tokenizer: str = CHUNK_TOKENIZER) -> dict:
+    """Parâmetros de query da divisão em trechos"""
+    return {
+        "strategy": chunk_strategy,
+        "size": chunk_size,
+        "overlap": chunk_overlap,
+        "tokenizer": tokenizer
+    }
+
+def create_chunker(format: str, options: dict, clean: bool = False) -> Optional[Chunker]:
+    """
+    Cria o divisor de trechos quando format=chunks, validando os parâmetros.
+    
+    Com ``clean``, a limpeza é aplicada a cada trecho: os segmentos devem ser
+    lidos sem limpar, para que a divisão por parágrafos ainda veja as quebras
+    de linha que ``clean_text`` remove.
+    """
+    if format != "chunks":
+        return None
+    try:
+        return Chunker(**options, clean=converter.clean_text if clean else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def validate_response_format(format: str):
+    if format not in RESPONSE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de resposta inválido: {format}. Use: {', '.join(RESPONSE_FORMATS)}"
+        )
+
+def segments_content(segments: list, chunker: Optional[Chunker] = None) -> dict:
+    """Campos da resposta nos formatos 'segments' e 'chunks'"""
+    total_characters = segments[-1].end if segments else 0
+    if chunker is not None:
+        chunks = chunker.chunk(segment.text for segment in segments)
+        return {
+            "chunks": [chunk.to_dict() for chunk in chunks],
+            "total_chunks": len(chunks),
+            "total_characters": total_characters
+        }
+    return {
+        "segments": [segment.to_dict() for segment in segments],
+        "total_segments": len(segments),
+        "total_characters": total_characters
+    }
+
+def ndjson_record(record: dict) -> bytes:
+    """Serializa um registro como uma linha de NDJSON"""
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+async def stream_conversion(temp_path: str, filename: str, metadata: dict,
+                            clean: bool = False,
+                            chunker: Optional[Chunker] = None,
+                            content_type: Optional[str] = None,
+                            deadline: Optional[Deadline] = None) -> StreamingResponse:
+    """
+    Converte o arquivo e transmite o texto como NDJSON, segmento a segmento.
+    
+    Cada segmento (página, planilha, slide ou bloco de linhas) vira um
+    registro {"type": "chunk", "index": n, "kind": ..., "name": ..., "start":
+    ..., "end": ..., "text": ...}. Com ``chunker``, os registros são os
+    trechos já divididos (com "tokens" e "hash"), produzidos assim que cada
+    janela se completa. Ao final é enviado um registro {"type": "metadata",
+    ...} com ``metadata``, os totais e se o prazo cortou o texto. Um erro após o
+    início da resposta vira um registro {"type": "error"}. O arquivo
+    temporário passa a pertencer ao fluxo e é removido quando ele termina.
+    """
+    segments = converter.iter_segments(temp_path, filename, clean=clean,
+                                       content_type=content_type, deadline=deadline)
+    try:
+        # Lê o primeiro segmento antes de responder, para que erros de formato
+        # ou de leitura ainda resultem em um status HTTP de erro
+        first_segment = await segments.__anext__()
+    except StopAsyncIteration:
+        first_segment = None
+    except Exception:
+        await segments.aclose()
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    
+    async def records():
+        count = 0
+        total_characters = 0
+        segment = first_segment
+        try:
+            while segment is not None:
+                if chunker is None:
+                    yield ndjson_record({"type": "chunk", **segment.to_dict()})
+                    count += 1
+                else:
+                    for chunk in chunker.add(segment.text):
+                        yield ndjson_record({"type": "chunk", **chunk.to_dict()})
+                        count += 1
+                total_characters = segment.end
+                try:
+                    segment = await segments.__anext__()
+                except StopAsyncIteration:
+                    segment = None
+            if chunker is not None:
+                for chunk in chunker.finish():
+                    yield ndjson_record({"type": "chunk", **chunk.to_dict()})
+                    count += 1
+            yield ndjson_record({
+                "type": "metadata",
+                "success": True,
+                **metadata,
+                "chunks": count,
+                "total_characters": total_characters,
+                **truncation_fields(deadline),
+            })
+        except Exception as e:
+            yield ndjson_record({
+                "type": "error",
+                "success": False,
+                "detail": f"Erro na conversão: {str(e)}",
+            })
+        finally:
+            await segments.aclose()
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    return StreamingResponse(records(), media_type=NDJSON_MEDIA_TYPE)
 
 class URLRequest(BaseModel):
     url: HttpUrl
     filename: Optional[str] = None
 
+class URLBatchRequest(BaseModel):
+    urls: List[URLRequest]
+
+def url_filename(request: URLRequest) -> str:
+    """Nome informado ou o último trecho do caminho da URL"""
+    if request.filename:
+        return request.filename
+    return request.url.path.rstrip('/').split('/')[-1] or "download"
+
 class GenerateFileRequest(BaseModel):
     file: str  # HTML bruto ou encodado em base64
     format: str  # Formato de saída (docx, pdf, etc.)
@@ -203,105 +666,311 @@ async def root():
         "message": "DEVFY - API de Conversão de Arquivos",
         "authentication": "Requer header 'x-api-key' para endpoints protegidos",
         "endpoints": {
-            "/convert/url": "POST - Converter arquivo via URL (protegido)",
-            "/convert/file": "POST - Converter arquivo binário (protegido)",
+            "/convert/url": "POST - Converter arquivo via URL (protegido, ?stream=true para NDJSON, ?format=segments|chunks para segmentos ou trechos)",
+            "/convert/urls": "POST - Converter em paralelo os arquivos de uma lista de URLs (protegido)",
+            "/convert/file": "POST - Converter arquivo binário (protegido, ?stream=true para NDJSON, ?format=segments|chunks para segmentos ou trechos)",
             "/generate": "POST - Gerar arquivo a partir de HTML (protegido)",
             "/generate/url": "POST - Gerar arquivo e retornar URL temporária (protegido)",
             "/temp/{file_id}": "GET - Download de arquivo temporário",
-            "/formats": "GET - Formatos suportados (protegido)"
+            "/formats": "GET - Formatos suportados (protegido)",
+            "/metrics": "GET - Métricas no formato do Prometheus"
         }
     }
 
 @app.get("/formats")
-async def get_supported_formats(api_key: str = Depends(verify_api_key)):
+async def get_supported_formats(api_key: ApiKey = Depends(verify_api_key)):
     """Retorna os formatos de arquivo suportados"""
     return {
-        "supported_formats": [
-            "DOCX", "DOC", "XML", "YML", "XLSX", "XLS", "CSV", 
-            "PDF", "TXT", "PPTX", "PPT", "HTML", "HTM", 
-            "ODT", "ODP", "ODS", "JSON"
-        ]
+        "supported_formats": SUPPORTED_FORMATS
     }
 
+def fetch_error_status(error: FetchError) -> int:
+    """Status da resposta para uma falha de download: 400 para URL inválida, 502 para o resto"""
+    return 400 if error.invalid_url else 502
+
+def downloaded_spool(download, temp_path: str) -> SpoolResult:
+    """Arquivo baixado em ``temp_path``, com os hashes calculados durante o download"""
+    return SpoolResult(path=temp_path, size=download.size, sha256=download.sha256,
+                       xxhash=download.xxhash)
+
+async def convert_url_text(url: str, filename: str, temp_path: str,
+                           conversion_slots: Optional[asyncio.Semaphore] = None,
+                           deadline: Optional[Deadline] = None
+                           ) -> Tuple[str, int, str, Optional[SpoolResult]]:
+    """
+    Baixa a URL em ``temp_path`` e extrai o texto, passando pelo cache de URLs.
+    
+    Retorna (texto, tamanho do arquivo, resultado do cache, arquivo baixado),
+    em que o último é None quando nenhum corpo foi baixado. Com uma entrada
+    no cache, o download é condicional: um 304, ou um corpo com o mesmo hash,
+    reaproveita o texto guardado sem converter de novo. ``conversion_slots``
+    limita só a conversão, não o download. Texto cortado pelo prazo
+    (``deadline``) não entra no cache.
+    """
+    entry = url_cache.lookup(url, filename) if url_cache else None
+    if entry is not None and url_cache.is_fresh(entry):
+        metrics.registry.inc(metrics.CACHE_REQUESTS, result=HIT)
+        return entry.text, entry.file_size, HIT, None
+    
+    with tracing.span("download"):
+        download = await http_fetcher.fetch(
+            url, destination=temp_path,
+            etag=entry.etag if entry else None,
+            last_modified=entry.last_modified if entry else None,
+        )
+    metrics.registry.inc(metrics.BYTES_DOWNLOADED, download.size)
+    
+    if entry is not None and (download.not_modified or download.sha256 == entry.content_hash):
+        result = REVALIDATED if download.not_modified else UNCHANGED
+        url_cache.revalidated(entry, download.etag, download.last_modified)
+        metrics.registry.inc(metrics.CACHE_REQUESTS, result=result)
+        spool = None if download.not_modified else downloaded_spool(download, temp_path)
+        return entry.text, entry.file_size, result, spool
+    if download.not_modified:
+        # 304 sem entrada (expirou entre a consulta e a resposta): baixa de novo
+        with tracing.span("download"):
+            download = await http_fetcher.fetch(url, destination=temp_path)
+        metrics.registry.inc(metrics.BYTES_DOWNLOADED, download.size)
+    
+    # Sem extensão no nome, o formato é detectado pelo conteúdo ou, em
+    # último caso, pelo Content-Type da resposta
+    if conversion_slots is None:
+        text = await isolated_converter.convert_file(temp_path, filename, download.content_type,
+                                                     deadline=deadline)
+    else:
+        async with conversion_slots:
+            text = await isolated_converter.convert_file(temp_path, filename, download.content_type,
+                                                         deadline=deadline)
+    if url_cache and not (deadline is not None and deadline.truncated):
+        metrics.registry.inc(metrics.CACHE_REQUESTS, result=MISS)
+        url_cache.store(url, filename, text, etag=download.etag,
+                        last_modified=download.last_modified, content_hash=download.sha256,
+                        content_type=download.content_type, file_size=download.size)
+    return text, download.size, MISS, downloaded_spool(download, temp_path)
+
 @app.post("/convert/url")
-async def convert_from_url(request: URLRequest, api_key: str = Depends(verify_api_key)):
-    """Converte arquivo a partir de uma URL"""
+async def convert_from_url(request: URLRequest, http_request: Request,
+                           stream: bool = False, format: str = "text",
+                           chunking: dict = Depends(chunking_options),
+                           api_key: ApiKey = Depends(admit_request),
+                           deadline: Deadline = Depends(extraction_deadline)):
+    """
+    Converte arquivo a partir de uma URL.
+    
+    Com stream=true, responde em NDJSON; com format=segments, retorna o texto
+    dividido em páginas, planilhas ou slides; com format=chunks, em trechos
+    para ingestão (chunk_strategy, chunk_size, chunk_overlap, tokenizer).
+    Com timeout (segundos), o texto volta parcial se o prazo acabar.
+    """
+    validate_response_format(format)
+    chunker = create_chunker(format, chunking)
+    filename = url_filename(request)
+    # O download vai direto para o arquivo temporário, sem passar pela memória
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as temp_file:
+        temp_path = temp_file.name
+    # Passa a True quando a resposta em fluxo assume o arquivo temporário
+    handed_off = False
     try:
-        # Download do arquivo
-        response = requests.get(str(request.url), timeout=30)
-        response.raise_for_status()
-        
-        # Determina o nome do arquivo
-        if request.filename:
-            filename = request.filename
-        else:
-            filename = str(request.url).split('/')[-1]
-            if '.' not in filename:
-                raise HTTPException(status_code=400, detail="Não foi possível determinar a extensão do arquivo")
-        
-        # Salva temporariamente o arquivo
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as temp_file:
-            temp_file.write(response.content)
-            temp_path = temp_file.name
-        
         try:
-            # Converte o arquivo
-            extracted_text = await converter.convert_file(temp_path, filename)
+            if not stream and format == "text":
+                extracted_text, file_size, cache_result, spool = await convert_url_text(
+                    str(request.url), filename, temp_path, deadline=deadline
+                )
+                http_request.state.spool = spool
+                headers = {"X-Cache": cache_result} if url_cache else None
+                with tracing.span("serialize"):
+                    return JSONResponse(content={
+                        "success": True,
+                        "filename": filename,
+                        "url": str(request.url),
+                        "extracted_text": extracted_text,
+                        "file_size": file_size,
+                        **truncation_fields(deadline)
+                    }, headers=headers)
             
-            return JSONResponse(content={
-                "success": True,
-                "filename": filename,
-                "url": str(request.url),
-                "extracted_text": extracted_text,
-                "file_size": len(response.content)
-            })
+            with tracing.span("download"):
+                download = await http_fetcher.fetch(str(request.url), destination=temp_path)
+            metrics.registry.inc(metrics.BYTES_DOWNLOADED, download.size)
+            http_request.state.spool = downloaded_spool(download, temp_path)
+            
+            # Sem extensão no nome, o formato é detectado pelo conteúdo ou,
+            # em último caso, pelo Content-Type da resposta
+            content_type = download.content_type
+            
+            if stream:
+                response = await stream_conversion(temp_path, filename, {
+                    "filename": filename,
+                    "url": str(request.url),
+                    "file_size": download.size
+                }, chunker=chunker, content_type=content_type, deadline=deadline)
+                handed_off = True
+                return response
+            
+            segments = await isolated_converter.convert_segments(
+                temp_path, filename, content_type=content_type, deadline=deadline
+            )
+            with tracing.span("serialize"):
+                return JSONResponse(content={
+                    "success": True,
+                    "filename": filename,
+                    "url": str(request.url),
+                    **segments_content(segments, chunker),
+                    "file_size": download.size,
+                    **truncation_fields(deadline)
+                })
         
         finally:
-            # Remove arquivo temporário
-            if os.path.exists(temp_path):
+            # Remove arquivo temporário (a conversão em fluxo remove o seu ao terminar)
+            if not handed_off and os.path.exists(temp_path):
                 os.unlink(temp_path)
                 
-    except requests.RequestException as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao baixar arquivo: {str(e)}")
+    except FetchError as e:
+        raise HTTPException(status_code=fetch_error_status(e), detail=f"Erro ao baixar arquivo: {str(e)}")
+    except SandboxLimitExceeded as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ConverterServiceError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na conversão: {str(e)}")
 
+@app.post("/convert/urls")
+async def convert_from_urls(request: URLBatchRequest, api_key: ApiKey = Depends(admit_request),
+                            deadline: Deadline = Depends(extraction_deadline)):
+    """
+    Converte em paralelo os arquivos de uma lista de URLs.
+    
+    Os downloads compartilham o pool de conexões (no máximo
+    HTTP_MAX_PER_HOST simultâneos por host) e até BULK_CONVERSION_CONCURRENCY
+    conversões rodam ao mesmo tempo. A resposta traz um resultado por URL, na
+    ordem do pedido; a falha de uma URL não interrompe as demais. O prazo
+    (timeout) vale para o lote todo; cada item informa se foi cortado.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="Informe ao menos uma URL")
+    if len(request.urls) > BULK_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BULK_MAX_URLS} URLs por requisição")
+    
+    conversion_slots = asyncio.Semaphore(BULK_CONVERSION_CONCURRENCY)
+    
+    async def convert_one(item: URLRequest) -> dict:
+        filename = url_filename(item)
+        item_deadline = deadline.copy()
+        result = {"url": str(item.url), "filename": filename}
+        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}") as temp_file:
+            temp_path = temp_file.name
+        try:
+            extracted_text, file_size, cache_result, _ = await convert_url_text(
+                str(item.url), filename, temp_path, conversion_slots, item_deadline
+            )
+            if url_cache:
+                result["cache"] = cache_result
+            return {**result, "success": True, "extracted_text": extracted_text,
+                    "file_size": file_size, **truncation_fields(item_deadline)}
+        except FetchError as e:
+            return {**result, "success": False, "error": f"Erro ao baixar arquivo: {str(e)}"}
+        except Exception as e:
+            return {**result, "success": False, "error": f"Erro na conversão: {str(e)}"}
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    results = await asyncio.gather(*(convert_one(item) for item in request.urls))
+    succeeded = sum(1 for result in results if result["success"])
+    with tracing.span("serialize"):
+        return JSONResponse(content={
+            "success": succeeded == len(results),
+            "total": len(results),
+            "succeeded": succeeded,
+            "results": results
+        })
+
 @app.post("/convert/file")
-async def convert_from_file(file: UploadFile = File(...), api_key: str = Depends(verify_api_key)):
-    """Converte arquivo enviado diretamente"""
+async def convert_from_file(request: Request, file: UploadFile = File(...), stream: bool = False,
+                            format: str = "text", chunking: dict = Depends(chunking_options),
+                            api_key: ApiKey = Depends(admit_request),
+                            deadline: Deadline = Depends(extraction_deadline)):
+    """
+    Converte arquivo enviado diretamente.
+    
+    Com stream=true, responde em NDJSON; com format=segments, retorna o texto
+    limpo dividido em páginas, planilhas ou slides; com format=chunks, em
+    trechos para ingestão (chunk_strategy, chunk_size, chunk_overlap, tokenizer).
+    Com timeout (segundos), o texto volta parcial se o prazo acabar.
+    """
+    validate_response_format(format)
+    chunker = create_chunker(format, chunking, clean=True)
+    # Com trechos, a limpeza é feita pelo divisor em cada trecho
+    clean_segments = chunker is None
     try:
         # Valida se o arquivo foi enviado
         if not file.filename:
             raise HTTPException(status_code=400, detail="Nome do arquivo é obrigatório")
         
-        # Salva temporariamente o arquivo
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{file.filename}") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
+        # Salva temporariamente o arquivo, calculando o hash durante a cópia
+        with tracing.span("upload"):
+            spool = await spool_upload(file, suffix=f"_{file.filename}")
+        request.state.spool = spool
+        temp_path = spool.path
+        
+        if stream:
+            return await stream_conversion(temp_path, file.filename, {
+                "filename": file.filename,
+                "file_size": spool.size,
+                "content_type": file.content_type
+            }, clean=clean_segments, chunker=chunker, content_type=file.content_type,
+                deadline=deadline)
         
         try:
+            if format != "text":
+                segments = await isolated_converter.convert_segments(
+                    temp_path, file.filename, clean=clean_segments,
+                    content_type=file.content_type, deadline=deadline
+                )
+                with tracing.span("serialize"):
+                    return JSONResponse(content={
+                        "success": True,
+                        "filename": file.filename,
+                        **segments_content(segments, chunker),
+                        "file_size": spool.size,
+                        "content_type": file.content_type,
+                        **truncation_fields(deadline)
+                    })
+            
             # Converte e limpa o texto
-            raw_text = await converter.convert_file(temp_path, file.filename)
+            raw_text = await isolated_converter.convert_file(temp_path, file.filename, file.content_type,
+                                                             deadline=deadline)
             cleaned_text = converter.clean_text(raw_text)
             
-            return JSONResponse(content={
-                "success": True,
-                "filename": file.filename,
-                "extracted_text": cleaned_text,
-                "total_characters": len(cleaned_text),
-                "file_size": len(content),
-                "content_type": file.content_type
-            })
+            with tracing.span("serialize"):
+                return JSONResponse(content={
+                    "success": True,
+                    "filename": file.filename,
+                    "extracted_text": cleaned_text,
+                    "total_characters": len(cleaned_text),
+                    "file_size": spool.size,
+                    "content_type": file.content_type,
+                    **truncation_fields(deadline)
+                })
         
         finally:
             # Remove arquivo temporário
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
                 
+    except SandboxLimitExceeded as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ConverterServiceError as e:
+            raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
             raise HTTPException(status_code=500, detail=f"Erro na conversão: {str(e)}")
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Métricas de todos os workers no formato de texto do Prometheus (público)"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desabilitadas")
+    return Response(content=metrics.registry.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
 @app.get("/temp/{file_id}")
 async def download_temp_file(file_id: str):
     """Download de arquivo temporário hospedado"""
@@ -588,7 +1257,8 @@ async def fallback_pandoc_conversion(html_path: str, output_dir: str, format: st
             '--wrap=none'
         ])
     
-    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+    with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='pandoc'), tracing.span('pandoc'):
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
     
     if result.returncode != 0:
         raise Exception(f"Pandoc fallback error: {result.stderr or result.stdout}")
@@ -652,7 +1322,7 @@ def sanitize_html_content(html_content: str) -> str:
 async def generate_file_url(
     generate_request: GenerateFileRequest,
     request: Request,
-    api_key: str = Depends(verify_api_key)
+    api_key: ApiKey = Depends(admit_request)
 ):
     """
     Gera um arquivo no formato especificado a partir de HTML e retorna uma URL temporária.
@@ -714,9 +1384,9 @@ async def generate_file_url(
         print(f"HTML sanitizado com sucesso. Tamanho: {len(html_content)} caracteres")
         
         # Criar arquivo HTML temporário
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as temp_html:
-            temp_html.write(html_content)
-            temp_html_path = temp_html.name
+        spool = spool_bytes(html_content.encode('utf-8'), suffix='.html')
+        request.state.spool = spool
+        temp_html_path = spool.path
         
         # Gerar arquivo no formato especificado
         output_format = generate_request.format.lower()
@@ -729,7 +1399,8 @@ async def generate_file_url(
             generated_file = os.path.join(temp_dir, f"output.{output_format}")
             
             cmd = ['pandoc', temp_html_path, '-o', generated_file]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='pandoc'), tracing.span('pandoc'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
             
             if result.returncode != 0:
                 error_msg = f"Pandoc error: {result.stderr or result.stdout or 'Erro desconhecido'}"
@@ -755,7 +1426,8 @@ async def generate_file_url(
             env['HOME'] = '/tmp'
             env['TMPDIR'] = '/tmp'
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120, env=env)
+            with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='soffice'), tracing.span('soffice'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=120, env=env)
             
             if result.returncode != 0:
                 error_msg = f"LibreOffice error: {result.stderr or result.stdout or 'Erro desconhecido'}"
@@ -833,7 +1505,8 @@ async def generate_file_url(
 @app.post("/generate")
 async def generate_file(
     request: GenerateFileRequest,
-    api_key: str = Depends(verify_api_key)
+    http_request: Request,
+    api_key: ApiKey = Depends(admit_request)
 ):
     """
     Gera um arquivo no formato especificado a partir de HTML.
@@ -899,19 +1572,21 @@ async def generate_file(
     
     try:
         # Decodificar o HTML se estiver em Base64; caso contrário, usar o texto diretamente
-        try:
-            html_content = base64.b64decode(request.file).decode('utf-8')
-        except Exception:
-            html_content = request.file  # Assume que o conteúdo já é HTML bruto
-        
-        # Sanitizar e corrigir problemas de escape e lint automaticamente
-        html_content = sanitize_html_content(html_content)
+        with tracing.span("decode"):
+            try:
+                html_content = base64.b64decode(request.file).decode('utf-8')
+            except Exception:
+                html_content = request.file  # Assume que o conteúdo já é HTML bruto
+            
+            # Sanitizar e corrigir problemas de escape e lint automaticamente
+            html_content = sanitize_html_content(html_content)
         print(f"HTML sanitizado com sucesso. Tamanho: {len(html_content)} caracteres")
         
         # Criar arquivo HTML temporário
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as temp_html:
-            temp_html.write(html_content)
-            temp_html_path = temp_html.name
+        with tracing.span("spool"):
+            spool = spool_bytes(html_content.encode('utf-8'), suffix='.html')
+        http_request.state.spool = spool
+        temp_html_path = spool.path
         
         # Debug: verificar se o arquivo foi criado e seu conteúdo
         print(f"Arquivo HTML criado: {temp_html_path}")
@@ -930,7 +1605,8 @@ async def generate_file(
         
         if output_format == 'docx':
             # Usar conversão aprimorada para DOCX com melhor preservação de estilos
-            generated_file = await convert_html_to_docx_enhanced(temp_html_path, temp_dir)
+            with tracing.span("docx"):
+                generated_file = await convert_html_to_docx_enhanced(temp_html_path, temp_dir)
             
         elif output_format in ['txt', 'pdf', 'odt']:
             # Usar pandoc para outras conversões de HTML
@@ -956,7 +1632,8 @@ async def generate_file(
             # Debug: imprimir comando
             print(f"Pandoc command: {' '.join(cmd)}")
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='pandoc'), tracing.span('pandoc'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
             
             # Debug: imprimir informações sobre o resultado
             print(f"Return code: {result.returncode}")
@@ -990,7 +1667,8 @@ async def generate_file(
             # Debug: imprimir comando
             print(f"LibreOffice command: {' '.join(cmd)}")
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120, env=env)
+            with metrics.registry.timer(metrics.EXTERNAL_TOOL_DURATION, tool='soffice'), tracing.span('soffice'):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=120, env=env)
             
             # Debug: imprimir informações sobre o resultado
             print(f"Return code: {result.returncode}")
@@ -0,0 +1,386 @@
+"""
+Métricas da API no formato de exposição de texto do Prometheus.
+
+Cada processo acumula contadores, histogramas e medidores em memória e grava
+periodicamente um retrato em JSON (``<pid>.json``) em um diretório
+compartilhado. Na coleta (``GET /metrics``), qualquer worker do uvicorn lê os
+retratos de todos os processos e soma os valores, de modo que o resultado
+independe do worker que atendeu a requisição. Medidores de processos que já
+terminaram são ignorados; seus arquivos são removidos na inicialização.
+
+Não depende do ``prometheus_client``: o formato de texto é gerado aqui.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Tipos de métrica
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+GAUGE = 'gauge'
+
+# Limites (em segundos) dos histogramas de duração
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Intervalo mínimo entre gravações do retrato do processo
+FLUSH_INTERVAL_SECONDS = 1.0
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Métricas da API
+REQUESTS_TOTAL = 'textify_requests_total'
+REQUEST_DURATION = 'textify_request_duration_seconds'
+IN_FLIGHT_REQUESTS = 'textify_in_flight_requests'
+BYTES_RECEIVED = 'textify_bytes_received_total'
+BYTES_SENT = 'textify_bytes_sent_total'
+BYTES_DOWNLOADED = 'textify_bytes_downloaded_total'
+BYTES_SPOOLED = 'textify_bytes_spooled_total'
+CONVERSIONS_TOTAL = 'textify_conversions_total'
+CONVERSION_DURATION = 'textify_conversion_duration_seconds'
+CLEAN_DURATION = 'textify_clean_duration_seconds'
+EXTERNAL_TOOL_DURATION = 'textify_external_tool_duration_seconds'
+CACHE_REQUESTS = 'textify_cache_requests_total'
+TEMP_DIR_BYTES = 'textify_temp_dir_bytes'
+TEMP_DIR_FILES = 'textify_temp_dir_files'
+ADMISSION_QUEUE_DEPTH = 'textify_admission_queue_depth'
+ADMISSION_WEIGHT_IN_USE = 'textify_admission_weight_in_use'
+ADMISSION_REJECTED = 'textify_admission_rejected_total'
+ADMISSION_WAIT = 'textify_admission_wait_seconds'
+JOBS_PROCESSED = 'textify_jobs_processed_total'
+JOB_WAIT = 'textify_job_wait_seconds'
+
+# Rótulos de uma série: pares (nome, valor) ordenados
+Labels = Tuple[Tuple[str, str], ...]
+SeriesKey = Tuple[str, Labels]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return '{' + pairs + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def directory_usage(path: str, recursive: bool = True) -> Tuple[int, int]:
+    """Retorna (bytes, arquivos) ocupados por ``path``; 0 se não existir."""
+    total_bytes = 0
+    total_files = 0
+    pending = [path]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_file(follow_symlinks=False):
+                    total_bytes += entry.stat(follow_symlinks=False).st_size
+                    total_files += 1
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+            except OSError:
+                # Arquivo removido durante a varredura
+                continue
+    return total_bytes, total_files
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas de um processo, agregado com os demais na coleta.
+
+    As métricas precisam ser declaradas com ``define`` antes do uso. Os
+    métodos de atualização são seguros entre threads (os conversores rodam
+    em um executor) e gravam o retrato no disco no máximo a cada
+    ``flush_interval`` segundos.
+    """
+
+    def __init__(self, directory: Optional[str] = None, enabled: bool = True,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'textify_metrics')
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+
+        self._definitions: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._counters: Dict[SeriesKey, float] = {}
+        self._gauges: Dict[SeriesKey, float] = {}
+        # Histograma: (contagem por limite, soma, total de observações)
+        self._histograms: Dict[SeriesKey, list] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, object], float]]]] = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._prepared = False
+
+    def define(self, name: str, kind: str, help_text: str,
+               buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Declara uma métrica (``COUNTER``, ``HISTOGRAM`` ou ``GAUGE``)."""
+        self._definitions[name] = (kind, help_text, tuple(sorted(buckets)))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, Dict[str, object], float]]]):
+        """
+        Registra uma função chamada a cada coleta, que retorna medidores
+        ``(nome, rótulos, valor)`` calculados na hora (ex.: uso de disco).
+        Esses valores não são somados entre processos.
+        """
+        self._collectors.append(collector)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrementa um contador."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._maybe_flush()
+
+    def add(self, name: str, value: float, **labels):
+        """Soma ``value`` (que pode ser negativo) a um medidor."""
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, name: str, value: float, **labels):
+        """Registra uma observação em um histograma."""
+        if not self.enabled:
+            return
+        buckets = self._definitions[name][2]
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            position = bisect_left(buckets, value)
+            if position < len(buckets):
+                histogram[0][position] += 1
+            histogram[1] += value
+            histogram[2] += 1
+        self._maybe_flush()
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Mede a duração do bloco e a registra no histograma ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def _prepare(self):
+        # Cria o diretório e remove retratos de processos que não existem mais
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            pid = name[:-len('.json')]
+            if name.endswith('.json') and pid.isdigit() and not _pid_alive(int(pid)):
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self._prepared = True
+
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Grava o retrato deste processo no diretório compartilhado."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._last_flush = time.monotonic()
+            snapshot = self._snapshot()
+        try:
+            if not self._prepared:
+                self._prepare()
+            pid = os.getpid()
+            temp_path = self._snapshot_path(pid) + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(snapshot, file)
+            # A troca atômica evita que a coleta leia um arquivo pela metade
+            os.replace(temp_path, self._snapshot_path(pid))
+        except OSError as e:
+            print(f"Erro ao gravar métricas: {e}")
+
+    def _snapshot(self) -> dict:
+        return {
+            'counters': [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+            'gauges': [[name, list(labels), value] for (name, labels), value in self._gauges.items()],
+            'histograms': [[name, list(labels), list(data[0]), data[1], data[2]]
+                           for (name, labels), data in self._histograms.items()],
+        }
+
+    def drain(self) -> dict:
+        """
+        Retorna o retrato deste processo e zera as métricas, para que outro
+        processo as some com ``merge`` (ex.: processos de conversão isolada).
+        """
+        with self._lock:
+            snapshot = self._snapshot()
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+        return snapshot
+
+    def merge(self, snapshot: dict):
+        """Soma às métricas deste processo um retrato obtido com ``drain``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for name, labels, value in snapshot.get('counters', []):
+                key = (name, tuple(map(tuple, labels)))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for name, labels, value in snapshot.get('gauges', []):
+                key = (name, tuple(map(tuple, labels)))
+                self._gauges[key] = self._gauges.get(key, 0) + value
+            for name, labels, bucket_counts, total, count in snapshot.get('histograms', []):
+                key = (name, tuple(map(tuple, labels)))
+                data = self._histograms.get(key)
+                if data is None:
+                    self._histograms[key] = [list(bucket_counts), total, count]
+                else:
+                    data[0] = [a + b for a, b in zip(data[0], bucket_counts)]
+                    data[1] += total
+                    data[2] += count
+        self._maybe_flush()
+
+    def _snapshots(self) -> Iterator[Tuple[bool, dict]]:
+        """Retratos de todos os processos: (processo ativo, conteúdo)."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            pid = name[:-len('.json')]
+            if not name.endswith('.json') or not pid.isdigit():
+                continue
+            try:
+                with open(os.path.join(self.directory, name), encoding='utf-8') as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            yield _pid_alive(int(pid)), snapshot
+
+    def collect(self) -> Tuple[Dict[SeriesKey, float], Dict[SeriesKey, float], Dict[SeriesKey, list]]:
+        """Soma os retratos de todos os processos: (contadores, medidores, histogramas)."""
+        self.flush()
+        counters: Dict[SeriesKey, float] = {}
+        gauges: Dict[SeriesKey, float] = {}
+        histograms: Dict[SeriesKey, list] = {}
+        for alive, snapshot in self._snapshots():
+            for name, labels, value in snapshot.get('counters', []):
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            if alive:
+                for name, labels, value in snapshot.get('gauges', []):
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+            for name, labels, bucket_counts, total, count in snapshot.get('histograms', []):
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.get(key)
+                if merged is None or len(merged[0]) != len(bucket_counts):
+                    histograms[key] = [list(bucket_counts), total, count]
+                else:
+                    merged[0] = [a + b for a, b in zip(merged[0], bucket_counts)]
+                    merged[1] += total
+                    merged[2] += count
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                gauges[(name, _labels(labels))] = value
+        return counters, gauges, histograms
+
+    def render(self) -> str:
+        """Gera o texto de exposição do Prometheus com as métricas agregadas."""
+        counters, gauges, histograms = self.collect()
+        series = {COUNTER: counters, GAUGE: gauges}
+        lines = []
+        for name in sorted(self._definitions):
+            kind, help_text, buckets = self._definitions[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == HISTOGRAM:
+                for (metric, labels), (bucket_counts, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets, bucket_counts):
+                        cumulative += bucket_count
+                        le = labels + (('le', _format_value(bound)),)
+                        lines.append(f'{name}_bucket{_format_labels(le)} {cumulative}')
+                    le = labels + (('le', '+Inf'),)
+                    lines.append(f'{name}_bucket{_format_labels(le)} {count}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {count}')
+            else:
+                for (metric, labels), value in sorted(series[kind].items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _default_registry() -> MetricsRegistry:
+    metrics_registry = MetricsRegistry(
+        directory=os.getenv('METRICS_DIR'),
+        enabled=os.getenv('METRICS_ENABLED', 'true').lower() != 'false',
+    )
+    metrics_registry.define(REQUESTS_TOTAL, COUNTER, 'Requisições HTTP atendidas, por endpoint, método e status.')
+    metrics_registry.define(REQUEST_DURATION, HISTOGRAM, 'Duração das requisições HTTP até o último byte, por endpoint.')
+    metrics_registry.define(IN_FLIGHT_REQUESTS, GAUGE, 'Requisições em andamento (somadas entre os workers).')
+    metrics_registry.define(BYTES_RECEIVED, COUNTER, 'Bytes recebidos no corpo das requisições, por endpoint.')
+    metrics_registry.define(BYTES_SENT, COUNTER, 'Bytes enviados no corpo das respostas, por endpoint.')
+    metrics_registry.define(BYTES_DOWNLOADED, COUNTER, 'Bytes baixados de URLs para conversão.')
+    metrics_registry.define(BYTES_SPOOLED, COUNTER,
+                            'Bytes gravados em arquivos temporários (uploads, downloads e HTML), por endpoint.')
+    metrics_registry.define(CONVERSIONS_TOTAL, COUNTER, 'Conversões por formato e resultado (success, error, cancelled ou truncated).')
+    metrics_registry.define(CONVERSION_DURATION, HISTOGRAM, 'Tempo gasto nos conversores, por formato.')
+    metrics_registry.define(CLEAN_DURATION, HISTOGRAM, 'Tempo gasto na limpeza do texto extraído.')
+    metrics_registry.define(EXTERNAL_TOOL_DURATION, HISTOGRAM, 'Duração das ferramentas externas (pandoc, soffice, antiword, catdoc).')
+    metrics_registry.define(CACHE_REQUESTS, COUNTER, 'Consultas ao cache de URLs, por resultado (hit, revalidated, unchanged ou miss).')
+    metrics_registry.define(TEMP_DIR_BYTES, GAUGE, 'Bytes ocupados nos diretórios temporários.')
+    metrics_registry.define(TEMP_DIR_FILES, GAUGE, 'Arquivos nos diretórios temporários.')
+    metrics_registry.define(ADMISSION_QUEUE_DEPTH, GAUGE, 'Requisições esperando admissão.')
+    metrics_registry.define(ADMISSION_WEIGHT_IN_USE, GAUGE, 'Peso das conversões admitidas em andamento.')
+    metrics_registry.define(ADMISSION_REJECTED, COUNTER, 'Requisições recusadas com 429, por chave e motivo (busy, queue_full ou timeout).')
+    metrics_registry.define(ADMISSION_WAIT, HISTOGRAM, 'Tempo de espera na fila de admissão.')
+    metrics_registry.define(JOBS_PROCESSED, COUNTER, 'Trabalhos da fila distribuída processados, por resultado (ok, error ou expired).')
+    metrics_registry.define(JOB_WAIT, HISTOGRAM, 'Tempo entre enfileirar uma conversão e receber o resultado.')
+    atexit.register(metrics_registry.flush)
+    return metrics_registry
+
+
+# Registro usado pela API e pelos conversores
+registry = _default_registry()
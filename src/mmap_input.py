@@ -0,0 +1,189 @@
+"""
+Acesso aos arquivos de entrada por mapeamento em memória (mmap).
+
+Arquivos a partir de ``MMAP_THRESHOLD`` bytes são mapeados uma única vez e
+todos os leitores trabalham sobre o mesmo mapeamento: a detecção do formato
+lê o prefixo e o diretório do ZIP/OLE2 direto das páginas mapeadas, o hash é
+calculado sobre o mapeamento sem cópias, o texto é decodificado a partir
+dele (de uma vez em ``read_text`` ou incrementalmente em ``open_text``) e os
+formatos baseados em ZIP abrem o pacote sobre o mesmo buffer.
+
+``open_input`` compartilha o mapeamento entre chamadas aninhadas para o
+mesmo caminho, inclusive de outras threads: o ``FileConverter`` abre a
+entrada uma vez por conversão e a detecção e os conversores a reaproveitam.
+Arquivos pequenos, ou que não puderem ser mapeados (ex.: sob o RLIMIT_AS do
+sandbox), são lidos do disco normalmente, pela mesma interface.
+"""
+
+import hashlib
+import io
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, Optional, TextIO, Tuple
+
+# Abaixo deste tamanho, leituras comuns custam menos que montar o mapeamento
+MMAP_THRESHOLD = 1024 * 1024
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Entradas abertas por caminho, com o número de usuários de cada uma
+_open_inputs: Dict[str, Tuple['InputFile', int]] = {}
+_open_inputs_lock = threading.Lock()
+
+
+class _MappedReader(io.RawIOBase):
+    """Arquivo binário somente leitura sobre um mapeamento, com posição própria."""
+
+    def __init__(self, mapping: mmap.mmap):
+        super().__init__()
+        self._mapping = mapping
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._mapping)
+        if offset < 0:
+            raise ValueError("posição negativa")
+        self._position = offset
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._mapping) if size is None or size < 0 else self._position + size
+        data = self._mapping[self._position:end]
+        self._position += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        start = self._position
+        size = max(0, min(len(buffer), len(self._mapping) - start))
+        with memoryview(self._mapping) as view, memoryview(buffer) as target:
+            target.cast('B')[:size] = view[start:start + size]
+        self._position += size
+        return size
+
+
+class InputFile:
+    """
+    Arquivo de entrada, mapeado em memória quando grande.
+
+    Use ``open_input`` em vez de instanciar diretamente, para compartilhar o
+    mapeamento com os demais leitores do mesmo arquivo.
+    """
+
+    def __init__(self, file_path: str, threshold: Optional[int] = None):
+        self.file_path = file_path
+        self.size = os.path.getsize(file_path)
+        self._file: Optional[BinaryIO] = None
+        self._mapping: Optional[mmap.mmap] = None
+        if self.size and self.size >= (MMAP_THRESHOLD if threshold is None else threshold):
+            self._file = open(file_path, 'rb')
+            try:
+                self._mapping = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Sem espaço de endereçamento (RLIMIT_AS) ou sistema de
+                # arquivos sem suporte: segue com leituras comuns
+                self._file.close()
+                self._file = None
+            else:
+                if hasattr(self._mapping, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    self._mapping.madvise(mmap.MADV_SEQUENTIAL)
+
+    @property
+    def mapped(self) -> bool:
+        return self._mapping is not None
+
+    def reader(self) -> BinaryIO:
+        """Novo arquivo binário posicionado no início (feche após o uso)."""
+        if self._mapping is not None:
+            return _MappedReader(self._mapping)
+        return open(self.file_path, 'rb')
+
+    def head(self, size: int) -> bytes:
+        """Primeiros ``size`` bytes do arquivo."""
+        if self._mapping is not None:
+            return self._mapping[:size]
+        with open(self.file_path, 'rb') as file:
+            return file.read(size)
+
+    def sha256(self) -> str:
+        """SHA-256 do conteúdo (sobre o mapeamento, sem copiá-lo)."""
+        if self._mapping is not None:
+            return hashlib.sha256(self._mapping).hexdigest()
+        digest = hashlib.sha256()
+        with open(self.file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def read_text(self, encoding: str = 'utf-8', errors: str = 'strict') -> str:
+        """
+        Texto completo, com quebras de linha normalizadas para ``\\n``.
+
+        Mapeado, o texto é decodificado direto das páginas do arquivo, sem a
+        cópia intermediária em ``bytes`` de ``file.read()``.
+        """
+        if self._mapping is None:
+            with open(self.file_path, 'r', encoding=encoding, errors=errors) as file:
+                return file.read()
+        text = str(self._mapping, encoding, errors)
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    def open_text(self, encoding: str = 'utf-8', errors: str = 'strict') -> TextIO:
+        """Arquivo de texto decodificado incrementalmente, em blocos (feche após o uso)."""
+        if self._mapping is None:
+            return open(self.file_path, 'r', encoding=encoding, errors=errors)
+        return io.TextIOWrapper(io.BufferedReader(self.reader()), encoding=encoding, errors=errors)
+
+    def close(self):
+        if self._mapping is not None:
+            try:
+                self._mapping.close()
+            except BufferError:
+                # Algum leitor ainda exporta o buffer; o coletor libera depois
+                pass
+            self._mapping = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@contextmanager
+def open_input(file_path: str) -> Iterator[InputFile]:
+    """
+    Abre a entrada ``file_path``, reaproveitando a que já estiver aberta.
+
+    O mapeamento é desfeito quando o último usuário sai do bloco ``with``.
+    """
+    key = os.path.abspath(file_path)
+    with _open_inputs_lock:
+        entry = _open_inputs.get(key)
+        if entry is None:
+            source, users = InputFile(file_path), 0
+        else:
+            source, users = entry
+        _open_inputs[key] = (source, users + 1)
+    try:
+        yield source
+    finally:
+        with _open_inputs_lock:
+            source, users = _open_inputs[key]
+            if users == 1:
+                del _open_inputs[key]
+                source.close()
+            else:
+                _open_inputs[key] = (source, users - 1)
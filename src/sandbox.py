@@ -0,0 +1,312 @@
+"""
+Conversões isoladas em processos com orçamento de memória e de CPU.
+
+Um arquivo hostil ou muito grande pode fazer o openpyxl, o pandas, o
+BeautifulSoup ou o pdfplumber passarem do limite de memória do contêiner, e
+o kernel então mata o worker inteiro junto com todas as requisições em
+andamento nele. Com o ``SandboxPool``, cada conversão roda em um processo
+filho com:
+
+- ``RLIMIT_AS``: teto de memória virtual; alocações acima dele falham com
+  ``MemoryError`` dentro do filho;
+- vigia de RSS: o processo pai mede a memória residente do filho durante a
+  conversão e o encerra ao passar do orçamento;
+- ``RLIMIT_CPU``: tempo de CPU por conversão; ao estourar, o kernel envia
+  ``SIGXCPU`` e o filho termina.
+
+Quem estoura o orçamento recebe ``SandboxLimitExceeded`` (413 para memória,
+422 para CPU ou término inesperado) e o serviço continua de pé. Os filhos
+são reciclados após ``max_jobs_per_worker`` conversões, contendo vazamentos
+de memória das bibliotecas.
+
+Os filhos nascem de um forkserver que já importou o ``file_converter``, então
+criar um filho novo custa um fork, não a importação das bibliotecas. As
+métricas e as fases medidas no filho são devolvidas ao processo pai junto
+com o resultado, assim como o corte do texto pelo prazo da conversão.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import metrics
+import tracing
+from deadlines import Deadline, apply_truncation, remaining_seconds, run_with_deadline
+
+# Motivos de falha
+MEMORY = 'memory'
+CPU_TIME = 'cpu_time'
+CRASHED = 'crashed'
+
+# Intervalo entre as medições de RSS do filho, em segundos
+WATCHDOG_INTERVAL = 0.05
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class SandboxLimitExceeded(Exception):
+    """Conversão interrompida por exceder o orçamento de memória ou de CPU."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+    @property
+    def status_code(self) -> int:
+        return 413 if self.reason == MEMORY else 422
+
+
+def _worker_main(conn, converter_options: dict, address_space_bytes: Optional[int]):
+    """Laço do processo filho: recebe (função, argumentos, segundos de CPU) e responde."""
+    from file_converter import FileConverter
+
+    # As métricas do filho voltam ao pai a cada conversão, nunca vão para o disco
+    metrics.registry.flush_interval = math.inf
+    if address_space_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (address_space_bytes, address_space_bytes))
+    converter = FileConverter(**converter_options)
+    loop = asyncio.new_event_loop()
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        function, args, cpu_seconds = job
+
+        if cpu_seconds:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+        exhausted = False
+        trace, token = tracing.start_trace()
+        try:
+            result = function(converter, *args)
+            if asyncio.iscoroutine(result):
+                result = loop.run_until_complete(result)
+            reply = ('ok', result)
+        except MemoryError:
+            reply = ('limit', MEMORY)
+            exhausted = True
+        except Exception as e:
+            reply = ('error', e)
+        finally:
+            tracing.end_trace(token)
+
+        spans = {name: tuple(span) for name, span in trace.spans.items()}
+        try:
+            conn.send((reply, metrics.registry.drain(), spans))
+        except Exception as e:
+            # Exceção que não pode ser serializada
+            conn.send((('error', RuntimeError(str(e) if reply[0] == 'ok' else str(reply[1]))), {}, spans))
+        if exhausted:
+            # O heap pode ter ficado fragmentado; o pai cria outro filho
+            break
+
+
+async def _convert_file(converter, file_path, filename, content_type, timeout=None):
+    return await run_with_deadline(timeout, lambda deadline: converter.convert_file(
+        file_path, filename, content_type, deadline=deadline))
+
+
+async def _convert_segments(converter, file_path, filename, clean, content_type, timeout=None):
+    return await run_with_deadline(timeout, lambda deadline: converter.convert_segments(
+        file_path, filename, clean=clean, content_type=content_type, deadline=deadline))
+
+
+class _Worker:
+    """Processo filho e a ponta do pai no canal de comunicação."""
+
+    def __init__(self, context, converter_options: dict, address_space_bytes: Optional[int]):
+        parent_conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, converter_options, address_space_bytes),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+        self.jobs = 0
+
+    def rss_bytes(self) -> int:
+        """Memória residente do filho (0 onde /proc não existe)."""
+        try:
+            with open(f'/proc/{self.process.pid}/statm') as file:
+                return int(file.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            return 0
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SandboxPool:
+    """
+    Executa conversões do ``FileConverter`` em processos isolados.
+
+    Oferece ``convert_file`` e ``convert_segments`` com a mesma assinatura do
+    conversor. ``workers`` é o número de conversões simultâneas (cada thread
+    do executor tem o seu filho); ``memory_limit_mb`` é o orçamento de RSS
+    por conversão, ``address_space_mb`` o ``RLIMIT_AS`` do filho e
+    ``cpu_seconds`` o tempo de CPU por conversão (0 desliga cada limite).
+    """
+
+    def __init__(self, converter_options: Optional[dict] = None, workers: int = 2,
+                 memory_limit_mb: int = 256, address_space_mb: int = 1024,
+                 cpu_seconds: float = 60, max_jobs_per_worker: int = 50,
+                 start_method: Optional[str] = None):
+        self.converter_options = converter_options or {}
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self.address_space = address_space_mb * 1024 * 1024 if address_space_mb else None
+        self.cpu_seconds = cpu_seconds
+        self.max_jobs_per_worker = max_jobs_per_worker
+
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self._context = multiprocessing.get_context(start_method)
+        if start_method == 'forkserver':
+            self._context.set_forkserver_preload(['file_converter'])
+
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sandbox')
+        self._local = threading.local()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+
+    def _acquire_worker(self) -> _Worker:
+        worker = getattr(self._local, 'worker', None)
+        if worker is not None and (not worker.process.is_alive()
+                                   or worker.jobs >= self.max_jobs_per_worker):
+            self._discard(worker, graceful=True)
+            worker = None
+        if worker is None:
+            worker = _Worker(self._context, self.converter_options, self.address_space)
+            with self._lock:
+                self._workers.append(worker)
+            self._local.worker = worker
+        return worker
+
+    def _discard(self, worker: _Worker, graceful: bool = False):
+        if graceful:
+            worker.stop()
+        else:
+            worker.kill()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        if getattr(self._local, 'worker', None) is worker:
+            self._local.worker = None
+
+    def _run(self, function: Callable, args: tuple):
+        """Executa um job no filho desta thread, vigiando a memória (bloqueante)."""
+        worker = self._acquire_worker()
+        worker.conn.send((function, args, self.cpu_seconds))
+        worker.jobs += 1
+
+        while not worker.conn.poll(WATCHDOG_INTERVAL):
+            if self.memory_limit and worker.rss_bytes() > self.memory_limit:
+                self._discard(worker)
+                raise SandboxLimitExceeded(
+                    MEMORY,
+                    f"A conversão excedeu o limite de memória de "
+                    f"{self.memory_limit // (1024 * 1024)} MB"
+                )
+
+        try:
+            reply, snapshot, spans = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=1)
+            exitcode = worker.process.exitcode
+            self._discard(worker)
+            if exitcode == -signal.SIGXCPU:
+                raise SandboxLimitExceeded(
+                    CPU_TIME, f"A conversão excedeu o limite de {self.cpu_seconds:g} s de CPU"
+                )
+            raise SandboxLimitExceeded(
+                CRASHED, f"O processo de conversão terminou inesperadamente (código {exitcode})"
+            )
+
+        metrics.registry.merge(snapshot)
+        status, value = reply
+        if status == 'limit':
+            self._discard(worker, graceful=True)
+            raise SandboxLimitExceeded(
+                MEMORY,
+                f"A conversão excedeu o limite de memória virtual de "
+                f"{self.address_space // (1024 * 1024)} MB"
+            )
+        return status, value, spans
+
+    async def run(self, function: Callable, *args):
+        """
+        Executa ``function(converter, *args)`` em um filho e retorna o resultado.
+
+        ``function`` precisa ser serializável (definida no nível do módulo) e
+        pode ser uma corrotina. Exceções da função são relançadas aqui.
+        """
+        loop = asyncio.get_running_loop()
+        status, value, spans = await loop.run_in_executor(self._executor, self._run, function, args)
+        # As fases medidas no filho entram no rastro da requisição
+        for name, (duration, count) in spans.items():
+            tracing.record(name, duration, count)
+        if status == 'error':
+            raise value
+        return value
+
+    async def convert_file(self, file_path: str, filename: str,
+                           content_type: Optional[str] = None,
+                           deadline: Optional[Deadline] = None) -> str:
+        text, reason = await self.run(_convert_file, file_path, filename, content_type,
+                                      remaining_seconds(deadline))
+        apply_truncation(deadline, reason)
+        return text
+
+    async def convert_segments(self, file_path: str, filename: str, clean: bool = False,
+                               content_type: Optional[str] = None,
+                               deadline: Optional[Deadline] = None):
+        segments, reason = await self.run(_convert_segments, file_path, filename, clean,
+                                          content_type, remaining_seconds(deadline))
+        apply_truncation(deadline, reason)
+        return segments
+
+    def warm_up(self):
+        """Cria de antemão um filho para cada thread, antes da primeira conversão."""
+        barrier = threading.Barrier(self.workers)
+
+        def start():
+            self._acquire_worker()
+            # Segura a thread até todas terem o seu filho, para não repetir thread
+            barrier.wait()
+
+        for future in [self._executor.submit(start) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self):
+        """Encerra o executor e todos os filhos."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
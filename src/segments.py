@@ -0,0 +1,61 @@
+"""
+Segmentos de texto extraídos de um documento.
+
+Um segmento corresponde a uma unidade natural do formato de origem (página de
+PDF, planilha, slide) ou, para formatos sem essa divisão, a um bloco de
+linhas ou ao documento inteiro. Os deslocamentos ``start``/``end`` apontam
+para o texto completo obtido unindo os segmentos com ``\\n``, de modo que um
+trecho pode ser localizado sem reprocessar o documento.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+# Tipos de segmento
+SEGMENT_PAGE = 'page'
+SEGMENT_SHEET = 'sheet'
+SEGMENT_SLIDE = 'slide'
+SEGMENT_BLOCK = 'block'
+SEGMENT_DOCUMENT = 'document'
+
+# Separador usado para reconstituir o texto completo a partir dos segmentos
+SEGMENT_SEPARATOR = '\n'
+
+
+@dataclass
+class Segment:
+    """Trecho de texto de um documento, com sua posição no texto completo."""
+    kind: str
+    index: int
+    text: str
+    name: Optional[str] = None
+    start: int = 0
+    end: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class SegmentBuilder:
+    """Numera segmentos e calcula seus deslocamentos à medida que são criados."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.index = 0
+        self.offset = 0
+
+    def add(self, text: str, name: Optional[str] = None) -> Segment:
+        if self.index:
+            self.offset += len(SEGMENT_SEPARATOR)
+        segment = Segment(
+            kind=self.kind,
+            index=self.index,
+            text=text,
+            name=name,
+            start=self.offset,
+            end=self.offset + len(text),
+        )
+        self.index += 1
+        self.offset = segment.end
+        return segment
+
@@ -0,0 +1,93 @@
+"""
+Gravação das entradas em arquivos temporários com hash na mesma passada.
+
+Uploads, downloads e o HTML do /generate passam por aqui a caminho do
+disco: cada bloco é gravado e entra no SHA-256 (e, com ``SPOOL_FAST_HASH``
+e o pacote ``xxhash`` instalado, também no xxh3-64) enquanto ainda está em
+memória. O resultado (``SpoolResult``) fica em ``request.state.spool`` para
+cache, deduplicação, logs e métricas, sem uma segunda leitura do arquivo.
+"""
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Tamanho dos blocos copiados do upload para o arquivo temporário
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Calcula também o xxh3-64 (bem mais rápido que o SHA-256, mas não criptográfico)
+FAST_HASH_ENABLED = os.getenv("SPOOL_FAST_HASH", "false").lower() == "true"
+
+
+@dataclass
+class SpoolResult:
+    """Arquivo gravado, com tamanho e hashes do conteúdo."""
+    path: str
+    size: int
+    sha256: str
+    xxhash: Optional[str] = None
+
+
+class SpoolHasher:
+    """Hashes incrementais de um conteúdo recebido em blocos."""
+
+    def __init__(self, fast_hash: Optional[bool] = None):
+        if fast_hash is None:
+            fast_hash = FAST_HASH_ENABLED
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._xxhash = xxhash.xxh3_64() if fast_hash and xxhash is not None else None
+
+    def update(self, chunk: bytes):
+        self.size += len(chunk)
+        self._sha256.update(chunk)
+        if self._xxhash is not None:
+            self._xxhash.update(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def xxhash(self) -> Optional[str]:
+        return self._xxhash.hexdigest() if self._xxhash is not None else None
+
+    def result(self, path: str) -> SpoolResult:
+        return SpoolResult(path=path, size=self.size, sha256=self.sha256, xxhash=self.xxhash)
+
+
+async def spool_upload(upload, suffix: str = '') -> SpoolResult:
+    """
+    Copia um ``UploadFile`` para um arquivo temporário, em blocos, calculando
+    os hashes durante a cópia. O arquivo fica no disco (``delete=False``).
+    """
+    hasher = SpoolHasher()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        try:
+            while True:
+                chunk = await upload.read(SPOOL_CHUNK_SIZE)
+                if not chunk:
+                    break
+                temp_file.write(chunk)
+                hasher.update(chunk)
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+    return hasher.result(temp_file.name)
+
+
+def spool_bytes(data: bytes, suffix: str = '') -> SpoolResult:
+    """Grava ``data`` em um arquivo temporário e retorna o resultado com os hashes."""
+    hasher = SpoolHasher()
+    hasher.update(data)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        temp_file.write(data)
+    return hasher.result(temp_file.name)
@@ -0,0 +1,326 @@
+"""
+Achatamento em fluxo de documentos estruturados (JSON e YAML).
+
+Em vez de carregar o documento inteiro e serializá-lo de volta com
+``json.dumps(indent=2)``, os documentos são percorridos de forma incremental
+e cada folha vira uma linha compacta ``caminho: valor`` (modo ``paths``) ou
+apenas o texto das folhas (modo ``text``). A memória usada é limitada ao
+maior token e à profundidade do documento, não ao tamanho do arquivo.
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Iterator, List, TextIO, Union
+
+import yaml
+
+# Carregadores acelerados pela libyaml em C, quando disponíveis
+YAML_SAFE_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Modos de saída suportados
+MODE_PATHS = 'paths'    # "a.b[0]: valor", uma folha por linha
+MODE_TEXT = 'text'      # apenas folhas de texto, uma por linha
+MODE_PRETTY = 'pretty'  # comportamento anterior: carrega e usa json.dumps(indent=2)
+STRUCTURED_MODES = (MODE_PATHS, MODE_TEXT, MODE_PRETTY)
+
+# Tamanho (em caracteres) dos blocos lidos do arquivo
+READ_CHUNK_SIZE = 64 * 1024
+
+# Maior token JSON (string ou literal) aceito; limita a memória de uma
+# string sem fim em um arquivo malformado
+MAX_TOKEN_CHARS = 64 * 1024 * 1024
+
+_WHITESPACE = ' \t\n\r'
+_PUNCTUATION = '{}[]:,'
+_LITERAL_RE = re.compile(r'[^\s{}\[\]:,"]+')
+# Corpo de uma string até a aspa final; para antes de uma barra solta no fim do bloco
+_STRING_BODY_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_NUMBER_RE = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_SIMPLE_KEY_RE = re.compile(r'^[^\s.\[\]]+$')
+
+PathPart = Union[str, int]
+
+# Resolve o tipo implícito de escalares YAML (para o modo text)
+_resolver = yaml.resolver.Resolver()
+_YAML_STR_TAG = 'tag:yaml.org,2002:str'
+
+
+def format_path(path: List[PathPart]) -> str:
+    """Formata um caminho como ``a.b[0].c``; chaves com espaço ou ponto ficam entre aspas."""
+    parts = []
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f'[{part}]')
+        else:
+            key = part if _SIMPLE_KEY_RE.match(part) else json.dumps(part, ensure_ascii=False)
+            parts.append(f'.{key}' if parts else key)
+    return ''.join(parts)
+
+
+def _format_leaf(path: List[PathPart], value: str) -> str:
+    return f'{format_path(path)}: {value}' if path else value
+
+
+class _JsonTokenizer:
+    """
+    Tokenizador JSON incremental sobre um arquivo de texto lido em blocos.
+
+    Strings e literais maiores que um bloco são acumulados em partes, e a
+    busca continua de onde parou, para que o custo seja linear no tamanho do
+    token. Tokens com mais de ``max_token_chars`` caracteres levantam
+    ``ValueError``.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = READ_CHUNK_SIZE,
+                 max_token_chars: int = MAX_TOKEN_CHARS):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_token_chars = max_token_chars
+        self.buffer = ''
+        self.pos = 0
+
+    def _fill(self) -> bool:
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def tokens(self):
+        """Produz ``(tipo, valor)``: pontuação, ``('string', texto)`` ou ``('literal', bruto)``."""
+        while True:
+            while True:
+                while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                    self.pos += 1
+                if self.pos < len(self.buffer) or not self._fill():
+                    break
+            if self.pos >= len(self.buffer):
+                return
+
+            char = self.buffer[self.pos]
+            if char in _PUNCTUATION:
+                self.pos += 1
+                yield char, None
+            elif char == '"':
+                self.pos += 1
+                yield 'string', self._read_string()
+            else:
+                token = self._read_literal()
+                if not token:
+                    raise ValueError(f"JSON inválido: caractere inesperado {char!r}")
+                if token not in ('true', 'false', 'null') and not _NUMBER_RE.fullmatch(token):
+                    raise ValueError(f"JSON inválido: valor {token!r}")
+                yield 'literal', token
+
+    def _take(self, pieces: List[str], size: int, end: int) -> int:
+        """Guarda ``buffer[pos:end]`` em ``pieces`` e devolve o novo total, respeitando o limite."""
+        size += end - self.pos
+        if size > self.max_token_chars:
+            raise ValueError(f"JSON inválido: token com mais de {self.max_token_chars} caracteres")
+        pieces.append(self.buffer[self.pos:end])
+        self.pos = end
+        return size
+
+    def _read_string(self) -> str:
+        # O corpo bruto é acumulado até a aspa final e decodificado de uma vez,
+        # então escapes cortados entre blocos não precisam de tratamento à parte
+        pieces: List[str] = []
+        size = 0
+        while True:
+            end = _STRING_BODY_RE.match(self.buffer, self.pos).end()
+            size = self._take(pieces, size, end)
+            if end < len(self.buffer) and self.buffer[end] == '"':
+                self.pos = end + 1
+                break
+            if not self._fill():
+                raise ValueError("JSON inválido: string não terminada")
+        try:
+            value, _ = scanstring(''.join(pieces) + '"', 0, True)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"JSON inválido: {error.msg}")
+        return value
+
+    def _read_literal(self) -> str:
+        pieces: List[str] = []
+        size = 0
+        while True:
+            end = _LITERAL_RE.match(self.buffer, self.pos)
+            end = end.end() if end else self.pos
+            size = self._take(pieces, size, end)
+            if end < len(self.buffer) or not self._fill():
+                return ''.join(pieces)
+
+
+def iter_json_lines(file: TextIO, mode: str = MODE_PATHS,
+                    chunk_size: int = READ_CHUNK_SIZE,
+                    max_token_chars: int = MAX_TOKEN_CHARS) -> Iterator[str]:
+    """
+    Achata um documento JSON em linhas, lendo o arquivo em blocos.
+
+    Números são mantidos como aparecem no arquivo (sem perda de precisão) e
+    contêineres vazios aparecem como ``{}``/``[]``. Vários valores de nível
+    superior (ex.: exportações NDJSON) são achatados um após o outro.
+    """
+    # Cada quadro: [tipo ('{' ou '['), próximo índice, vazio?, esperando chave?, esperando ':'?]
+    stack: List[list] = []
+    path: List[PathPart] = []
+    after_value = False
+
+    def begin_value(frame):
+        if frame is not None:
+            if frame[4] or after_value:
+                raise ValueError("JSON inválido: ':' ou ',' esperado")
+            if frame[0] == '[':
+                path.append(frame[1])
+                frame[1] += 1
+            frame[2] = False
+
+    def end_value():
+        if stack:
+            path.pop()
+
+    for kind, value in _JsonTokenizer(file, chunk_size, max_token_chars).tokens():
+        frame = stack[-1] if stack else None
+
+        if frame is not None and frame[3] and not (kind == '}' and frame[2]):
+            if kind != 'string':
+                raise ValueError("JSON inválido: chave esperada")
+            path.append(value)
+            frame[2] = False
+            frame[3] = False
+            frame[4] = True
+            continue
+
+        if kind in ('string', 'literal'):
+            begin_value(frame)
+            if mode == MODE_PATHS:
+                yield _format_leaf(path, value)
+            elif kind == 'string' and value.strip():
+                yield value
+            end_value()
+            after_value = True
+        elif kind in ('{', '['):
+            begin_value(frame)
+            stack.append([kind, 0, True, kind == '{', False])
+            after_value = False
+        elif kind in ('}', ']'):
+            if frame is None or (kind == '}') != (frame[0] == '{') or frame[4]:
+                raise ValueError(f"JSON inválido: '{kind}' inesperado")
+            if not frame[2] and not after_value:
+                raise ValueError("JSON inválido: ',' sobrando")
+            stack.pop()
+            if frame[2] and mode == MODE_PATHS:
+                yield _format_leaf(path, '{}' if kind == '}' else '[]')
+            end_value()
+            after_value = True
+        elif kind == ',':
+            if frame is None or not after_value:
+                raise ValueError("JSON inválido: ',' inesperada")
+            if frame[0] == '{':
+                frame[3] = True
+            after_value = False
+        elif kind == ':':
+            if frame is None or not frame[4]:
+                raise ValueError("JSON inválido: ':' inesperado")
+            frame[4] = False
+
+    if stack:
+        raise ValueError("JSON inválido: documento incompleto")
+
+
+def iter_yaml_lines(file: TextIO, mode: str = MODE_PATHS) -> Iterator[str]:
+    """
+    Achata um documento YAML em linhas a partir dos eventos do parser.
+
+    Usa ``yaml.parse`` (com a libyaml em C quando disponível), que produz os
+    eventos incrementalmente, sem construir os objetos Python do documento.
+    Aliases aparecem como ``*âncora``; documentos múltiplos são separados
+    por ``---``.
+    """
+    # Cada quadro: [tipo ('map'/'seq'), próximo índice, vazio?, esperando chave?]
+    stack: List[list] = []
+    path: List[PathPart] = []
+    # Profundidade dentro de uma chave complexa (mapa/lista usado como chave)
+    complex_key_depth = 0
+    documents = 0
+
+    def begin_value():
+        frame = stack[-1] if stack else None
+        if frame is not None:
+            if frame[0] == 'seq':
+                path.append(frame[1])
+                frame[1] += 1
+            frame[2] = False
+
+    def end_value():
+        if stack:
+            path.pop()
+            frame = stack[-1]
+            if frame[0] == 'map':
+                frame[3] = True
+
+    for event in yaml.parse(file, Loader=YAML_SAFE_LOADER):
+        if isinstance(event, yaml.DocumentStartEvent):
+            if documents:
+                yield '---'
+            documents += 1
+            continue
+        if not isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent,
+                                  yaml.CollectionStartEvent, yaml.CollectionEndEvent)):
+            continue
+
+        if complex_key_depth:
+            if isinstance(event, yaml.CollectionStartEvent):
+                complex_key_depth += 1
+            elif isinstance(event, yaml.CollectionEndEvent):
+                complex_key_depth -= 1
+                if not complex_key_depth:
+                    path.append('?')
+                    stack[-1][3] = False
+            continue
+
+        frame = stack[-1] if stack else None
+        if frame is not None and frame[0] == 'map' and frame[3] and not isinstance(
+            event, yaml.CollectionEndEvent
+        ):
+            frame[2] = False
+            if isinstance(event, yaml.ScalarEvent):
+                path.append(event.value)
+                frame[3] = False
+            elif isinstance(event, yaml.AliasEvent):
+                path.append(f'*{event.anchor}')
+                frame[3] = False
+            else:
+                complex_key_depth = 1
+            continue
+
+        if isinstance(event, (yaml.ScalarEvent, yaml.AliasEvent)):
+            begin_value()
+            if isinstance(event, yaml.AliasEvent):
+                value, is_text = f'*{event.anchor}', False
+            else:
+                value = event.value
+                is_text = mode == MODE_TEXT and _resolver.resolve(
+                    yaml.ScalarNode, value, event.implicit
+                ) == _YAML_STR_TAG
+            if mode == MODE_PATHS:
+                yield _format_leaf(path, value)
+            elif is_text and value.strip():
+                yield value
+            end_value()
+        elif isinstance(event, yaml.CollectionStartEvent):
+            begin_value()
+            is_map = isinstance(event, yaml.MappingStartEvent)
+            stack.append(['map' if is_map else 'seq', 0, True, is_map])
+        else:
+            finished = stack.pop()
+            if finished[2] and mode == MODE_PATHS:
+                yield _format_leaf(path, '{}' if finished[0] == 'map' else '[]')
+            end_value()
+
+
+def load_yaml(file: TextIO):
+    """Carrega YAML com o carregador seguro mais rápido disponível."""
+    return yaml.load(file, Loader=YAML_SAFE_LOADER)
@@ -0,0 +1,402 @@
+"""
+Leitura em fluxo de formatos tabulares.
+
+As linhas são produzidas uma a uma, já unidas por tabulação, sem carregar o
+arquivo inteiro em memória. Para CSV, a codificação e o dialeto (delimitador
+e aspas) são detectados a partir de um prefixo limitado do arquivo. Planilhas
+XLS são lidas folha a folha com o xlrd em modo ``on_demand`` e planilhas ODS
+diretamente do ``content.xml``, com ``iterparse``.
+"""
+
+import codecs
+import csv
+import zipfile
+from typing import Iterator, List, Optional, Tuple
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Quantidade de bytes inspecionada para detectar codificação e dialeto
+SNIFF_SIZE = 64 * 1024
+
+# Delimitadores aceitos na detecção de dialeto
+CSV_DELIMITERS = ',;\t|'
+
+# Número de colunas a partir do qual o modo 'auto' usa o leitor vetorizado
+WIDE_CSV_COLUMNS = 256
+
+# Linhas por bloco no leitor vetorizado (pandas)
+VECTORIZED_CHUNK_ROWS = 10000
+
+CSV_ENGINES = ('auto', 'python', 'pandas')
+
+# Leitores de XLS/ODS: 'stream' lê linha a linha; 'pandas' monta um DataFrame por planilha
+SPREADSHEET_ENGINES = ('stream', 'pandas')
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+# Bytes sem caractere definido no cp1252
+_CP1252_UNDEFINED = frozenset(b'\x81\x8d\x8f\x90\x9d')
+
+
+def sniff_encoding(prefix: bytes) -> str:
+    """
+    Detecta a codificação de um texto a partir do seu prefixo.
+
+    Usa o BOM quando presente; senão, UTF-8 se o prefixo for UTF-8 válido
+    (ignorando um caractere multibyte cortado no fim) e, por último, cp1252,
+    ou latin-1 quando houver bytes que o cp1252 não define.
+    """
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    try:
+        prefix.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as error:
+        # Um caractere multibyte cortado no fim do prefixo não invalida o UTF-8
+        if error.start >= len(prefix) - 3 and error.reason == 'unexpected end of data':
+            return 'utf-8'
+    if _CP1252_UNDEFINED.intersection(prefix):
+        return 'latin-1'
+    return 'cp1252'
+
+
+def sniff_dialect(sample: str):
+    """Detecta o dialeto CSV de uma amostra, usando o dialeto 'excel' como padrão."""
+    # Descarta a última linha, possivelmente incompleta
+    if '\n' in sample:
+        sample = sample[:sample.rindex('\n')]
+    if not sample.strip():
+        return csv.excel
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        return csv.excel
+
+
+def sniff_csv(file_path: str) -> Tuple[str, object]:
+    """Detecta codificação e dialeto de um CSV lendo apenas os primeiros bytes."""
+    with open(file_path, 'rb') as file:
+        prefix = file.read(SNIFF_SIZE)
+    encoding = sniff_encoding(prefix)
+    sample = prefix.decode(encoding, errors='ignore')
+    return encoding, sniff_dialect(sample)
+
+
+def iter_csv_rows(
+    file_path: str,
+    max_rows: Optional[int] = None,
+    encoding: Optional[str] = None,
+    delimiter: Optional[str] = None,
+    engine: str = 'auto',
+) -> Iterator[str]:
+    """
+    Percorre as linhas de um CSV, cada uma unida por tabulação.
+
+    ``encoding`` e ``delimiter`` são detectados quando não informados.
+    ``max_rows`` limita o número de linhas produzidas. ``engine`` escolhe entre
+    o leitor ``csv`` padrão (``python``), o leitor vetorizado do pandas em
+    blocos (``pandas``) ou ``auto``, que usa o pandas apenas para arquivos
+    muito largos. No modo ``pandas`` cada item produzido é um bloco de linhas.
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"Engine de CSV inválida: {engine}")
+    if max_rows is not None and max_rows <= 0:
+        return
+
+    sniffed_encoding, dialect = sniff_csv(file_path)
+    encoding = encoding or sniffed_encoding
+    delimiter = delimiter or dialect.delimiter
+
+    if engine == 'auto':
+        engine = 'python'
+        columns = _column_count(file_path, encoding, dialect, delimiter)
+        if pd is not None and columns >= WIDE_CSV_COLUMNS:
+            engine = 'pandas'
+
+    if engine == 'pandas':
+        yield from _iter_csv_blocks_pandas(file_path, encoding, dialect, delimiter, max_rows)
+        return
+
+    with open(file_path, 'r', encoding=encoding, errors='replace', newline='') as file:
+        for count, row in enumerate(csv.reader(file, dialect, delimiter=delimiter), start=1):
+            yield '\t'.join(row)
+            if max_rows is not None and count >= max_rows:
+                break
+
+
+def _column_count(file_path: str, encoding: str, dialect, delimiter: str) -> int:
+    with open(file_path, 'r', encoding=encoding, errors='replace', newline='') as file:
+        first_row = next(csv.reader(file, dialect, delimiter=delimiter), [])
+    return len(first_row)
+
+
+def _iter_csv_blocks_pandas(file_path: str, encoding: str, dialect, delimiter: str,
+                            max_rows: Optional[int]) -> Iterator[str]:
+    """
+    Leitor vetorizado: lê blocos com o parser em C do pandas e serializa cada bloco de uma vez.
+
+    Assume linhas com o mesmo número de colunas da primeira; tabulações e
+    quebras de linha dentro dos campos são escapadas com barra invertida.
+    """
+    if pd is None:
+        raise ImportError("pandas não está instalado")
+
+    reader = pd.read_csv(
+        file_path,
+        sep=delimiter,
+        quotechar=dialect.quotechar,
+        encoding=encoding,
+        encoding_errors='replace',
+        header=None,
+        dtype=str,
+        keep_default_na=False,
+        skip_blank_lines=False,
+        chunksize=VECTORIZED_CHUNK_ROWS,
+        nrows=max_rows,
+        engine='c',
+    )
+    with reader:
+        for chunk in reader:
+            block = chunk.to_csv(
+                sep='\t', header=False, index=False, quoting=csv.QUOTE_NONE,
+                escapechar='\\', lineterminator='\n',
+            )
+            if block:
+                yield block.rstrip('\n')
+
+
+def sheet_header(sheet_name: str) -> str:
+    """Linha que separa as planilhas na saída de texto."""
+    return f"=== Planilha: {sheet_name} ==="
+
+
+def _format_number(value: float) -> str:
+    """Formata números sem o ``.0`` de valores inteiros."""
+    if value == int(value) and abs(value) < 1e16:
+        return str(int(value))
+    return repr(value)
+
+
+def _xls_cell_text(cell, datemode: int) -> str:
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return ''
+    if cell.ctype == xlrd.XL_CELL_NUMBER:
+        return _format_number(cell.value)
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        try:
+            moment = xlrd.xldate_as_datetime(cell.value, datemode)
+        except (ValueError, OverflowError):
+            return _format_number(cell.value)
+        if moment.time() == moment.min.time():
+            return moment.date().isoformat()
+        return moment.isoformat(sep=' ')
+    if cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return 'TRUE' if cell.value else 'FALSE'
+    if cell.ctype == xlrd.XL_CELL_ERROR:
+        return xlrd.error_text_from_code.get(cell.value, '#ERR')
+    return str(cell.value)
+
+
+def _xls_sheet_rows(file_path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Percorre as linhas de um arquivo XLS, folha a folha.
+
+    Com ``on_demand=True`` o xlrd só interpreta cada planilha quando ela é
+    solicitada, e cada uma é descarregada logo após ser percorrida. Produz
+    ``(planilha, linha)`` para cada linha não vazia, com ``linha=None`` no
+    início de cada planilha.
+    """
+    if xlrd is None:
+        raise ImportError("xlrd não está instalado. Não é possível converter arquivos .xls")
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        for index, sheet_name in enumerate(book.sheet_names()):
+            sheet = book.sheet_by_index(index)
+            yield sheet_name, None
+            for row_index in range(sheet.nrows):
+                values = [_xls_cell_text(cell, book.datemode) for cell in sheet.row(row_index)]
+                while values and not values[-1]:
+                    values.pop()
+                if values:
+                    yield sheet_name, '\t'.join(values)
+            book.unload_sheet(index)
+    finally:
+        book.release_resources()
+
+
+# Namespaces do OpenDocument usados no content.xml
+_ODF_TABLE = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+_ODF_TEXT = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
+_ODF_OFFICE = 'urn:oasis:names:tc:opendocument:xmlns:office:1.0'
+
+_ODS_TABLE = f'{{{_ODF_TABLE}}}table'
+_ODS_ROW = f'{{{_ODF_TABLE}}}table-row'
+_ODS_CELLS = (f'{{{_ODF_TABLE}}}table-cell', f'{{{_ODF_TABLE}}}covered-table-cell')
+_ODS_NAME = f'{{{_ODF_TABLE}}}name'
+_ODS_ROWS_REPEATED = f'{{{_ODF_TABLE}}}number-rows-repeated'
+_ODS_COLUMNS_REPEATED = f'{{{_ODF_TABLE}}}number-columns-repeated'
+_ODS_PARAGRAPH = f'{{{_ODF_TEXT}}}p'
+_ODS_SPACE = f'{{{_ODF_TEXT}}}s'
+_ODS_TAB = f'{{{_ODF_TEXT}}}tab'
+_ODS_LINE_BREAK = f'{{{_ODF_TEXT}}}line-break'
+_ODS_SPACE_COUNT = f'{{{_ODF_TEXT}}}c'
+_ODS_VALUE_ATTRIBUTES = tuple(
+    f'{{{_ODF_OFFICE}}}{name}'
+    for name in ('value', 'date-value', 'time-value', 'boolean-value', 'string-value')
+)
+
+
+def _odf_paragraph_text(paragraph) -> str:
+    """Texto de um ``text:p``, expandindo ``text:s``, tabulações e quebras de linha."""
+    parts = [paragraph.text or '']
+    for node in paragraph.iterdescendants():
+        if node.tag == _ODS_SPACE:
+            parts.append(' ' * int(node.get(_ODS_SPACE_COUNT, 1)))
+        elif node.tag == _ODS_TAB:
+            parts.append('\t')
+        elif node.tag == _ODS_LINE_BREAK:
+            parts.append('\n')
+        elif node.text:
+            parts.append(node.text)
+        if node.tail:
+            parts.append(node.tail)
+    return ''.join(parts)
+
+
+def _ods_cell_text(cell) -> str:
+    paragraphs = [_odf_paragraph_text(p) for p in cell.iterchildren(_ODS_PARAGRAPH)]
+    if paragraphs:
+        return '\n'.join(paragraphs)
+    for attribute in _ODS_VALUE_ATTRIBUTES:
+        value = cell.get(attribute)
+        if value is not None:
+            return value
+    return ''
+
+
+def _positive_int(value: Optional[str]) -> int:
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def _ods_sheet_rows(file_path: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Percorre as linhas de um arquivo ODS lendo o ``content.xml`` em fluxo.
+
+    O XML é descompactado sob demanda e interpretado com ``iterparse``; cada
+    linha é produzida ao terminar e removida da árvore em seguida. Células e
+    linhas repetidas (``number-*-repeated``) só são expandidas quando há
+    conteúdo depois delas, evitando materializar as milhares de células
+    vazias que os editores gravam no fim das planilhas. Produz
+    ``(planilha, linha)`` como ``_xls_sheet_rows``.
+    """
+    if etree is None:
+        raise ImportError("lxml não está instalado. Não é possível converter arquivos .ods")
+
+    with zipfile.ZipFile(file_path, 'r') as archive:
+        with archive.open('content.xml') as content:
+            context = etree.iterparse(
+                content,
+                events=('start', 'end'),
+                tag=(_ODS_TABLE, _ODS_ROW),
+                resolve_entities=False,
+                no_network=True,
+                huge_tree=True,
+            )
+            sheet_name = ''
+            for event, element in context:
+                if element.tag == _ODS_TABLE:
+                    if event == 'start':
+                        sheet_name = element.get(_ODS_NAME, '')
+                        yield sheet_name, None
+                    else:
+                        element.clear()
+                    continue
+                if event != 'end':
+                    continue
+
+                values: List[str] = []
+                pending_empty = 0
+                for cell in element.iterchildren(*_ODS_CELLS):
+                    repeat = _positive_int(cell.get(_ODS_COLUMNS_REPEATED))
+                    text = _ods_cell_text(cell)
+                    if not text:
+                        pending_empty += repeat
+                        continue
+                    values.extend([''] * pending_empty)
+                    pending_empty = 0
+                    values.extend([text] * repeat)
+
+                if values:
+                    line = '\t'.join(values)
+                    for _ in range(_positive_int(element.get(_ODS_ROWS_REPEATED))):
+                        yield sheet_name, line
+
+                # Linhas já produzidas não precisam continuar na árvore
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+            del context
+
+
+def _sheet_lines(sheet_rows: Iterator[Tuple[str, Optional[str]]]) -> Iterator[str]:
+    for sheet_name, line in sheet_rows:
+        yield sheet_header(sheet_name) if line is None else line
+
+
+def _group_sheets(sheet_rows: Iterator[Tuple[str, Optional[str]]]) -> Iterator[Tuple[str, List[str]]]:
+    current: Optional[Tuple[str, List[str]]] = None
+    for sheet_name, line in sheet_rows:
+        if line is None:
+            if current is not None:
+                yield current
+            current = (sheet_name, [])
+        else:
+            current[1].append(line)
+    if current is not None:
+        yield current
+
+
+def iter_xls_rows(file_path: str) -> Iterator[str]:
+    """Linhas de um XLS unidas por tabulação, com o cabeçalho de cada planilha."""
+    return _sheet_lines(_xls_sheet_rows(file_path))
+
+
+def iter_xls_sheets(file_path: str) -> Iterator[Tuple[str, List[str]]]:
+    """Planilhas de um XLS como ``(nome, linhas)``, uma de cada vez."""
+    return _group_sheets(_xls_sheet_rows(file_path))
+
+
+def iter_ods_rows(file_path: str) -> Iterator[str]:
+    """Linhas de um ODS unidas por tabulação, com o cabeçalho de cada planilha."""
+    return _sheet_lines(_ods_sheet_rows(file_path))
+
+
+def iter_ods_sheets(file_path: str) -> Iterator[Tuple[str, List[str]]]:
+    """Planilhas de um ODS como ``(nome, linhas)``, uma de cada vez."""
+    return _group_sheets(_ods_sheet_rows(file_path))
@@ -0,0 +1,244 @@
+"""
+Extração de texto em fluxo para formatos de marcação (HTML e XML).
+
+Usa o parser em C do lxml sem construir uma árvore BeautifulSoup: o HTML é
+lido em blocos e o texto é coletado por um parser com ``target``, enquanto o
+XML é percorrido com ``iterparse``, descartando os elementos já processados.
+O resultado equivale a ``soup.get_text(separator='\\n', strip=True)``, exceto
+pelo conteúdo de ``<script>`` e ``<style>``, que é ignorado.
+"""
+
+import codecs
+import re
+from typing import Iterable, Iterator, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Tamanho dos blocos lidos do disco
+READ_CHUNK_SIZE = 64 * 1024
+
+# Elementos HTML cujo conteúdo não é texto do documento
+HTML_SKIPPED_TAGS = frozenset(['script', 'style'])
+
+_META_CHARSET_RE = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE
+)
+_BOMS = (
+    (b'\xef\xbb\xbf', 'utf-8'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be'),
+)
+
+
+def lxml_available() -> bool:
+    """Indica se o lxml está instalado."""
+    return etree is not None
+
+
+def sniff_html_encoding(prefix: bytes) -> str:
+    """
+    Detecta a codificação do HTML pelo BOM ou pela tag <meta charset>, com UTF-8 como padrão.
+
+    Nomes de codificação desconhecidos (ou com erro de digitação) na tag meta
+    são ignorados.
+    """
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    match = _META_CHARSET_RE.search(prefix)
+    if match:
+        encoding = match.group(1).decode('ascii').lower()
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            return 'utf-8'
+        return encoding
+    return 'utf-8'
+
+
+def _html_parser(target, encoding: str):
+    # O libxml2 não conhece todos os nomes aceitos pelo Python
+    options = dict(target=target, remove_comments=True, no_network=True)
+    try:
+        return etree.HTMLParser(encoding=encoding, **options)
+    except LookupError:
+        return etree.HTMLParser(encoding='utf-8', **options)
+
+
+class _HtmlTextTarget:
+    """Alvo do parser HTML do lxml que coleta os nós de texto já sem espaços nas bordas."""
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self._buffer: List[str] = []
+        self._skip_depth = 0
+
+    def _flush(self):
+        if self._buffer:
+            text = ''.join(self._buffer).strip()
+            self._buffer = []
+            if text:
+                self.texts.append(text)
+
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in HTML_SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def end(self, tag):
+        self._flush()
+        if tag in HTML_SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def data(self, data):
+        if not self._skip_depth:
+            self._buffer.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def pi(self, target, data=None):
+        self._flush()
+
+    def close(self):
+        self._flush()
+
+    def drain(self) -> List[str]:
+        texts, self.texts = self.texts, []
+        return texts
+
+
+def iter_html_text(file_path: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Percorre os nós de texto de um arquivo HTML sem montar a árvore do documento.
+
+    O arquivo é lido em blocos de ``chunk_size`` bytes e entregue ao parser
+    incremental do lxml; cada nó de texto não vazio é produzido assim que o
+    bloco que o contém é processado.
+    """
+    if etree is None:
+        raise ImportError("lxml não está instalado")
+
+    with open(file_path, 'rb') as file:
+        chunk = file.read(chunk_size)
+        target = _HtmlTextTarget()
+        parser = _html_parser(target, sniff_html_encoding(chunk[:4096]))
+        while chunk:
+            parser.feed(chunk)
+            yield from target.drain()
+            chunk = file.read(chunk_size)
+    parser.close()
+    yield from target.drain()
+
+
+def _local_name(tag) -> str:
+    """Nome local de uma tag, sem o namespace em notação Clark (``{uri}nome``)."""
+    if isinstance(tag, str) and tag.startswith('{'):
+        return tag.rsplit('}', 1)[1]
+    return tag
+
+
+def _tag_matcher(tags: Optional[Iterable[str]]):
+    """Cria um teste de pertinência que aceita o nome local ou o nome com namespace."""
+    if not tags:
+        return None
+    names = frozenset(tags)
+    return lambda tag: tag in names or _local_name(tag) in names
+
+
+def iter_xml_text(
+    file_path: str,
+    include_tags: Optional[Iterable[str]] = None,
+    exclude_tags: Optional[Iterable[str]] = None,
+) -> Iterator[str]:
+    """
+    Percorre os nós de texto de um arquivo XML com ``iterparse``, em memória constante.
+
+    O texto de um elemento só está completo em eventos específicos: o texto
+    inicial do pai e a cauda do irmão anterior no ``start`` de um elemento, e
+    o texto final no ``end``. Os irmãos já processados são removidos e cada
+    elemento é limpo ao terminar, mantendo em memória apenas o caminho da raiz
+    até o nó atual, independentemente do tamanho do arquivo.
+
+    ``include_tags`` restringe a saída ao texto dentro desses elementos e
+    ``exclude_tags`` descarta o texto dentro deles (a exclusão prevalece). As
+    tags podem ser informadas pelo nome local ou como ``{namespace}nome``.
+    """
+    if etree is None:
+        raise ImportError("lxml não está instalado")
+
+    is_included = _tag_matcher(include_tags)
+    is_excluded = _tag_matcher(exclude_tags)
+    # Profundidade dentro de elementos incluídos/excluídos no ponto atual
+    included_depth = 0
+    excluded_depth = 0
+
+    context = etree.iterparse(
+        file_path,
+        events=('start', 'end'),
+        remove_comments=True,
+        remove_pis=True,
+        resolve_entities=False,
+        no_network=True,
+        huge_tree=True,
+    )
+    for event, element in context:
+        if event == 'start':
+            parent = element.getparent()
+            text = None
+            if parent is not None:
+                previous = element.getprevious()
+                text = parent.text if previous is None else previous.tail
+                # Irmãos anteriores já tiveram todo o seu texto produzido
+                while element.getprevious() is not None:
+                    del parent[0]
+            # O texto até aqui pertence ao pai: decide antes de entrar no elemento
+            emit = not excluded_depth and (is_included is None or included_depth)
+            if is_included is not None and is_included(element.tag):
+                included_depth += 1
+            if is_excluded is not None and is_excluded(element.tag):
+                excluded_depth += 1
+        else:
+            text = element[-1].tail if len(element) else element.text
+            emit = not excluded_depth and (is_included is None or included_depth)
+            if is_included is not None and is_included(element.tag):
+                included_depth -= 1
+            if is_excluded is not None and is_excluded(element.tag):
+                excluded_depth -= 1
+            # A cauda ainda será lida no start do próximo irmão
+            element.clear(keep_tail=True)
+
+        if text and emit:
+            text = text.strip()
+            if text:
+                yield text
+    del context
+
+
+def extract_html_text(file_path: str) -> str:
+    """Extrai o texto de um arquivo HTML, um nó de texto por linha."""
+    return '\n'.join(iter_html_text(file_path))
+
+
+def extract_xml_text(
+    file_path: str,
+    include_tags: Optional[Iterable[str]] = None,
+    exclude_tags: Optional[Iterable[str]] = None,
+) -> str:
+    """Extrai o texto de um arquivo XML, um nó de texto por linha."""
+    return '\n'.join(iter_xml_text(file_path, include_tags, exclude_tags))
+
+
+def default_html_parser(preferred: Optional[str] = None) -> str:
+    """
+    Escolhe o backend do BeautifulSoup para HTML.
+
+    Usa ``preferred`` quando informado; caso contrário, ``lxml`` se estiver
+    instalado e ``html.parser`` como alternativa em Python puro.
+    """
+    if preferred:
+        return preferred
+    return 'lxml' if etree is not None else 'html.parser'
@@ -0,0 +1,135 @@
+"""
+Medição das fases de uma requisição (spans) e perfil opcional com cProfile.
+
+O rastro da requisição fica em uma ``ContextVar``: o middleware o inicia e
+qualquer código chamado a partir do endpoint (inclusive o ``FileConverter``)
+registra suas fases com ``span`` ou ``record`` sem receber parâmetros extras.
+Fora de uma requisição rastreada, ``span`` não faz nada além de ler a
+``ContextVar``.
+
+Fases com o mesmo nome são somadas (ex.: ``extract`` de cada página) e
+exportadas no cabeçalho ``Server-Timing``, que os navegadores exibem na aba
+de rede.
+"""
+
+import cProfile
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Quantidade de funções listadas no resumo do perfil
+PROFILE_TOP_FUNCTIONS = 25
+
+
+class Trace:
+    """Fases medidas em uma requisição: nome -> (duração total, ocorrências)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, duration: float, count: int = 1):
+        span = self.spans.get(name)
+        if span is None:
+            self.spans[name] = [duration, count]
+        else:
+            span[0] += duration
+            span[1] += count
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, dict]:
+        """Durações em milissegundos, na ordem em que as fases começaram."""
+        timings = {
+            name: {'duration_ms': round(duration * 1000, 3), 'count': int(count)}
+            for name, (duration, count) in self.spans.items()
+        }
+        timings['total'] = {'duration_ms': round(self.elapsed() * 1000, 3), 'count': 1}
+        return timings
+
+    def server_timing(self) -> str:
+        """Valor do cabeçalho ``Server-Timing`` (durações em milissegundos)."""
+        parts = []
+        for name, (duration, count) in self.spans.items():
+            part = f'{name};dur={duration * 1000:.1f}'
+            if count > 1:
+                part += f';desc="{int(count)}x"'
+            parts.append(part)
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('textify_trace', default=None)
+
+
+def start_trace() -> Tuple[Trace, Token]:
+    """Inicia o rastro da requisição atual; devolva o token a ``end_trace``."""
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token: Token):
+    _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def record(name: str, duration: float, count: int = 1):
+    """
+    Registra uma fase já medida (útil quando a medição atravessa ``await``).
+    ``count=0`` soma a duração sem contar uma nova ocorrência.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add(name, duration, count)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Mede o bloco como a fase ``name`` da requisição atual, se houver."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+def _function_name(function: Tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == '~':
+        # Funções embutidas, como "<built-in method posix.read>"
+        return name
+    return f'{os.path.basename(filename)}:{line}({name})'
+
+
+def profile_summary(profiler: cProfile.Profile, limit: int = PROFILE_TOP_FUNCTIONS) -> dict:
+    """
+    Resume um perfil do cProfile: as ``limit`` funções com maior tempo
+    acumulado, com número de chamadas, tempo próprio e acumulado (segundos).
+    """
+    stats = pstats.Stats(profiler)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    functions = []
+    for function in stats.fcn_list[:limit]:
+        primitive_calls, calls, own_time, cumulative_time, _ = stats.stats[function]
+        functions.append({
+            'function': _function_name(function),
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'own_seconds': round(own_time, 6),
+            'cumulative_seconds': round(cumulative_time, 6),
+        })
+    return {
+        'total_seconds': round(stats.total_tt, 6),
+        'functions': functions,
+    }
@@ -0,0 +1,202 @@
+"""
+Cache de conversões de URLs com revalidação condicional.
+
+Para cada URL (e nome de arquivo informado) o cache guarda os validadores
+HTTP (ETag e Last-Modified), o hash do conteúdo e o texto extraído. Na
+próxima conversão da mesma URL, o download é feito com ``If-None-Match`` /
+``If-Modified-Since``; um 304 devolve o texto guardado sem baixar o corpo
+nem converter de novo. Servidores sem validadores ainda economizam a
+conversão quando o hash do corpo baixado não mudou.
+
+Entradas não revalidadas há mais de ``ttl_seconds`` expiram, e acima de
+``max_entries`` as menos usadas são descartadas (LRU). Dentro de
+``fresh_seconds`` após a última validação, a entrada é usada sem nenhuma
+requisição à origem.
+
+Há dois armazenamentos: ``MemoryCacheBackend`` (por processo) e
+``SQLiteCacheBackend``, um arquivo SQLite que pode ser compartilhado entre os
+workers do uvicorn e sobrevive a reinícios.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import astuple, dataclass, fields
+from typing import Optional
+
+# Resultados registrados em metrics.CACHE_REQUESTS
+HIT = 'hit'                  # entrada fresca, sem requisição à origem
+REVALIDATED = 'revalidated'  # 304 da origem
+UNCHANGED = 'unchanged'      # corpo baixado com o mesmo hash
+MISS = 'miss'
+
+
+@dataclass
+class CacheEntry:
+    """Texto extraído de uma URL e os dados para revalidá-lo."""
+    key: str
+    url: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: Optional[str]
+    content_type: Optional[str]
+    file_size: int
+    text: str
+    stored_at: float
+    validated_at: float
+
+
+_COLUMNS = [field.name for field in fields(CacheEntry)]
+
+
+class MemoryCacheBackend:
+    """Entradas em memória, por processo, com descarte LRU."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: CacheEntry):
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Entradas em um arquivo SQLite, compartilhável entre processos.
+
+    Usa o modo WAL, para que leituras de um worker não esperem a escrita de
+    outro, e a coluna ``accessed_at`` para o descarte LRU.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False,
+                                           isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS url_cache ("
+                "key TEXT PRIMARY KEY, url TEXT, etag TEXT, last_modified TEXT, "
+                "content_hash TEXT, content_type TEXT, file_size INTEGER, text TEXT, "
+                "stored_at REAL, validated_at REAL, accessed_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS url_cache_accessed ON url_cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM url_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE url_cache SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+        return CacheEntry(*row)
+
+    def put(self, entry: CacheEntry):
+        placeholders = ', '.join('?' * (len(_COLUMNS) + 1))
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO url_cache ({', '.join(_COLUMNS)}, accessed_at) "
+                f"VALUES ({placeholders})",
+                astuple(entry) + (time.time(),),
+            )
+            self._connection.execute(
+                "DELETE FROM url_cache WHERE key IN (SELECT key FROM url_cache "
+                "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection.execute("DELETE FROM url_cache WHERE key = ?", (key,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM url_cache").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class UrlCache:
+    """
+    Política do cache sobre um armazenamento (memória ou SQLite).
+
+    ``namespace`` entra na chave das entradas; mudá-lo (ex.: com outra
+    configuração do conversor) invalida o que foi guardado com o anterior.
+    Textos maiores que ``max_text_chars`` não são guardados.
+    """
+
+    def __init__(self, backend, ttl_seconds: float = 3600, fresh_seconds: float = 0,
+                 max_text_chars: int = 10 * 1024 * 1024, namespace: str = ''):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.fresh_seconds = fresh_seconds
+        self.max_text_chars = max_text_chars
+        self.namespace = namespace
+
+    def key(self, url: str, filename: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{url}\0{filename}".encode('utf-8')).hexdigest()
+
+    def lookup(self, url: str, filename: str) -> Optional[CacheEntry]:
+        """Entrada da URL, ou None se não existir ou tiver expirado."""
+        key = self.key(url, filename)
+        entry = self.backend.get(key)
+        if entry is not None and time.time() - entry.validated_at > self.ttl_seconds:
+            self.backend.delete(key)
+            return None
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Se a entrada pode ser usada sem revalidar na origem."""
+        return time.time() - entry.validated_at <= self.fresh_seconds
+
+    def store(self, url: str, filename: str, text: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None, content_hash: Optional[str] = None,
+              content_type: Optional[str] = None, file_size: int = 0) -> Optional[CacheEntry]:
+        """Guarda o texto extraído de uma URL com seus validadores."""
+        if len(text) > self.max_text_chars:
+            return None
+        now = time.time()
+        entry = CacheEntry(
+            key=self.key(url, filename), url=url, etag=etag, last_modified=last_modified,
+            content_hash=content_hash, content_type=content_type, file_size=file_size,
+            text=text, stored_at=now, validated_at=now,
+        )
+        self.backend.put(entry)
+        return entry
+
+    def revalidated(self, entry: CacheEntry, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None):
+        """Marca a entrada como confirmada pela origem (304 ou mesmo hash)."""
+        entry.validated_at = time.time()
+        entry.etag = etag or entry.etag
+        entry.last_modified = last_modified or entry.last_modified
+        self.backend.put(entry)
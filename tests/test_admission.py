@@ -0,0 +1,182 @@
+"""
+Testes para o controle de admissão e as cotas por API key.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from admission import (
+    COST_BYTES_PER_UNIT,
+    AdmissionController,
+    AdmissionRejected,
+    estimate_cost,
+    estimate_generate_cost,
+    parse_api_keys,
+)
+
+
+class TestParseApiKeys:
+    """Testes para a leitura das chaves do arquivo de segredo."""
+
+    def test_single_key_file(self):
+        """Testa que o arquivo antigo, com uma única chave, continua válido."""
+        keys = parse_api_keys("segredo\n", default_max_weight=4)
+        assert list(keys) == ['segredo']
+        assert keys['segredo'].max_weight == 4
+
+    def test_multiple_keys_with_quotas(self):
+        """Testa várias chaves com nome e cota, ignorando comentários."""
+        keys = parse_api_keys(
+            "# clientes\n"
+            "chave-a name=cliente-a max_weight=8\n"
+            "\n"
+            "chave-b name=cliente-b\n",
+            default_max_weight=4,
+        )
+        assert keys['chave-a'].name == 'cliente-a'
+        assert keys['chave-a'].max_weight == 8
+        assert keys['chave-b'].max_weight == 4
+
+    def test_invalid_options(self):
+        """Testa a recusa de opções malformadas ou desconhecidas."""
+        with pytest.raises(ValueError):
+            parse_api_keys("chave cota", default_max_weight=4)
+        with pytest.raises(ValueError):
+            parse_api_keys("chave limite=3", default_max_weight=4)
+        with pytest.raises(ValueError):
+            parse_api_keys("# só comentário\n", default_max_weight=4)
+
+
+def test_estimate_cost():
+    """Testa o peso pelo formato e pelo tamanho do arquivo."""
+    assert estimate_cost('.csv') == 1
+    assert estimate_cost('.PDF') == 3
+    assert estimate_cost('.pdf', 2 * COST_BYTES_PER_UNIT) == 5
+    assert estimate_generate_cost('pdf') > estimate_generate_cost('docx')
+
+
+class TestAdmissionController:
+    """Testes para os limites global e por chave."""
+
+    def test_rejects_immediately_without_queue(self):
+        """Testa a recusa com Retry-After quando a espera está desligada."""
+        async def scenario():
+            controller = AdmissionController(max_weight=2, queue_timeout=0)
+            await controller.acquire('a', 2, key_limit=4)
+            with pytest.raises(AdmissionRejected) as error:
+                await controller.acquire('b', 1, key_limit=4)
+            assert error.value.reason == 'busy'
+            assert error.value.retry_after >= 1
+
+        asyncio.run(scenario())
+
+    def test_queued_request_is_admitted_on_release(self):
+        """Testa que quem espera é admitido quando o peso é devolvido."""
+        async def scenario():
+            controller = AdmissionController(max_weight=2, queue_timeout=5)
+            ticket = await controller.acquire('a', 2, key_limit=4)
+            waiting = asyncio.ensure_future(controller.acquire('b', 1, key_limit=4))
+            await asyncio.sleep(0)
+            assert not waiting.done()
+            controller.release(ticket)
+            second = await waiting
+            assert controller.in_use == 1
+            controller.release(second)
+            assert controller.in_use == 0
+            assert controller.key_in_use == {}
+
+        asyncio.run(scenario())
+
+    def test_queue_deadline(self):
+        """Testa a recusa quando o prazo de espera expira."""
+        async def scenario():
+            controller = AdmissionController(max_weight=1, queue_timeout=0.05)
+            await controller.acquire('a', 1, key_limit=4)
+            with pytest.raises(AdmissionRejected) as error:
+                await controller.acquire('b', 1, key_limit=4)
+            assert error.value.reason == 'timeout'
+            assert len(controller._queue) == 0
+
+        asyncio.run(scenario())
+
+    def test_queue_full(self):
+        """Testa a recusa quando a fila está cheia."""
+        async def scenario():
+            controller = AdmissionController(max_weight=1, queue_timeout=5, max_queue=1)
+            await controller.acquire('a', 1, key_limit=4)
+            waiting = asyncio.ensure_future(controller.acquire('a', 1, key_limit=4))
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as error:
+                await controller.acquire('b', 1, key_limit=4)
+            assert error.value.reason == 'queue_full'
+            waiting.cancel()
+
+        asyncio.run(scenario())
+
+    def test_key_quota_does_not_block_other_keys(self):
+        """Testa que a chave no limite da cota não atrasa as outras."""
+        async def scenario():
+            controller = AdmissionController(max_weight=4, queue_timeout=5)
+            await controller.acquire('a', 2, key_limit=2)
+            blocked = asyncio.ensure_future(controller.acquire('a', 1, key_limit=2))
+            await asyncio.sleep(0)
+            other = await asyncio.wait_for(controller.acquire('b', 1, key_limit=2), 1)
+            assert other.key == 'b'
+            assert not blocked.done()
+            blocked.cancel()
+
+        asyncio.run(scenario())
+
+    def test_weight_is_capped_by_limits(self):
+        """Testa que uma requisição maior que o limite ainda pode rodar sozinha."""
+        async def scenario():
+            controller = AdmissionController(max_weight=4, queue_timeout=0)
+            ticket = await controller.acquire('a', 50, key_limit=3)
+            assert ticket.weight == 3
+
+        asyncio.run(scenario())
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Testa que o cliente que desiste sai da fila sem reter peso."""
+        async def scenario():
+            controller = AdmissionController(max_weight=1, queue_timeout=5)
+            ticket = await controller.acquire('a', 1, key_limit=4)
+            waiting = asyncio.ensure_future(controller.acquire('b', 1, key_limit=4))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            controller.release(ticket)
+            assert controller.in_use == 0
+            assert len(controller._queue) == 0
+
+        asyncio.run(scenario())
+
+    def test_grant_racing_deadline_keeps_ticket(self, monkeypatch):
+        """Testa que a admissão concedida junto com o fim do prazo não perde o peso."""
+        async def grant_then_time_out(awaitable, timeout):
+            # Simula o wait_for expirando logo depois de o futuro ser resolvido
+            await awaitable
+            raise asyncio.TimeoutError
+
+        async def scenario():
+            controller = AdmissionController(max_weight=1, queue_timeout=5)
+            ticket = await controller.acquire('a', 1, key_limit=4)
+            monkeypatch.setattr(asyncio, 'wait_for', grant_then_time_out)
+            waiting = asyncio.ensure_future(controller.acquire('b', 1, key_limit=4))
+            await asyncio.sleep(0)
+            controller.release(ticket)
+            second = await waiting
+            assert second.key == 'b'
+            assert controller.in_use == 1
+            controller.release(second)
+            assert controller.in_use == 0
+            assert controller.key_in_use == {}
+
+        asyncio.run(scenario())
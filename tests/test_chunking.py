@@ -0,0 +1,115 @@
+"""
+Testes para a divisão do texto em trechos.
+"""
+
+import pytest
+import sys
+import os
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chunking import Chunker, chunk_segments, get_tokenizer, register_tokenizer
+
+SEGMENTS = [
+    "Primeiro parágrafo curto.\nSegundo parágrafo. Tem duas frases!",
+    "Página dois   começa aqui.\n\nFim.",
+]
+FULL_TEXT = "\n".join(SEGMENTS)
+
+
+class TestChunker:
+    """Testes para as janelas, a sobreposição e os deslocamentos."""
+
+    @pytest.mark.parametrize("strategy", ["fixed", "sentence", "paragraph"])
+    @pytest.mark.parametrize("size, overlap", [(10, 4), (30, 0), (30, 12), (1000, 0)])
+    def test_chunks_are_slices_within_size(self, strategy, size, overlap):
+        """Testa que cada trecho é um recorte fiel do texto completo e respeita o tamanho."""
+        chunks = chunk_segments(SEGMENTS, size, overlap, strategy)
+        assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+        for chunk in chunks:
+            assert FULL_TEXT[chunk.start:chunk.end] == chunk.text
+            assert chunk.tokens <= size
+        assert chunks[0].start == 0
+        assert chunks[-1].end == len(FULL_TEXT)
+
+    def test_paragraph_keeps_whole_paragraphs(self):
+        """Testa que parágrafos que cabem na janela não são partidos."""
+        chunks = chunk_segments(SEGMENTS, size=40, strategy="paragraph")
+        assert [chunk.text for chunk in chunks] == [
+            "Primeiro parágrafo curto.",
+            "Segundo parágrafo. Tem duas frases!",
+            "Página dois   começa aqui.\n\nFim.",
+        ]
+
+    def test_overlap_repeats_tail_words(self):
+        """Testa a sobreposição medida em palavras."""
+        chunks = chunk_segments(["a b c d e f g h"], size=5, overlap=2,
+                                strategy="fixed", tokenizer="words")
+        assert [chunk.text for chunk in chunks] == ["a b c d e", "d e f g h"]
+
+    def test_oversized_word_is_cut(self):
+        """Testa que palavras maiores que a janela são cortadas em caracteres."""
+        chunks = chunk_segments(["x" * 25], size=10, strategy="fixed")
+        assert [len(chunk.text) for chunk in chunks] == [10, 10, 5]
+
+    def test_hash_identifies_repeated_chunks(self):
+        """Testa que trechos iguais têm o mesmo hash."""
+        chunks = chunk_segments(["Mesmo texto.", "Mesmo texto."], size=12)
+        assert len(chunks) == 2
+        assert chunks[0].hash == chunks[1].hash
+        assert chunks[0].start != chunks[1].start
+
+    def test_incremental_matches_batch(self):
+        """Testa que add/finish produzem o mesmo resultado que o processamento em lote."""
+        chunker = Chunker(size=30, overlap=12, strategy="fixed")
+        incremental = []
+        for segment in SEGMENTS:
+            incremental.extend(chunker.add(segment))
+        incremental.extend(chunker.finish())
+        assert incremental == chunk_segments(SEGMENTS, 30, 12, "fixed")
+
+    def test_clean_keeps_paragraph_boundaries(self):
+        """Testa que a limpeza por trecho não desfaz a divisão por parágrafos."""
+        from file_converter import FileConverter
+        text = (
+            "Primeiro parágrafo   com espaços extras.\n\n"
+            "Segundo parágrafo com mais texto.\n\n"
+            "---\n\n"
+            "Terceiro parágrafo encerra o documento."
+        )
+        chunks = chunk_segments([text], size=45, strategy="paragraph",
+                                clean=FileConverter().clean_text)
+        assert [chunk.text for chunk in chunks] == [
+            "Primeiro parágrafo com espaços extras",
+            "Segundo parágrafo com mais texto",
+            "Terceiro parágrafo encerra o documento",
+        ]
+        assert [chunk.index for chunk in chunks] == [0, 1, 2]
+        assert text[chunks[2].start:chunks[2].end] == "Terceiro parágrafo encerra o documento."
+
+    @pytest.mark.parametrize("options", [
+        {"strategy": "linhas"},
+        {"size": 0},
+        {"size": 10, "overlap": 10},
+        {"tokenizer": "inexistente"},
+    ])
+    def test_invalid_options(self, options):
+        """Testa a validação dos parâmetros."""
+        with pytest.raises(ValueError):
+            Chunker(**options)
+
+
+def test_register_tokenizer():
+    """Testa o registro de um tokenizador personalizado."""
+    register_tokenizer("bytes", lambda text: len(text.encode('utf-8')))
+    assert get_tokenizer("bytes")("ação") == 6
+    chunks = chunk_segments(["ação ação"], size=7, strategy="fixed", tokenizer="bytes")
+    assert [chunk.text for chunk in chunks] == ["ação", "ação"]
+
+
+def test_tiktoken_tokenizer():
+    """Testa a contagem de tokens com o tiktoken, quando instalado."""
+    pytest.importorskip("tiktoken")
+    count = get_tokenizer("tiktoken:cl100k_base")
+    assert 0 < count("Olá, mundo!") < len("Olá, mundo!")
@@ -0,0 +1,107 @@
+"""
+Testes para a detecção de formato pelo conteúdo.
+"""
+
+import pytest
+import struct
+import sys
+import os
+import zipfile
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from content_sniffer import extension_for_mime, sniff_format
+
+
+def write_ole2(path, stream_name, sector_shift=9):
+    """Monta um arquivo OLE2 mínimo cujo diretório contém ``stream_name``."""
+    sector_size = 1 << sector_shift
+    header = bytearray(512)
+    header[0:8] = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+    struct.pack_into('<H', header, 0x1E, sector_shift)
+    struct.pack_into('<I', header, 0x30, 0)
+    directory = bytearray(sector_size)
+    name = 'Root Entry'.encode('utf-16-le')
+    directory[0:len(name)] = name
+    name = stream_name.encode('utf-16-le')
+    directory[128:128 + len(name)] = name
+    path.write_bytes(bytes(header) + bytes(sector_size - 512) + bytes(directory))
+
+
+class TestSniffFormat:
+    """Testes para as assinaturas reconhecidas."""
+
+    def test_pdf(self, tmp_path):
+        path = tmp_path / "arquivo.bin"
+        path.write_bytes(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n1 0 obj")
+        assert sniff_format(str(path)) == '.pdf'
+
+    @pytest.mark.parametrize("entry, expected", [
+        ('word/document.xml', '.docx'),
+        ('xl/workbook.xml', '.xlsx'),
+        ('ppt/presentation.xml', '.pptx'),
+    ])
+    def test_office_open_xml(self, tmp_path, entry, expected):
+        path = tmp_path / "arquivo.doc"
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('[Content_Types].xml', '<Types/>')
+            archive.writestr(entry, '<x/>')
+        assert sniff_format(str(path)) == expected
+
+    def test_opendocument(self, tmp_path):
+        path = tmp_path / "arquivo"
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet')
+            archive.writestr('content.xml', '<x/>')
+        assert sniff_format(str(path)) == '.ods'
+
+    def test_plain_zip_is_unknown(self, tmp_path):
+        path = tmp_path / "arquivo.zip"
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('leia.txt', 'oi')
+        assert sniff_format(str(path)) is None
+
+    @pytest.mark.parametrize("stream_name, expected", [
+        ('WordDocument', '.doc'),
+        ('Workbook', '.xls'),
+        ('PowerPoint Document', '.ppt'),
+    ])
+    def test_ole2(self, tmp_path, stream_name, expected):
+        path = tmp_path / "arquivo.bin"
+        write_ole2(path, stream_name)
+        assert sniff_format(str(path)) == expected
+
+    def test_ole2_version4_sectors(self, tmp_path):
+        """Testa setores de 4096 bytes (OLE2 versão 4)."""
+        path = tmp_path / "arquivo.bin"
+        write_ole2(path, 'WordDocument', sector_shift=12)
+        assert sniff_format(str(path)) == '.doc'
+
+    @pytest.mark.parametrize("content, expected", [
+        (b"\xef\xbb\xbf<!DOCTYPE html><html><body>oi</body></html>", '.html'),
+        (b"<?xml version='1.0'?><html><body/></html>", '.html'),
+        (b"  <?xml version='1.0'?><raiz/>", '.xml'),
+        (b'{"a": 1}', '.json'),
+        (b"---\na: 1\n", '.yaml'),
+    ])
+    def test_text_formats(self, tmp_path, content, expected):
+        path = tmp_path / "arquivo"
+        path.write_bytes(content)
+        assert sniff_format(str(path)) == expected
+
+    def test_plain_text_is_unknown(self, tmp_path):
+        """Testa que texto simples e CSV não contrariam a extensão."""
+        path = tmp_path / "dados.csv"
+        path.write_bytes(b"nome;idade\nAna;30\n")
+        assert sniff_format(str(path)) in (None, '.csv')
+
+
+@pytest.mark.parametrize("content_type, expected", [
+    ("application/pdf", '.pdf'),
+    ("text/html; charset=utf-8", '.html'),
+    ("application/octet-stream", None),
+    (None, None),
+])
+def test_extension_for_mime(content_type, expected):
+    assert extension_for_mime(content_type) == expected
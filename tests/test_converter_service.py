@@ -0,0 +1,112 @@
+"""
+Testes para o serviço de conversão atrás do socket Unix.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tracing
+from converter_service import ConverterClient, ConverterService, ConverterServiceError
+from sandbox import MEMORY, SandboxLimitExceeded, SandboxPool
+from segments import Segment
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'),
+                                reason="conversores via forkserver e /proc")
+
+
+@pytest.fixture(scope='module')
+def pool():
+    sandbox = SandboxPool(workers=1, memory_limit_mb=400, address_space_mb=0, cpu_seconds=5)
+    sandbox.warm_up()
+    yield sandbox
+    sandbox.shutdown()
+
+
+def with_service(pool, socket_path, scenario):
+    """Executa ``scenario(client)`` com o serviço escutando em ``socket_path``."""
+    async def run():
+        service = ConverterService(pool, str(socket_path))
+        await service.start()
+        try:
+            return await scenario(ConverterClient(str(socket_path)))
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+def test_convert_file(pool, tmp_path):
+    """Testa a conversão pelo socket, com as fases devolvidas ao rastro do cliente."""
+    path = tmp_path / "dados.csv"
+    path.write_text("a,b\n1,2\n", encoding='utf-8')
+
+    async def scenario(client):
+        trace, token = tracing.start_trace()
+        try:
+            text = await client.convert_file(str(path), "dados.csv")
+        finally:
+            tracing.end_trace(token)
+        return text, trace
+
+    text, trace = with_service(pool, tmp_path / "conv.sock", scenario)
+    assert text == "a\tb\n1\t2"
+    assert 'extract' in trace.spans
+    assert not os.path.exists(tmp_path / "conv.sock")
+
+
+def test_convert_segments_and_ping(pool, tmp_path):
+    """Testa os segmentos reconstruídos no cliente e o ping."""
+    path = tmp_path / "dados.json"
+    path.write_text('{"a": {"b": "texto"}}', encoding='utf-8')
+
+    async def scenario(client):
+        return await client.ping(), await client.convert_segments(str(path), "dados.json")
+
+    info, segments = with_service(pool, tmp_path / "conv.sock", scenario)
+    assert info['workers'] == 1
+    assert info['pid'] == os.getpid()
+    assert all(isinstance(segment, Segment) for segment in segments)
+    assert "texto" in segments[0].text
+
+
+def test_converter_errors_keep_their_type(pool, tmp_path):
+    """Testa que o erro do conversor chega ao cliente com o tipo original."""
+    path = tmp_path / "dados.xyz"
+    path.write_bytes(b"\x00\x01")
+
+    async def unsupported(client):
+        await client.convert_file(str(path), "dados.xyz")
+
+    with pytest.raises(ValueError):
+        with_service(pool, tmp_path / "conv.sock", unsupported)
+
+
+class OverBudgetPool:
+    """Pool que sempre estoura o orçamento de memória."""
+    workers = 1
+
+    async def convert_file(self, file_path, filename, content_type=None, deadline=None):
+        raise SandboxLimitExceeded(MEMORY, "Conversão excedeu o limite de memória")
+
+
+def test_sandbox_limits_reach_the_client(tmp_path):
+    """Testa que o limite estourado no serviço vira SandboxLimitExceeded no cliente."""
+    async def scenario(client):
+        await client.convert_file(str(tmp_path / "a.pdf"), "a.pdf")
+
+    with pytest.raises(SandboxLimitExceeded) as error:
+        with_service(OverBudgetPool(), tmp_path / "conv.sock", scenario)
+    assert error.value.reason == MEMORY
+    assert error.value.status_code == 413
+
+
+def test_service_unavailable(tmp_path):
+    """Testa o erro claro quando o serviço não está rodando."""
+    client = ConverterClient(str(tmp_path / "ausente.sock"))
+    with pytest.raises(ConverterServiceError):
+        asyncio.run(client.convert_file(str(tmp_path / "a.csv"), "a.csv"))
@@ -0,0 +1,50 @@
+"""
+Testes para o motor CSS usado na conversão HTML -> DOCX.
+"""
+
+import pytest
+import sys
+import os
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from css_engine import parse_selector
+
+
+class TestSelectorParsing:
+    """Testes para a interpretação de seletores."""
+
+    @pytest.mark.parametrize("selector, specificity", [
+        ("p", (0, 0, 1)),
+        (".nota", (0, 1, 0)),
+        ("#aviso", (1, 0, 0)),
+        ("div p.nota", (0, 1, 2)),
+        ("ul > li:first-child", (0, 1, 2)),
+        ("a[href^=http]", (0, 1, 1)),
+    ])
+    def test_specificity(self, selector, specificity):
+        """Testa o cálculo de especificidade."""
+        assert parse_selector(selector).specificity == specificity
+
+    def test_unsupported_pseudo_is_dropped(self):
+        """Testa se pseudo-classes dinâmicas são descartadas."""
+        assert parse_selector("a:hover") is None
+        assert parse_selector("p::before") is None
+
+    @pytest.mark.parametrize("selector", [
+        "[class~=x]",
+        "[lang|=pt]",
+        "a[href^=http]",
+        'p[title="a b"]',
+        "p[title='x > y']",
+        'p[title="a + b ~ c"] > span',
+    ])
+    def test_attribute_operators_and_quoted_values(self, selector):
+        """Testa se combinadores dentro de colchetes e aspas são preservados."""
+        assert parse_selector(selector) is not None
+
+    def test_unclosed_attribute_is_dropped(self):
+        """Testa se colchetes ou aspas não fechados descartam o seletor."""
+        assert parse_selector('p[title="a b]') is None
+        assert parse_selector("p[title") is None
@@ -0,0 +1,129 @@
+"""
+Testes para o prazo das extrações e o texto parcial.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import zipfile
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import file_converter
+from deadlines import (DEADLINE_EXCEEDED, Deadline, apply_truncation, remaining_seconds,
+                       run_with_deadline, tool_timeout, use_deadline)
+from file_converter import FileConverter
+
+
+def write_deck(path, slides=3):
+    """Monta um PPTX mínimo com ``slides`` slides de texto."""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('ppt/presentation.xml', '<p/>')
+        for number in range(1, slides + 1):
+            archive.writestr(f'ppt/slides/slide{number}.xml', f'<p><t>Slide {number}</t></p>')
+
+
+class TestDeadline:
+    """Testes do prazo em si."""
+
+    def test_without_limit(self):
+        deadline = Deadline()
+        assert deadline.remaining() is None
+        assert not deadline.check()
+        assert deadline.timeout(30) == 30
+        assert not deadline.truncated
+
+    def test_expiration(self):
+        deadline = Deadline(0.05)
+        assert not deadline.check()
+        assert 0 < deadline.timeout(30) <= 0.05
+        time.sleep(0.06)
+        assert deadline.remaining() == 0
+        assert deadline.check()
+        assert deadline.reason == DEADLINE_EXCEEDED
+
+    def test_first_reason_wins_and_copies_start_clean(self):
+        deadline = Deadline(0)
+        deadline.truncate('outro')
+        assert deadline.check()
+        assert deadline.reason == 'outro'
+        copy = deadline.copy()
+        assert copy.expires_at == deadline.expires_at
+        assert not copy.truncated
+
+    def test_current_deadline(self):
+        """Testa o prazo da conversão em andamento, lido pelas ferramentas externas."""
+        assert tool_timeout(30) == 30
+        with use_deadline(Deadline(5)):
+            assert tool_timeout(30) <= 5
+        assert tool_timeout(30) == 30
+
+    def test_remote_round_trip(self):
+        """Testa o prazo enviado como segundos restantes e o corte devolvido."""
+        async def convert(deadline):
+            deadline.check()
+            return "parcial"
+
+        original = Deadline(0)
+        result, reason = asyncio.run(run_with_deadline(remaining_seconds(original), convert))
+        apply_truncation(original, reason)
+        assert result == "parcial"
+        assert original.reason == DEADLINE_EXCEEDED
+
+        result, reason = asyncio.run(run_with_deadline(remaining_seconds(None), convert))
+        assert reason is None
+
+
+class TestPartialText:
+    """Testes do corte entre unidades no FileConverter."""
+
+    def test_convert_file_stops_between_slides(self, tmp_path):
+        """Testa o texto parcial (só o primeiro slide) quando o prazo já acabou."""
+        path = tmp_path / "deck.pptx"
+        write_deck(path)
+        converter = FileConverter()
+
+        deadline = Deadline(0)
+        text = asyncio.run(converter.convert_file(str(path), "deck.pptx", deadline=deadline))
+        assert text == "Slide 1"
+        assert deadline.reason == DEADLINE_EXCEEDED
+
+        deadline = Deadline(60)
+        text = asyncio.run(converter.convert_file(str(path), "deck.pptx", deadline=deadline))
+        assert text == "Slide 1\nSlide 2\nSlide 3"
+        assert not deadline.truncated
+
+    def test_segments_stop_between_slides(self, tmp_path):
+        """Testa os segmentos parciais quando o prazo já acabou."""
+        path = tmp_path / "deck.pptx"
+        write_deck(path)
+
+        deadline = Deadline(0)
+        segments = asyncio.run(FileConverter().convert_segments(str(path), "deck.pptx",
+                                                                deadline=deadline))
+        assert [segment.text for segment in segments] == ["Slide 1"]
+        assert deadline.truncated
+
+    def test_external_tool_keeps_partial_output(self, monkeypatch):
+        """Testa a saída parcial do antiword interrompido pelo prazo."""
+        converter = FileConverter()
+        timeouts = []
+
+        def slow_tool(args, **kwargs):
+            timeouts.append(kwargs['timeout'])
+            raise subprocess.TimeoutExpired(args, kwargs['timeout'], output=b"texto parcial")
+
+        monkeypatch.setattr(file_converter.subprocess, 'run', slow_tool)
+        with use_deadline(Deadline(0)):
+            assert converter._convert_doc_with_antiword("a.doc") == "texto parcial"
+        assert timeouts == [0]
+
+        # Sem prazo, o tempo limite da própria ferramenta continua sendo um erro
+        with pytest.raises(Exception, match="Timeout ao executar antiword"):
+            converter._convert_doc_with_antiword("a.doc")
+        assert timeouts[-1] == 30
@@ -0,0 +1,219 @@
+"""
+Testes para a leitura interna de documentos do Word 97-2003.
+"""
+
+import asyncio
+import io
+import os
+import struct
+import sys
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import file_converter
+from doc_reader import DocReaderError, read_doc_text
+from file_converter import FileConverter
+
+END_OF_CHAIN = 0xFFFFFFFE
+FAT_SECTOR = 0xFFFFFFFD
+NO_STREAM = 0xFFFFFFFF
+MINI_CUTOFF = 4096
+
+
+def build_cfb(streams, sector_shift=9):
+    """
+    Monta um contêiner OLE2 com ``streams`` (nome -> bytes) na raiz; fluxos
+    menores que 4096 bytes vão para o mini stream, como no Word.
+    """
+    sector_size = 1 << sector_shift
+    sectors, fat = [], []
+
+    def allocate(data):
+        if not data:
+            return END_OF_CHAIN
+        start = len(sectors)
+        for offset in range(0, len(data), sector_size):
+            sectors.append(data[offset:offset + sector_size].ljust(sector_size, b'\0'))
+            fat.append(len(sectors))
+        fat[-1] = END_OF_CHAIN
+        return start
+
+    entries, mini_stream, mini_fat = [], b'', []
+    for name, data in streams.items():
+        if len(data) < MINI_CUTOFF:
+            start = len(mini_stream) // 64
+            chunks = [data[offset:offset + 64] for offset in range(0, len(data), 64)]
+            mini_fat.extend(start + index + 1 for index in range(len(chunks)))
+            mini_fat[-1] = END_OF_CHAIN
+            mini_stream += b''.join(chunk.ljust(64, b'\0') for chunk in chunks)
+            entries.append((name, start, len(data)))
+        else:
+            entries.append((name, None, data))
+
+    directory_start = allocate(bytes(sector_size * 2))
+    mini_fat_start = allocate(struct.pack(f'<{len(mini_fat)}I', *mini_fat)) if mini_fat else END_OF_CHAIN
+    mini_stream_start = allocate(mini_stream)
+    entries = [(name, allocate(data), len(data)) if start is None else (name, start, data)
+               for name, start, data in entries]
+
+    # Setores da FAT no fim, descritos pela própria FAT
+    per_sector = sector_size // 4
+    fat_count = 1
+    while len(sectors) + fat_count > fat_count * per_sector:
+        fat_count += 1
+    fat_start = len(sectors)
+    fat.extend([FAT_SECTOR] * fat_count)
+    fat.extend([0xFFFFFFFF] * (fat_count * per_sector - len(fat)))
+    for index in range(fat_count):
+        sectors.append(struct.pack(f'<{per_sector}I', *fat[index * per_sector:(index + 1) * per_sector]))
+
+    # Diretório: raiz com os fluxos encadeados pelo irmão à direita
+    directory = bytearray(sector_size * 2)
+    records = [('Root Entry', 5, mini_stream_start, len(mini_stream))]
+    records += [(name, 2, start, size) for name, start, size in entries]
+    for index, (name, kind, start, size) in enumerate(records):
+        offset = index * 128
+        encoded = name.encode('utf-16-le')
+        directory[offset:offset + len(encoded)] = encoded
+        struct.pack_into('<HB', directory, offset + 0x40, len(encoded) + 2, kind)
+        right = index + 1 if 0 < index < len(records) - 1 else NO_STREAM
+        child = 1 if index == 0 else NO_STREAM
+        struct.pack_into('<III', directory, offset + 0x44, NO_STREAM, right, child)
+        struct.pack_into('<II', directory, offset + 0x74, start, size)
+    sectors[directory_start] = bytes(directory[:sector_size])
+    sectors[directory_start + 1] = bytes(directory[sector_size:])
+
+    header = bytearray(512)
+    header[0:8] = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+    struct.pack_into('<HHHHH', header, 0x18, 0x3E, 3 if sector_shift == 9 else 4, 0xFFFE,
+                     sector_shift, 6)
+    struct.pack_into('<IIIIIIII', header, 0x2C, fat_count, directory_start, 0, MINI_CUTOFF,
+                     mini_fat_start, 1 if mini_fat else 0, END_OF_CHAIN, 0)
+    difat = [fat_start + index for index in range(fat_count)]
+    difat += [0xFFFFFFFF] * (109 - len(difat))
+    struct.pack_into('<109I', header, 0x4C, *difat)
+    return bytes(header).ljust(sector_size, b'\0') + b''.join(sectors)
+
+
+def build_doc(pieces, ccp_text=None, table_stream='1Table', flags=0, small_table=False,
+              version=0xC1, sector_shift=9):
+    """
+    Monta um .doc cujo texto é a sequência de ``pieces`` ((texto, comprimida)),
+    com o FIB e a tabela de peças nos deslocamentos do Word 97.
+    """
+    word = bytearray(0x200)
+    cps, descriptors, cp = [0], b'', 0
+    for text, compressed in pieces:
+        if compressed:
+            fc = (len(word) * 2) | 0x40000000
+            word += text.encode('cp1252')
+        else:
+            fc = len(word)
+            word += text.encode('utf-16-le')
+        cp += len(text)
+        cps.append(cp)
+        descriptors += struct.pack('<HIH', 0, fc, 0)
+    word = word.ljust(MINI_CUTOFF + 512, b'\0')
+
+    plc = struct.pack(f'<{len(cps)}I', *cps) + descriptors
+    # Um Prc (propriedades) antes da tabela de peças, que deve ser ignorado
+    clx = b'\x01' + struct.pack('<h', 2) + b'\0\0' + b'\x02' + struct.pack('<I', len(plc)) + plc
+    table = bytes(16) + clx
+    if not small_table:
+        table = table.ljust(MINI_CUTOFF + 100, b'\0')
+
+    if table_stream == '1Table':
+        flags |= 0x0200
+    struct.pack_into('<HH', word, 0, 0xA5EC, version)
+    struct.pack_into('<H', word, 0x0A, flags)
+    struct.pack_into('<i', word, 0x4C, cp if ccp_text is None else ccp_text)
+    struct.pack_into('<II', word, 0x01A2, 16, len(clx))
+    return build_cfb({'WordDocument': bytes(word), table_stream: table}, sector_shift)
+
+
+BODY = [
+    ("Relatório anual\r", True),
+    ("Vendas \x13 HYPERLINK \"http://x\" \x14por região\x15 ordenadas\x01\r", True),
+    ("Região\x07Total\x07\x07Norte\x07€ 10\x07\x07", True),
+    ("Ωmega ≠ alfa\x0bsegunda linha\x0c", False),
+    ("Fim\x1eúltimo\r", True),
+]
+BODY_TEXT = ("Relatório anual\nVendas por região ordenadas\nRegião\tTotal\nNorte\t€ 10\n"
+             "Ωmega ≠ alfa\nsegunda linha\nFim-último")
+
+
+def read(data):
+    return read_doc_text(io.BytesIO(data))
+
+
+class TestReadDocText:
+    """Testes da leitura do texto pela tabela de peças."""
+
+    def test_mixed_pieces(self):
+        """Testa peças comprimidas e UTF-16, campos, tabelas e caracteres especiais."""
+        assert read(build_doc(BODY)) == BODY_TEXT
+
+    def test_only_main_document(self):
+        """Testa que o texto após ccpText (notas, cabeçalhos) fica de fora."""
+        pieces = BODY + [("nota de rodapé\r", True)]
+        ccp_text = sum(len(text) for text, _ in BODY)
+        assert read(build_doc(pieces, ccp_text=ccp_text)) == BODY_TEXT
+
+    def test_table_in_mini_stream(self):
+        """Testa o fluxo 0Table pequeno, guardado no mini stream."""
+        data = build_doc(BODY, table_stream='0Table', small_table=True)
+        assert read(data) == BODY_TEXT
+
+    def test_4096_byte_sectors(self):
+        """Testa contêineres da versão 4, com setores de 4096 bytes."""
+        assert read(build_doc(BODY, sector_shift=12)) == BODY_TEXT
+
+    def test_nested_fields(self):
+        """Testa que só o resultado do campo externo permanece."""
+        pieces = [("A \x13 IF \x13 PAGE \x14 1 \x15 = 1 \x14sim\x15 B\r", True)]
+        assert read(build_doc(pieces)) == "A sim B"
+
+    @pytest.mark.parametrize("data, message", [
+        (b"isto nao e um doc" * 100, "OLE2"),
+        (build_doc(BODY, flags=0x0100), "criptografado"),
+        (build_doc(BODY, version=0x65), "Word 97"),
+        (build_cfb({'Workbook': bytes(5000)}), "WordDocument"),
+    ])
+    def test_unreadable_documents(self, data, message):
+        """Testa o erro claro para o que o leitor interno não entende."""
+        with pytest.raises(DocReaderError, match=message):
+            read(data)
+
+    def test_truncated_file(self):
+        """Testa que um arquivo cortado vira DocReaderError, não IndexError."""
+        data = build_doc(BODY)
+        with pytest.raises(DocReaderError):
+            read(data[:len(data) // 2])
+
+
+class TestFileConverterDoc:
+    """Testes da conversão de .doc pelo FileConverter."""
+
+    def test_no_external_process(self, tmp_path, monkeypatch):
+        """Testa que o .doc é lido sem chamar antiword ou catdoc."""
+        converter = FileConverter()
+
+        def refuse(*args, **kwargs):
+            raise AssertionError("processo externo chamado")
+
+        monkeypatch.setattr(file_converter.subprocess, 'run', refuse)
+        path = tmp_path / "relatorio.doc"
+        path.write_bytes(build_doc(BODY))
+        assert asyncio.run(converter.convert_file(str(path), "relatorio.doc")) == BODY_TEXT
+
+    def test_falls_back_to_antiword(self, tmp_path, monkeypatch):
+        """Testa o antiword como alternativa para documentos criptografados."""
+        converter = FileConverter()
+        converter._antiword_available = True
+        monkeypatch.setattr(converter, '_convert_doc_with_antiword', lambda path: "texto do antiword")
+        path = tmp_path / "protegido.doc"
+        path.write_bytes(build_doc(BODY, flags=0x0100))
+        assert asyncio.run(converter.convert_file(str(path), "protegido.doc")) == "texto do antiword"
@@ -0,0 +1,202 @@
+"""
+Testes para a conversão em segmentos do FileConverter.
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import zipfile
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from file_converter import FileConverter, _group_lines
+
+SLIDE_XML = (
+    '<p:sld xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<a:t>{}</a:t></p:sld>'
+)
+
+
+def segment_texts(converter, path, filename, clean=False):
+    """Converte em segmentos e retorna apenas os textos."""
+    return [segment.text for segment in segments(converter, path, filename, clean)]
+
+
+def segments(converter, path, filename, clean=False):
+    return asyncio.run(converter.convert_segments(str(path), filename, clean))
+
+
+def convert(converter, path, filename):
+    return asyncio.run(converter.convert_file(str(path), filename))
+
+
+class TestSegments:
+    """Testes para a produção de texto em segmentos."""
+
+    def test_pptx_one_segment_per_slide_in_numeric_order(self, tmp_path):
+        """Testa um segmento por slide, com slide10 depois de slide2."""
+        path = tmp_path / "deck.pptx"
+        with zipfile.ZipFile(path, 'w') as archive:
+            for number in (1, 2, 10):
+                archive.writestr(f'ppt/slides/slide{number}.xml', SLIDE_XML.format(f'Slide {number}'))
+            archive.writestr('ppt/slides/_rels/slide1.xml.rels', '<Relationships/>')
+
+        converter = FileConverter()
+        result = segments(converter, path, "deck.pptx")
+        assert [(s.kind, s.index, s.name, s.text) for s in result] == [
+            ("slide", 0, "1", "Slide 1"),
+            ("slide", 1, "2", "Slide 2"),
+            ("slide", 2, "10", "Slide 10"),
+        ]
+        assert convert(converter, path, "deck.pptx") == "Slide 1\nSlide 2\nSlide 10"
+
+    def test_offsets_point_into_full_text(self, tmp_path):
+        """Testa que start/end localizam cada segmento no texto completo."""
+        path = tmp_path / "deck.pptx"
+        with zipfile.ZipFile(path, 'w') as archive:
+            for number, text in enumerate(["Abertura", "", "Resultados do trimestre"], 1):
+                archive.writestr(f'ppt/slides/slide{number}.xml', SLIDE_XML.format(text))
+
+        converter = FileConverter()
+        full_text = convert(converter, path, "deck.pptx")
+        result = segments(converter, path, "deck.pptx")
+        assert [s.name for s in result] == ["1", "3"]
+        for segment in result:
+            assert full_text[segment.start:segment.end] == segment.text
+        assert result[-1].end == len(full_text)
+
+    def test_xlsx_one_segment_per_sheet(self, tmp_path):
+        """Testa um segmento por planilha de XLSX, nomeado pela aba."""
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        workbook.active.title = "Primeira"
+        workbook.active.append(["a", 1])
+        workbook.create_sheet("Segunda").append(["b", 2])
+        path = tmp_path / "dados.xlsx"
+        workbook.save(path)
+
+        converter = FileConverter()
+        result = segments(converter, path, "dados.xlsx")
+        assert [(s.kind, s.name, s.text) for s in result] == [
+            ("sheet", "Primeira", "=== Planilha: Primeira ===\na\t1"),
+            ("sheet", "Segunda", "=== Planilha: Segunda ===\nb\t2"),
+        ]
+        assert convert(converter, path, "dados.xlsx") == "\n".join(s.text for s in result)
+
+    def test_csv_blocks_rejoin_to_full_text(self, tmp_path):
+        """Testa que os blocos de CSV reconstituem a conversão completa."""
+        path = tmp_path / "grande.csv"
+        path.write_text("".join(f"{i},{'x' * 100}\n" for i in range(2000)), encoding='utf-8')
+
+        converter = FileConverter()
+        texts = segment_texts(converter, path, "grande.csv")
+        assert len(texts) > 1
+        assert "\n".join(texts) == convert(converter, path, "grande.csv")
+
+    def test_format_without_reader_is_one_document_segment(self, tmp_path):
+        """Testa que formatos sem leitor incremental produzem um único segmento."""
+        path = tmp_path / "nota.txt"
+        path.write_text("linha 1\nlinha 2", encoding='utf-8')
+        result = segments(FileConverter(), path, "nota.txt")
+        assert [(s.kind, s.text, s.start, s.end) for s in result] == [
+            ("document", "linha 1\nlinha 2", 0, 15)
+        ]
+
+    def test_clean_drops_empty_segments(self, tmp_path):
+        """Testa que a limpeza se aplica por segmento e descarta os vazios."""
+        path = tmp_path / "deck.pptx"
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('ppt/slides/slide1.xml', SLIDE_XML.format("---"))
+            archive.writestr('ppt/slides/slide2.xml', SLIDE_XML.format("Texto   com   espaços"))
+        result = segments(FileConverter(), path, "deck.pptx", clean=True)
+        assert [(s.index, s.name, s.text, s.start) for s in result] == [
+            (0, "2", "Texto com espaços", 0)
+        ]
+
+    def test_unsupported_extension(self, tmp_path):
+        """Testa que extensões desconhecidas falham antes de produzir segmentos."""
+        path = tmp_path / "arquivo.xyz"
+        path.write_bytes(b"abc")
+        with pytest.raises(ValueError):
+            segment_texts(FileConverter(), path, "arquivo.xyz")
+
+    def test_read_errors_are_wrapped(self, tmp_path):
+        """Testa que falhas de leitura citam o nome do arquivo."""
+        path = tmp_path / "quebrado.pptx"
+        path.write_bytes(b"isto nao e zip")
+        with pytest.raises(Exception, match="quebrado.pptx"):
+            segment_texts(FileConverter(), path, "quebrado.pptx")
+
+
+def test_structured_output_defaults_to_pretty(tmp_path):
+    """Testa que JSON mantém a saída indentada, e paths só quando pedido."""
+    path = tmp_path / "dados.json"
+    path.write_text('{"a": {"b": [1, "x"]}}', encoding='utf-8')
+    assert convert(FileConverter(), path, "dados.json") == (
+        '{\n  "a": {\n    "b": [\n      1,\n      "x"\n    ]\n  }\n}'
+    )
+    assert convert(FileConverter(structured_mode='paths'), path, "dados.json") == (
+        "a.b[0]: 1\na.b[1]: x"
+    )
+
+
+def test_group_lines_never_splits_lines():
+    """Testa o agrupamento de linhas por tamanho."""
+    lines = ["a" * 4, "b" * 4, "c" * 4]
+    assert list(_group_lines(lines, max_chars=10)) == ["aaaa\nbbbb", "cccc"]
+    assert list(_group_lines([], max_chars=10)) == []
+
+
+class TestContentSniffing:
+    """Testes para a escolha do conversor pelo conteúdo."""
+
+    def write_docx(self, path):
+        docx = pytest.importorskip("docx")
+        document = docx.Document()
+        document.add_paragraph("Conteúdo do documento")
+        document.save(str(path))
+
+    def test_misnamed_doc_is_read_as_docx(self, tmp_path):
+        """Testa um .doc que na verdade é um DOCX."""
+        path = tmp_path / "relatorio.doc"
+        self.write_docx(path)
+        converter = FileConverter()
+        assert converter.resolve_extensions(str(path), "relatorio.doc") == ['.docx', '.doc']
+        assert convert(converter, path, "relatorio.doc") == "Conteúdo do documento"
+
+    def test_file_without_extension(self, tmp_path):
+        """Testa a detecção quando o nome não tem extensão."""
+        path = tmp_path / "download"
+        self.write_docx(path)
+        assert segment_texts(FileConverter(), path, "download") == ["Conteúdo do documento"]
+
+    def test_content_type_hint(self, tmp_path):
+        """Testa o Content-Type como último recurso para texto sem extensão."""
+        path = tmp_path / "download"
+        path.write_text("nome,idade\nAna,30\n", encoding='utf-8')
+        converter = FileConverter()
+        text = asyncio.run(converter.convert_file(str(path), "download", "text/csv; charset=utf-8"))
+        assert text == "nome\tidade\nAna\t30"
+
+    def test_text_extension_wins_over_text_detection(self, tmp_path):
+        """Testa que um .txt com cara de JSON continua sendo texto."""
+        path = tmp_path / "notas.txt"
+        path.write_text('{"não": "é json"', encoding='utf-8')
+        assert FileConverter().resolve_extensions(str(path), "notas.txt") == ['.txt']
+
+    def test_fallback_reports_every_attempt(self, tmp_path):
+        """Testa que, se todos os conversores falham, o erro cita cada tentativa."""
+        path = tmp_path / "planilha.xlsx"
+        path.write_bytes(b"%PDF-1.4\nisto nao e um pdf valido")
+        with pytest.raises(Exception, match=r"como \.pdf: .*como \.xlsx: "):
+            convert(FileConverter(), path, "planilha.xlsx")
+
+    def test_sniffing_disabled(self, tmp_path):
+        """Testa que a detecção pode ser desligada."""
+        path = tmp_path / "relatorio.doc"
+        self.write_docx(path)
+        converter = FileConverter(content_sniffing=False)
+        assert converter.resolve_extensions(str(path), "relatorio.doc") == ['.doc']
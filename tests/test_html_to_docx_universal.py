@@ -0,0 +1,172 @@
+"""
+Testes para o conversor HTML -> DOCX.
+"""
+
+import sys
+import os
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from html_to_docx_universal import convert_html_to_docx_universal
+
+
+def convert(html_content, tmp_path):
+    output_path = tmp_path / "saida.docx"
+    assert convert_html_to_docx_universal(html_content, str(output_path)) is True
+    return Document(str(output_path))
+
+
+class TestDocxRenderer:
+    """Testes para o percurso único da árvore HTML."""
+
+    def test_inline_runs_keep_spacing_and_nested_styles(self, tmp_path):
+        """Testa runs inline aninhados e espaçamento entre eles."""
+        doc = convert("<p>Texto <b>forte <i>e itálico</i></b> fim.</p>", tmp_path)
+        runs = doc.paragraphs[0].runs
+        assert [run.text for run in runs] == ["Texto ", "forte ", "e itálico", " fim."]
+        assert runs[2].bold is True and runs[2].italic is True
+        assert runs[3].bold is None
+
+    def test_nested_block_starts_new_paragraph(self, tmp_path):
+        """Testa se conteúdo após um bloco aninhado vai para outro parágrafo."""
+        doc = convert("<div>antes<p>meio</p>depois</div>", tmp_path)
+        assert [p.text for p in doc.paragraphs] == ["antes", "meio", "depois"]
+
+    def test_nested_tables(self, tmp_path):
+        """Testa se linhas de tabelas aninhadas não vazam para a tabela externa."""
+        html_content = (
+            "<table><tr><th>A</th><td><table><tr><td>x</td></tr>"
+            "<tr><td>y</td></tr></table></td></tr>"
+            "<tbody><tr><td>B</td><td>C</td></tr></tbody></table>"
+        )
+        doc = convert(html_content, tmp_path)
+        assert len(doc.tables) == 1
+        outer = doc.tables[0]
+        assert len(outer.rows) == 2
+        assert outer.cell(0, 0).text == "A"
+        assert outer.cell(0, 0).paragraphs[0].runs[0].bold is True
+        inner = outer.cell(0, 1).tables[0]
+        assert [row.cells[0].text for row in inner.rows] == ["x", "y"]
+        assert outer.cell(1, 1).text == "C"
+
+    def test_colspan(self, tmp_path):
+        """Testa mesclagem de células com colspan."""
+        doc = convert(
+            "<table><tr><td colspan='2'>AB</td></tr><tr><td>A</td><td>B</td></tr></table>",
+            tmp_path,
+        )
+        table = doc.tables[0]
+        assert len(table.columns) == 2
+        assert table.cell(0, 0).text == table.cell(0, 1).text == "AB"
+
+    def test_nested_lists(self, tmp_path):
+        """Testa estilos de lista por profundidade."""
+        doc = convert("<ul><li>um<ul><li>dois</li></ul></li></ul>", tmp_path)
+        styles = [(p.text, p.style.name) for p in doc.paragraphs]
+        assert styles == [("um", "List Bullet"), ("dois", "List Bullet 2")]
+
+    def test_deep_nesting_does_not_recurse(self, tmp_path):
+        """Testa HTML mais profundo que o limite de recursão do Python."""
+        depth = sys.getrecursionlimit() + 500
+        html_content = "<span>" * depth + "fundo" + "</span>" * depth
+        doc = convert(f"<p>{html_content}</p>", tmp_path)
+        assert doc.paragraphs[0].text == "fundo"
+
+    def test_skips_hidden_content(self, tmp_path):
+        """Testa se script, style e display:none não são renderizados."""
+        doc = convert(
+            "<html><head><style>.x{display:none}</style></head>"
+            "<body><p>ok</p><p class='x'>oculto</p><script>var a;</script></body></html>",
+            tmp_path,
+        )
+        assert [p.text for p in doc.paragraphs] == ["ok"]
+
+
+def styled(body, css, tmp_path):
+    """Converte ``body`` com a folha de estilos ``css`` e retorna os runs por texto."""
+    doc = convert(f"<html><head><style>{css}</style></head><body>{body}</body></html>", tmp_path)
+    runs = {}
+    for paragraph in doc.paragraphs:
+        for run in paragraph.runs:
+            runs[run.text] = (run, paragraph)
+    return runs
+
+
+def color_of(run):
+    return str(run.font.color.rgb) if run.font.color.type is not None else None
+
+
+class TestCascade:
+    """Testes para a cascata e herança de estilos aplicadas pelo renderizador."""
+
+    def test_descendant_and_compound_selectors(self, tmp_path):
+        """Testa seletores descendentes e compostos."""
+        runs = styled(
+            '<div class="box"><p class="nota">dentro</p></div><p class="nota">fora</p>',
+            "div.box p.nota { color: red; }", tmp_path,
+        )
+        assert color_of(runs["dentro"][0]) == "FF0000"
+        assert color_of(runs["fora"][0]) is None
+
+    def test_specificity_beats_source_order(self, tmp_path):
+        """Testa se a especificidade prevalece sobre a ordem."""
+        runs = styled('<p id="x" class="y">t</p>',
+                      "#x { color: blue; } .y { color: red; } p { color: green; }", tmp_path)
+        assert color_of(runs["t"][0]) == "0000FF"
+
+    def test_inline_and_important(self, tmp_path):
+        """Testa precedência de estilo inline e !important."""
+        runs = styled('<p class="y" style="color: red; font-size: 10pt">t</p>',
+                      ".y { color: blue !important; font-size: 30pt; }", tmp_path)
+        run = runs["t"][0]
+        assert color_of(run) == "0000FF"
+        assert run.font.size.pt == 10
+
+    def test_inheritance(self, tmp_path):
+        """Testa herança de propriedades herdáveis e estilos padrão."""
+        runs = styled('<div class="c"><p><b>t</b></p></div>',
+                      ".c { color: green; }", tmp_path)
+        run = runs["t"][0]
+        assert color_of(run) == "008000"
+        assert run.bold is True
+
+    def test_relative_font_size(self, tmp_path):
+        """Testa resolução de em relativo ao pai."""
+        runs = styled('<div><span>t</span></div>',
+                      "div { font-size: 20pt; } span { font-size: 1.5em; }", tmp_path)
+        assert runs["t"][0].font.size.pt == 30
+
+    def test_sibling_combinators(self, tmp_path):
+        """Testa combinadores de irmão adjacente e geral."""
+        runs = styled('<h2>a</h2><p>b</p><p>c</p>',
+                      "h2 + p { color: red; } h2 ~ p { font-style: italic; }", tmp_path)
+        assert color_of(runs["b"][0]) == "FF0000"
+        assert color_of(runs["c"][0]) is None
+        assert runs["c"][0].italic is True
+
+    def test_at_rules_are_skipped(self, tmp_path):
+        """Testa se blocos @media não quebram a interpretação."""
+        runs = styled('<p>t</p>', "@media print { p { color: red; } } p { color: blue; }", tmp_path)
+        assert color_of(runs["t"][0]) == "0000FF"
+
+    def test_attribute_selectors(self, tmp_path):
+        """Testa os operadores ~=, |=, ^= e valores entre aspas."""
+        runs = styled(
+            '<p class="x y" lang="pt-BR" title="a > b">par</p>'
+            '<p><a href="https://e.com" title="a b">link</a></p>',
+            "[class~=x] { color: red; } [lang|=pt] { font-style: italic; }"
+            " a[href^=http] { color: blue; } a[title=\"a b\"] { font-weight: bold; }"
+            " p[title='a > b'] { text-align: center; }",
+            tmp_path,
+        )
+        run, paragraph = runs["par"]
+        assert color_of(run) == "FF0000"
+        assert run.italic is True
+        assert paragraph.alignment == WD_ALIGN_PARAGRAPH.CENTER
+        link = runs["link"][0]
+        assert color_of(link) == "0000FF"
+        assert link.bold is True
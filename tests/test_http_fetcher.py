@@ -0,0 +1,147 @@
+"""
+Testes para o cliente HTTP compartilhado dos downloads.
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from http_fetcher import FetchError, HttpFetcher
+
+
+def make_fetcher(handler, **kwargs):
+    kwargs.setdefault('backoff', 0.001)
+    return HttpFetcher(transport=httpx.MockTransport(handler), **kwargs)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestFetch:
+    """Testes para o download de uma URL."""
+
+    def test_download_to_memory_and_file(self, tmp_path):
+        """Testa o download para a memória e direto para um arquivo."""
+        def handler(request):
+            return httpx.Response(200, content=b"conteudo", headers={"content-type": "text/csv"})
+
+        fetcher = make_fetcher(handler)
+        result = run(fetcher.fetch("http://storage/a.csv"))
+        assert result.content == b"conteudo"
+        assert result.content_type == "text/csv"
+
+        destination = tmp_path / "a.csv"
+        result = run(fetcher.fetch("http://storage/a.csv", destination=str(destination)))
+        assert result.content is None
+        assert result.size == 8
+        assert destination.read_bytes() == b"conteudo"
+
+    def test_conditional_request(self):
+        """Testa o envio dos validadores e a resposta 304 sem corpo."""
+        def handler(request):
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"etag": '"v1"'})
+            return httpx.Response(200, content=b"novo", headers={"etag": '"v2"'})
+
+        fetcher = make_fetcher(handler)
+        result = run(fetcher.fetch("http://storage/a.pdf", etag='"v1"',
+                                   last_modified="Mon, 01 Jan 2024 00:00:00 GMT"))
+        assert result.not_modified
+        assert result.content is None
+
+        result = run(fetcher.fetch("http://storage/a.pdf", etag='"v0"'))
+        assert not result.not_modified
+        assert result.etag == '"v2"'
+
+    def test_retries_transient_failures(self):
+        """Testa as novas tentativas após 503 e erro de conexão."""
+        responses = iter([
+            httpx.Response(503, headers={"retry-after": "0"}),
+            httpx.ConnectError("conexão recusada"),
+            httpx.Response(200, content=b"ok"),
+        ])
+
+        def handler(request):
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        result = run(make_fetcher(handler, retries=2).fetch("http://storage/a.csv"))
+        assert result.content == b"ok"
+        assert result.attempts == 3
+
+    def test_gives_up_after_retries(self):
+        """Testa o erro depois de esgotar as tentativas."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(502)
+
+        with pytest.raises(FetchError):
+            run(make_fetcher(handler, retries=1).fetch("http://storage/a.csv"))
+        assert len(calls) == 2
+
+    def test_client_errors_are_not_retried(self):
+        """Testa que 404 falha na primeira tentativa."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(404)
+
+        with pytest.raises(FetchError) as error:
+            run(make_fetcher(handler).fetch("http://storage/a.csv"))
+        assert error.value.status_code == 404
+        assert len(calls) == 1
+
+    @pytest.mark.parametrize("error", [
+        httpx.TooManyRedirects("redirecionamentos demais"),
+        httpx.DecodingError("gzip inválido"),
+    ])
+    def test_other_httpx_errors_become_fetch_errors(self, error):
+        """Testa que erros do httpx fora os de transporte viram FetchError sem nova tentativa."""
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise error
+
+        with pytest.raises(FetchError) as raised:
+            run(make_fetcher(handler, retries=2).fetch("http://storage/a.csv"))
+        assert not raised.value.invalid_url
+        assert len(calls) == 1
+
+
+def test_fetch_many_limits_each_host():
+    """Testa o download em lote com limite de conexões simultâneas por host."""
+    active = {"storage": 0, "outro": 0}
+    peak = {"storage": 0, "outro": 0}
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        if request.url.path == "/falha.csv":
+            return httpx.Response(404)
+        return httpx.Response(200, content=request.url.path.encode())
+
+    fetcher = make_fetcher(handler, max_per_host=2)
+    urls = [f"http://storage/{index}.csv" for index in range(6)]
+    urls += ["http://outro/falha.csv", "http://outro/b.csv"]
+    results = run(fetcher.fetch_many(urls))
+
+    assert [result.content for result in results[:6]] == [f"/{index}.csv".encode() for index in range(6)]
+    assert isinstance(results[6], FetchError)
+    assert results[7].content == b"/b.csv"
+    assert peak["storage"] == 2
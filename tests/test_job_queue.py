@@ -0,0 +1,305 @@
+"""
+Testes para a fila de conversões distribuída entre réplicas.
+"""
+
+import asyncio
+import os
+import socketserver
+import sys
+import threading
+import time
+import zipfile
+from collections import defaultdict, deque
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import job_queue
+from converter_service import ConverterServiceError
+from deadlines import DEADLINE_EXCEEDED, Deadline
+from file_converter import FileConverter
+from job_queue import (RESULT_SUFFIX, JobQueue, QueueWorker, RedisQueueBackend,
+                       SQLiteQueueBackend, create_backend)
+from segments import Segment
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                size = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(size + 2)[:-2])
+            self.wfile.write(self.server.execute(args))
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    """Servidor mínimo com os comandos do Redis usados pela fila."""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _RespHandler)
+        self.lists = defaultdict(deque)
+        self.condition = threading.Condition()
+
+    def execute(self, args):
+        command = args[0].upper()
+        if command == b'PING':
+            return b'+PONG\r\n'
+        if command in (b'AUTH', b'SELECT'):
+            return b'+OK\r\n'
+        if command == b'EXPIRE':
+            return b':1\r\n'
+        if command == b'RPUSH':
+            with self.condition:
+                self.lists[args[1]].extend(args[2:])
+                self.condition.notify_all()
+                return b':%d\r\n' % len(self.lists[args[1]])
+        if command == b'BLPOP':
+            keys, deadline = args[1:-1], time.monotonic() + float(args[-1])
+            with self.condition:
+                while True:
+                    for key in keys:
+                        if self.lists[key]:
+                            value = self.lists[key].popleft()
+                            return b'*2\r\n$%d\r\n%s\r\n$%d\r\n%s\r\n' % (len(key), key, len(value), value)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return b'*-1\r\n'
+                    self.condition.wait(remaining)
+        return b'-ERR unknown command\r\n'
+
+
+@pytest.fixture
+def resp_server():
+    server = RespStandIn()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'sqlite':
+        queue_backend = SQLiteQueueBackend(str(tmp_path / "fila.db"), poll_interval=0.01)
+    else:
+        server = request.getfixturevalue('resp_server')
+        queue_backend = RedisQueueBackend(f"redis://127.0.0.1:{server.server_address[1]}/1")
+    yield queue_backend
+    queue_backend.close()
+
+
+@pytest.fixture(autouse=True)
+def short_polls(monkeypatch):
+    monkeypatch.setattr(job_queue, 'POLL_TIMEOUT', 0.05)
+
+
+class TestBackends:
+    """Testes do contrato comum aos backends."""
+
+    def test_jobs_are_fifo(self, backend):
+        """Testa a ordem de saída dos trabalhos e a espera sem trabalho."""
+        backend.push_job('{"id": "1"}')
+        backend.push_job('{"id": "2"}')
+        assert backend.pop_job(0.1) == '{"id": "1"}'
+        assert backend.pop_job(0.1) == '{"id": "2"}'
+        started = time.monotonic()
+        assert backend.pop_job(0.1) is None
+        assert time.monotonic() - started >= 0.09
+
+    def test_results_are_delivered_by_job(self, backend):
+        """Testa que cada resultado só é entregue a quem espera aquele trabalho."""
+        backend.push_result('a', 'resultado a')
+        assert backend.pop_result('b', 0.05) is None
+        assert backend.pop_result('a', 0.05) == 'resultado a'
+        assert backend.pop_result('a', 0.05) is None
+
+    def test_blocked_pop_wakes_up(self, backend):
+        """Testa que a espera termina assim que o trabalho chega."""
+        timer = threading.Timer(0.05, backend.push_job, ('{"id": "tarde"}',))
+        timer.start()
+        assert backend.pop_job(5) == '{"id": "tarde"}'
+
+
+def test_create_backend(tmp_path):
+    """Testa a escolha do backend pela URL."""
+    assert isinstance(create_backend(f"sqlite:///{tmp_path}/fila.db"), SQLiteQueueBackend)
+    redis = create_backend("redis://:segredo@fila:6380/2")
+    assert (redis.host, redis.port, redis.password, redis.db) == ("fila", 6380, "segredo", 2)
+    with pytest.raises(ValueError):
+        create_backend("amqp://fila")
+
+
+def test_unreachable_redis():
+    """Testa o erro claro quando o servidor da fila não responde."""
+    with socketserver.TCPServer(('127.0.0.1', 0), socketserver.BaseRequestHandler) as server:
+        port = server.server_address[1]
+    with pytest.raises(ConverterServiceError):
+        RedisQueueBackend(f"redis://127.0.0.1:{port}").push_job('{}')
+
+
+def run_with_workers(workers, scenario):
+    """Executa ``scenario()`` com os nós conversores retirando trabalhos."""
+    async def run():
+        stop = asyncio.Event()
+        tasks = [asyncio.ensure_future(worker.run(stop)) for worker in workers]
+        try:
+            return await scenario()
+        finally:
+            stop.set()
+            await asyncio.gather(*tasks)
+    return asyncio.run(run())
+
+
+def test_conversion_through_the_queue(backend, tmp_path):
+    """Testa texto, segmentos e erros passando pela fila e pelo volume compartilhado."""
+    csv_path = tmp_path / "dados.csv"
+    csv_path.write_text("a,b\n1,2\n", encoding='utf-8')
+    json_path = tmp_path / "dados.json"
+    json_path.write_text('{"a": {"b": "texto"}}', encoding='utf-8')
+    bad_path = tmp_path / "dados.xyz"
+    bad_path.write_bytes(b"\x00\x01")
+
+    queue = JobQueue(backend, timeout=5)
+    worker = QueueWorker(backend, FileConverter(), concurrency=1)
+
+    async def scenario():
+        text = await queue.convert_file(str(csv_path), "dados.csv")
+        segments = await queue.convert_segments(str(json_path), "dados.json")
+        with pytest.raises(ValueError):
+            await queue.convert_file(str(bad_path), "dados.xyz")
+        return text, segments
+
+    text, segments = run_with_workers([worker], scenario)
+    assert text == "a\tb\n1\t2"
+    assert isinstance(segments[0], Segment)
+    assert "texto" in segments[0].text
+    assert not list(tmp_path.glob(f"*{RESULT_SUFFIX}"))
+
+
+def test_deadline_through_the_queue(tmp_path):
+    """Testa o prazo contado desde o envio e o corte devolvido a quem enfileirou."""
+    backend = SQLiteQueueBackend(str(tmp_path / "fila.db"), poll_interval=0.01)
+    path = tmp_path / "deck.pptx"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('ppt/presentation.xml', '<p/>')
+        for number in (1, 2):
+            archive.writestr(f'ppt/slides/slide{number}.xml', f'<p><t>Slide {number}</t></p>')
+
+    queue = JobQueue(backend, timeout=5)
+    worker = QueueWorker(backend, FileConverter(), concurrency=1)
+    deadline = Deadline(0)
+
+    async def scenario():
+        return await queue.convert_file(str(path), "deck.pptx", deadline=deadline)
+
+    assert run_with_workers([worker], scenario) == "Slide 1"
+    assert deadline.reason == DEADLINE_EXCEEDED
+
+
+class SlowConverter:
+    """Conversor que registra em qual nó cada arquivo foi convertido."""
+
+    def __init__(self, node, log):
+        self.node = node
+        self.log = log
+
+    async def convert_file(self, file_path, filename, content_type=None, deadline=None):
+        await asyncio.sleep(0.1)
+        self.log.append(self.node)
+        return self.node
+
+
+def test_idle_nodes_share_a_burst(tmp_path):
+    """Testa que uma rajada enfileirada por uma réplica é dividida entre os nós."""
+    backend = SQLiteQueueBackend(str(tmp_path / "fila.db"), poll_interval=0.01)
+    paths = []
+    for index in range(6):
+        path = tmp_path / f"{index}.pptx"
+        path.write_bytes(b"x")
+        paths.append(str(path))
+
+    log = []
+    workers = [QueueWorker(backend, SlowConverter(node, log), concurrency=1)
+               for node in ("no-1", "no-2", "no-3")]
+    queue = JobQueue(backend, timeout=5)
+
+    async def scenario():
+        return await asyncio.gather(*(queue.convert_file(path, os.path.basename(path))
+                                      for path in paths))
+
+    results = run_with_workers(workers, scenario)
+    assert sorted(results) == sorted(log)
+    assert set(log) == {"no-1", "no-2", "no-3"}
+
+
+def test_timeout_and_expired_jobs(tmp_path):
+    """Testa o 503 ao fim do prazo e o descarte do trabalho vencido."""
+    backend = SQLiteQueueBackend(str(tmp_path / "fila.db"), poll_interval=0.01)
+    path = tmp_path / "dados.csv"
+    path.write_text("a,b\n", encoding='utf-8')
+
+    with pytest.raises(ConverterServiceError):
+        asyncio.run(JobQueue(backend, timeout=0.1).convert_file(str(path), "dados.csv"))
+
+    # O trabalho ficou na fila com o prazo vencido: o nó não converte
+    log = []
+    worker = QueueWorker(backend, SlowConverter("no-1", log), concurrency=1)
+
+    async def scenario():
+        await asyncio.sleep(0.2)
+
+    run_with_workers([worker], scenario)
+    assert log == []
+    assert backend.pop_job(0) is None
+
+
+def test_timed_out_job_leaves_no_files(tmp_path):
+    """Testa que o trabalho que a API abandonou não deixa entrada nem resultado."""
+    backend = SQLiteQueueBackend(str(tmp_path / "fila.db"), poll_interval=0.01)
+    path = tmp_path / "dados.csv"
+    path.write_text("a,b\n", encoding='utf-8')
+
+    log = []
+    worker = QueueWorker(backend, SlowConverter("no-1", log), concurrency=1)
+    queue = JobQueue(backend, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(ConverterServiceError):
+            await queue.convert_file(str(path), "dados.csv")
+        # O nó termina a conversão depois que a API desistiu
+        await asyncio.sleep(0.2)
+
+    run_with_workers([worker], scenario)
+    assert log == ["no-1"]
+    assert not path.exists()
+    assert not list(tmp_path.glob(f"*{RESULT_SUFFIX}*"))
+
+
+def test_result_of_abandoned_job_is_removed(tmp_path):
+    """Testa que o resultado é apagado se a entrada some durante a conversão."""
+    backend = SQLiteQueueBackend(str(tmp_path / "fila.db"), poll_interval=0.01)
+    path = tmp_path / "dados.csv"
+    path.write_text("a,b\n", encoding='utf-8')
+
+    class AbandonedDuringConversion:
+        async def convert_file(self, file_path, filename, content_type=None, deadline=None):
+            os.unlink(file_path)
+            return "texto"
+
+    worker = QueueWorker(backend, AbandonedDuringConversion(), concurrency=1)
+    asyncio.run(worker.process({
+        'id': 'abandonado', 'method': 'convert_file', 'file_path': str(path),
+        'filename': 'dados.csv', 'deadline': time.time() + 60,
+    }))
+    assert not list(tmp_path.glob(f"*{RESULT_SUFFIX}*"))
+    assert backend.pop_result('abandonado', 0) is None
+    worker.close()
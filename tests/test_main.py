@@ -0,0 +1,71 @@
+"""
+Testes para os endpoints de conversão da API.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+API_KEY = "chave-de-teste"
+os.environ.setdefault("API_KEY", API_KEY)
+
+try:
+    import main
+except SystemExit:
+    # main encerra o processo quando falta o Pandoc
+    pytest.skip("dependências externas da API ausentes", allow_module_level=True)
+
+from fastapi.testclient import TestClient
+
+from http_fetcher import FetchError
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def temp_dir(tmp_path, monkeypatch):
+    """Isola os arquivos temporários da requisição em um diretório vazio."""
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    return tmp_path
+
+
+def post_url(client, stream):
+    return client.post(
+        "/convert/url",
+        params={"stream": str(stream).lower(), "format": "segments"},
+        json={"url": "http://storage/relatorio.pdf"},
+        headers={"x-api-key": os.environ["API_KEY"]},
+    )
+
+
+class TestConvertFromUrl:
+    """Testes para o download e a conversão de uma URL."""
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_failed_download_leaves_no_temp_file(self, client, temp_dir, monkeypatch, stream):
+        """Testa que o arquivo temporário é removido quando o download falha."""
+        async def failing_fetch(url, destination=None, **kwargs):
+            with open(destination, 'wb') as file:
+                file.write(b"parcial")
+            raise FetchError("HTTP 500 ao baixar " + url, status_code=500)
+
+        monkeypatch.setattr(main.http_fetcher, 'fetch', failing_fetch)
+        response = post_url(client, stream)
+        assert response.status_code == 502
+        assert list(temp_dir.iterdir()) == []
+
+    def test_invalid_url_is_client_error(self, client, temp_dir, monkeypatch):
+        """Testa que uma URL recusada pelo cliente HTTP resulta em 400."""
+        async def rejecting_fetch(url, destination=None, **kwargs):
+            raise FetchError("esquema não suportado", invalid_url=True)
+
+        monkeypatch.setattr(main.http_fetcher, 'fetch', rejecting_fetch)
+        assert post_url(client, stream=False).status_code == 400
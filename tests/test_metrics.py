@@ -0,0 +1,152 @@
+"""
+Testes para o registro de métricas e sua agregação entre processos.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from metrics import COUNTER, GAUGE, HISTOGRAM, MetricsRegistry, directory_usage
+
+
+def make_registry(directory, **kwargs):
+    registry = MetricsRegistry(directory=str(directory), **kwargs)
+    registry.define('requests_total', COUNTER, 'Requisições.')
+    registry.define('duration_seconds', HISTOGRAM, 'Duração.', buckets=(0.1, 1.0))
+    registry.define('in_flight', GAUGE, 'Em andamento.')
+    return registry
+
+
+def dead_pid():
+    """PID de um processo que já terminou."""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def write_snapshot(directory, pid, **snapshot):
+    with open(os.path.join(str(directory), f'{pid}.json'), 'w', encoding='utf-8') as file:
+        json.dump(snapshot, file)
+
+
+class TestMetricsRegistry:
+    """Testes para a exposição de um único processo."""
+
+    def test_counter_and_labels(self, tmp_path):
+        """Testa contadores por rótulo, com escape de aspas."""
+        registry = make_registry(tmp_path)
+        registry.inc('requests_total', endpoint='/convert/file', status=200)
+        registry.inc('requests_total', 2, endpoint='/convert/file', status=200)
+        registry.inc('requests_total', endpoint='a"b', status=500)
+        text = registry.render()
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{endpoint="/convert/file",status="200"} 3' in text
+        assert 'requests_total{endpoint="a\\"b",status="500"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self, tmp_path):
+        """Testa limites cumulativos, soma e contagem do histograma."""
+        registry = make_registry(tmp_path)
+        for value in (0.05, 0.5, 5.0):
+            registry.observe('duration_seconds', value, format='pdf')
+        lines = registry.render().splitlines()
+        assert 'duration_seconds_bucket{format="pdf",le="0.1"} 1' in lines
+        assert 'duration_seconds_bucket{format="pdf",le="1"} 2' in lines
+        assert 'duration_seconds_bucket{format="pdf",le="+Inf"} 3' in lines
+        assert 'duration_seconds_sum{format="pdf"} 5.55' in lines
+        assert 'duration_seconds_count{format="pdf"} 3' in lines
+
+    def test_timer(self, tmp_path):
+        """Testa que o timer registra a duração mesmo com exceção."""
+        registry = make_registry(tmp_path)
+        with pytest.raises(RuntimeError):
+            with registry.timer('duration_seconds', tool='pandoc'):
+                raise RuntimeError("falhou")
+        assert 'duration_seconds_count{tool="pandoc"} 1' in registry.render()
+
+    def test_disabled_registry_records_nothing(self, tmp_path):
+        """Testa que o registro desabilitado ignora atualizações."""
+        registry = make_registry(tmp_path / "metrics", enabled=False)
+        registry.inc('requests_total')
+        registry.flush()
+        assert not (tmp_path / "metrics").exists()
+
+    def test_collectors_run_at_scrape_time(self, tmp_path):
+        """Testa medidores calculados na coleta."""
+        registry = make_registry(tmp_path)
+        registry.register_collector(lambda: [('in_flight', {'dir': 'tmp'}, 7)])
+        assert 'in_flight{dir="tmp"} 7' in registry.render()
+
+
+class TestAggregation:
+    """Testes para a soma dos retratos de vários workers."""
+
+    def test_sums_counters_and_histograms_of_all_workers(self, tmp_path):
+        """Testa a soma com o retrato de outro processo em execução."""
+        registry = make_registry(tmp_path)
+        registry.inc('requests_total', status=200)
+        registry.observe('duration_seconds', 0.5)
+        write_snapshot(tmp_path, os.getppid(),
+                       counters=[['requests_total', [['status', '200']], 4]],
+                       gauges=[['in_flight', [], 2]],
+                       histograms=[['duration_seconds', [], [1, 0], 0.05, 1]])
+        lines = registry.render().splitlines()
+        assert 'requests_total{status="200"} 5' in lines
+        assert 'duration_seconds_bucket{le="0.1"} 1' in lines
+        assert 'duration_seconds_bucket{le="1"} 2' in lines
+        assert 'duration_seconds_count 2' in lines
+        assert 'in_flight 2' in lines
+
+    def test_gauges_of_dead_workers_are_ignored(self, tmp_path):
+        """Testa que medidores de processos encerrados não contam."""
+        registry = make_registry(tmp_path)
+        registry.add('in_flight', 1)
+        write_snapshot(tmp_path, dead_pid(),
+                       counters=[], gauges=[['in_flight', [], 5]], histograms=[])
+        assert 'in_flight 1' in registry.render().splitlines()
+
+    def test_startup_removes_snapshots_of_dead_workers(self, tmp_path):
+        """Testa a limpeza dos retratos órfãos na primeira gravação."""
+        pid = dead_pid()
+        write_snapshot(tmp_path, pid, counters=[], gauges=[], histograms=[])
+        registry = make_registry(tmp_path)
+        registry.flush()
+        assert not (tmp_path / f'{pid}.json').exists()
+        assert (tmp_path / f'{os.getpid()}.json').exists()
+
+    def test_ignores_unreadable_snapshots(self, tmp_path):
+        """Testa que um retrato corrompido não derruba a coleta."""
+        (tmp_path / f'{os.getppid()}.json').write_text('{incompleto', encoding='utf-8')
+        registry = make_registry(tmp_path)
+        registry.inc('requests_total')
+        assert 'requests_total 1' in registry.render().splitlines()
+
+    def test_drain_and_merge(self, tmp_path):
+        """Testa a transferência das métricas de um processo filho para o pai."""
+        child = make_registry(tmp_path)
+        child.inc('requests_total', endpoint='/convert/file')
+        child.observe('duration_seconds', 0.5)
+        snapshot = child.drain()
+        assert child.drain()['counters'] == []
+
+        parent = make_registry(tmp_path)
+        parent.merge(snapshot)
+        parent.merge(snapshot)
+        counters, _, histograms = parent.collect()
+        assert counters[('requests_total', (('endpoint', '/convert/file'),))] == 2
+        assert histograms[('duration_seconds', ())][2] == 2
+
+
+def test_directory_usage(tmp_path):
+    """Testa a soma de bytes e arquivos, com e sem subdiretórios."""
+    (tmp_path / "a.txt").write_bytes(b"12345")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.txt").write_bytes(b"123")
+    assert directory_usage(str(tmp_path)) == (8, 2)
+    assert directory_usage(str(tmp_path), recursive=False) == (5, 1)
+    assert directory_usage(str(tmp_path / "inexistente")) == (0, 0)
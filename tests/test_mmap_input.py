@@ -0,0 +1,134 @@
+"""
+Testes para o acesso às entradas por mapeamento em memória.
+"""
+
+import asyncio
+import hashlib
+import io
+import mmap
+import os
+import sys
+import zipfile
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import mmap_input
+from file_converter import FileConverter
+from mmap_input import InputFile, open_input
+
+CONTENT = "linha 1\r\nlinha 2 com acentuação\rlinha 3\n".encode('utf-8') * 1000
+
+
+@pytest.fixture(params=[True, False], ids=['mapeado', 'leitura'])
+def source(request, tmp_path):
+    path = tmp_path / "dados.txt"
+    path.write_bytes(CONTENT)
+    source = InputFile(str(path), threshold=0 if request.param else len(CONTENT) + 1)
+    assert source.mapped == request.param
+    yield source
+    source.close()
+
+
+class TestInputFile:
+    """Testes da mesma interface com e sem mapeamento."""
+
+    def test_head_and_hash(self, source):
+        """Testa o prefixo e o SHA-256 do conteúdo."""
+        assert source.head(7) == b"linha 1"
+        assert source.sha256() == hashlib.sha256(CONTENT).hexdigest()
+
+    def test_text_with_normalized_newlines(self, source):
+        """Testa a decodificação completa e a incremental, com quebras normalizadas."""
+        expected = CONTENT.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+        assert source.read_text() == expected
+        with source.open_text() as file:
+            assert file.readline() == "linha 1\n"
+            assert file.read(5) == "linha"
+
+    def test_reader(self, source):
+        """Testa leitura, posicionamento e readinto do arquivo binário."""
+        with source.reader() as file:
+            assert file.read(5) == b"linha"
+            file.seek(-4, io.SEEK_END)
+            assert file.read() == CONTENT[-4:]
+            file.seek(0)
+            buffer = bytearray(7)
+            assert file.readinto(buffer) == 7
+            assert bytes(buffer) == b"linha 1"
+            assert file.tell() == 7
+
+
+def test_zip_opens_from_the_mapping(tmp_path):
+    """Testa a abertura de um pacote ZIP sobre o mapeamento."""
+    path = tmp_path / "pacote.zip"
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('a.xml', '<a>texto</a>' * 1000)
+    source = InputFile(str(path), threshold=0)
+    try:
+        assert source.mapped
+        with source.reader() as file, zipfile.ZipFile(file) as archive:
+            assert archive.read('a.xml') == b'<a>texto</a>' * 1000
+    finally:
+        source.close()
+
+
+def test_empty_file(tmp_path):
+    """Testa que arquivos vazios não são mapeados."""
+    path = tmp_path / "vazio.txt"
+    path.write_bytes(b"")
+    source = InputFile(str(path), threshold=0)
+    assert not source.mapped
+    assert source.read_text() == ""
+    assert source.sha256() == hashlib.sha256(b"").hexdigest()
+
+
+def test_falls_back_when_mapping_fails(tmp_path, monkeypatch):
+    """Testa a leitura comum quando o mmap falha (ex.: sob RLIMIT_AS)."""
+    def refuse(*args, **kwargs):
+        raise OSError(12, "Cannot allocate memory")
+
+    monkeypatch.setattr(mmap, 'mmap', refuse)
+    path = tmp_path / "dados.txt"
+    path.write_bytes(b"abc")
+    source = InputFile(str(path), threshold=0)
+    assert not source.mapped
+    assert source.read_text() == "abc"
+
+
+def test_open_input_shares_the_mapping(tmp_path, monkeypatch):
+    """Testa que aberturas aninhadas reaproveitam o mapeamento até a última sair."""
+    monkeypatch.setattr(mmap_input, 'MMAP_THRESHOLD', 0)
+    path = tmp_path / "dados.txt"
+    path.write_bytes(CONTENT)
+
+    with open_input(str(path)) as outer:
+        with open_input(str(path)) as inner:
+            assert inner is outer
+        assert outer.mapped
+    assert not outer.mapped
+
+
+def test_conversion_maps_the_file_once(tmp_path, monkeypatch):
+    """Testa que a detecção do formato e o conversor usam o mesmo mapeamento."""
+    monkeypatch.setattr(mmap_input, 'MMAP_THRESHOLD', 0)
+    opened = []
+    original_init = InputFile.__init__
+
+    def counting_init(self, *args, **kwargs):
+        opened.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(InputFile, '__init__', counting_init)
+
+    path = tmp_path / "deck.bin"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('ppt/presentation.xml', '<p/>')
+        archive.writestr('ppt/slides/slide1.xml', '<p><t>Olá</t></p>')
+
+    text = asyncio.run(FileConverter().convert_file(str(path), "deck.bin"))
+    assert text == "Olá"
+    assert len(opened) == 1
+    assert not opened[0].mapped
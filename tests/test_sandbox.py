@@ -0,0 +1,140 @@
+"""
+Testes para as conversões isoladas com orçamento de memória e de CPU.
+"""
+
+import asyncio
+import os
+import signal
+import sys
+import zipfile
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tracing
+from deadlines import DEADLINE_EXCEEDED, Deadline
+from sandbox import CPU_TIME, CRASHED, MEMORY, SandboxLimitExceeded, SandboxPool
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'),
+                                reason="limites de recursos medidos via /proc")
+
+
+# Funções executadas no processo filho (precisam estar no nível do módulo)
+
+def child_pid(converter):
+    return os.getpid()
+
+
+def allocate(converter, megabytes):
+    block = bytearray(megabytes * 1024 * 1024)
+    # Toca as páginas para que entrem no RSS
+    for position in range(0, len(block), 4096):
+        block[position] = 1
+    return len(block)
+
+
+def spin(converter):
+    while True:
+        pass
+
+
+def crash(converter):
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+@pytest.fixture
+def pool():
+    sandbox = SandboxPool(workers=1, memory_limit_mb=400, address_space_mb=0,
+                          cpu_seconds=1, max_jobs_per_worker=2)
+    yield sandbox
+    sandbox.shutdown()
+
+
+def test_convert_file_in_child(pool, tmp_path):
+    """Testa a conversão no filho, com as fases devolvidas ao rastro do pai."""
+    path = tmp_path / "dados.csv"
+    path.write_text("a,b\n1,2\n", encoding='utf-8')
+
+    async def scenario():
+        trace, token = tracing.start_trace()
+        try:
+            text = await pool.convert_file(str(path), "dados.csv")
+        finally:
+            tracing.end_trace(token)
+        return text, trace
+
+    text, trace = asyncio.run(scenario())
+    assert text == "a\tb\n1\t2"
+    assert 'extract' in trace.spans
+
+
+def test_truncation_returns_to_parent(pool, tmp_path):
+    """Testa o prazo enviado ao filho e o corte devolvido ao prazo do pai."""
+    path = tmp_path / "deck.pptx"
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('ppt/presentation.xml', '<p/>')
+        for number in (1, 2):
+            archive.writestr(f'ppt/slides/slide{number}.xml', f'<p><t>Slide {number}</t></p>')
+
+    deadline = Deadline(0)
+    text = asyncio.run(pool.convert_file(str(path), "deck.pptx", deadline=deadline))
+    assert text == "Slide 1"
+    assert deadline.reason == DEADLINE_EXCEEDED
+
+
+def test_converter_errors_are_raised(pool, tmp_path):
+    """Testa que o erro do conversor chega ao pai com o tipo original."""
+    path = tmp_path / "dados.xyz"
+    path.write_bytes(b"\x00\x01")
+    with pytest.raises(ValueError):
+        asyncio.run(pool.convert_file(str(path), "dados.xyz"))
+
+
+def test_rss_limit(pool):
+    """Testa que o filho acima do orçamento de RSS é encerrado com 413."""
+    with pytest.raises(SandboxLimitExceeded) as error:
+        asyncio.run(pool.run(allocate, 600))
+    assert error.value.reason == MEMORY
+    assert error.value.status_code == 413
+    # O pool continua atendendo com um filho novo
+    assert asyncio.run(pool.run(allocate, 10)) == 10 * 1024 * 1024
+
+
+def test_address_space_limit():
+    """Testa que o RLIMIT_AS transforma a alocação excessiva em 413."""
+    sandbox = SandboxPool(workers=1, memory_limit_mb=0, address_space_mb=1024, cpu_seconds=0)
+    try:
+        with pytest.raises(SandboxLimitExceeded) as error:
+            asyncio.run(sandbox.run(allocate, 2048))
+        assert error.value.reason == MEMORY
+    finally:
+        sandbox.shutdown()
+
+
+def test_cpu_limit(pool):
+    """Testa que o laço infinito é interrompido pelo limite de CPU com 422."""
+    with pytest.raises(SandboxLimitExceeded) as error:
+        asyncio.run(pool.run(spin))
+    assert error.value.reason == CPU_TIME
+    assert error.value.status_code == 422
+
+
+def test_crash_does_not_take_down_the_pool(pool):
+    """Testa que a queda do filho vira erro da conversão, não do serviço."""
+    with pytest.raises(SandboxLimitExceeded) as error:
+        asyncio.run(pool.run(crash))
+    assert error.value.reason == CRASHED
+    assert asyncio.run(pool.run(child_pid)) != os.getpid()
+
+
+def test_workers_are_recycled(pool):
+    """Testa a troca do filho depois de max_jobs_per_worker conversões."""
+    async def pids():
+        return [await pool.run(child_pid) for _ in range(3)]
+
+    first, second, third = asyncio.run(pids())
+    assert first == second
+    assert third != first
+
@@ -0,0 +1,33 @@
+"""
+Testes para os segmentos de texto.
+"""
+
+import sys
+import os
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from segments import SEGMENT_SEPARATOR, SEGMENT_SHEET, Segment, SegmentBuilder
+
+
+class TestSegmentBuilder:
+    """Testes para a numeração e os deslocamentos dos segmentos."""
+
+    def test_offsets_account_for_separator(self):
+        """Testa que os deslocamentos seguem o texto unido por quebras de linha."""
+        builder = SegmentBuilder(SEGMENT_SHEET)
+        first = builder.add("abc", "Plan1")
+        second = builder.add("de", "Plan2")
+
+        full_text = SEGMENT_SEPARATOR.join([first.text, second.text])
+        assert (first.index, first.start, first.end) == (0, 0, 3)
+        assert (second.index, second.start, second.end) == (1, 4, 6)
+        assert full_text[second.start:second.end] == "de"
+
+    def test_to_dict(self):
+        """Testa a serialização usada nas respostas da API."""
+        segment = Segment(kind='page', index=2, text="x", name="3", start=10, end=11)
+        assert segment.to_dict() == {
+            'kind': 'page', 'index': 2, 'text': "x", 'name': "3", 'start': 10, 'end': 11,
+        }
@@ -0,0 +1,93 @@
+"""
+Testes para a gravação das entradas com hash na mesma passada.
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import spooling
+from spooling import SpoolHasher, spool_bytes, spool_upload
+
+CONTENT = b"conteudo do upload " * 100000
+
+
+class FakeUpload:
+    """Upload com a leitura em blocos do ``UploadFile``, registrando os tamanhos pedidos."""
+
+    def __init__(self, data: bytes, fail_after: int = None):
+        self.data = data
+        self.position = 0
+        self.reads = []
+        self.fail_after = fail_after
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        if self.fail_after is not None and self.position >= self.fail_after:
+            raise ConnectionResetError("cliente desconectou")
+        end = len(self.data) if size < 0 else self.position + size
+        chunk = self.data[self.position:end]
+        self.position += len(chunk)
+        return chunk
+
+
+def test_hasher_matches_hashlib():
+    """Testa tamanho e SHA-256 acumulados bloco a bloco."""
+    hasher = SpoolHasher(fast_hash=False)
+    for start in range(0, len(CONTENT), 4096):
+        hasher.update(CONTENT[start:start + 4096])
+    assert hasher.size == len(CONTENT)
+    assert hasher.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert hasher.xxhash is None
+
+
+def test_fast_hash():
+    """Testa o xxh3-64 opcional, quando o pacote está instalado."""
+    xxhash = pytest.importorskip("xxhash")
+    hasher = SpoolHasher(fast_hash=True)
+    hasher.update(CONTENT)
+    assert hasher.xxhash == xxhash.xxh3_64(CONTENT).hexdigest()
+
+
+def test_spool_upload_in_chunks(monkeypatch):
+    """Testa a cópia em blocos, sem ler o upload inteiro de uma vez."""
+    monkeypatch.setattr(spooling, 'SPOOL_CHUNK_SIZE', 64 * 1024)
+    upload = FakeUpload(CONTENT)
+    result = asyncio.run(spool_upload(upload, suffix="_dados.txt"))
+    try:
+        assert result.path.endswith("_dados.txt")
+        assert result.size == len(CONTENT)
+        assert result.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        with open(result.path, 'rb') as file:
+            assert file.read() == CONTENT
+        assert set(upload.reads) == {64 * 1024}
+    finally:
+        os.unlink(result.path)
+
+
+def test_spool_upload_removes_partial_file(monkeypatch, tmp_path):
+    """Testa que um upload interrompido não deixa o arquivo parcial no disco."""
+    monkeypatch.setattr(spooling, 'SPOOL_CHUNK_SIZE', 64 * 1024)
+    monkeypatch.setattr(spooling.tempfile, 'tempdir', str(tmp_path))
+    with pytest.raises(ConnectionResetError):
+        asyncio.run(spool_upload(FakeUpload(CONTENT, fail_after=128 * 1024)))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spool_bytes():
+    """Testa a gravação de conteúdo já em memória (HTML do /generate)."""
+    data = "<p>Olá</p>".encode('utf-8')
+    result = spool_bytes(data, suffix=".html")
+    try:
+        assert result.path.endswith(".html")
+        assert (result.size, result.sha256) == (len(data), hashlib.sha256(data).hexdigest())
+        with open(result.path, 'rb') as file:
+            assert file.read() == data
+    finally:
+        os.unlink(result.path)
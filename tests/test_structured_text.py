@@ -0,0 +1,108 @@
+"""
+Testes para o achatamento em fluxo de JSON e YAML.
+"""
+
+import pytest
+import sys
+import os
+import io
+import json
+import time
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from structured_text import format_path, iter_json_lines, iter_yaml_lines
+
+
+def json_lines(text, mode='paths', chunk_size=4):
+    return list(iter_json_lines(io.StringIO(text), mode, chunk_size))
+
+
+def yaml_lines(text, mode='paths'):
+    return list(iter_yaml_lines(io.StringIO(text), mode))
+
+
+class TestJsonLines:
+    """Testes para o achatamento de JSON."""
+
+    def test_paths_mode(self):
+        """Testa linhas caminho: valor com blocos pequenos."""
+        document = {"message": "Hello, World!", "number": 42,
+                    "itens": [{"a": None}, [], {}], "chave com espaço": 1.50}
+        assert json_lines(json.dumps(document, ensure_ascii=False)) == [
+            'message: Hello, World!',
+            'number: 42',
+            'itens[0].a: null',
+            'itens[1]: []',
+            'itens[2]: {}',
+            '"chave com espaço": 1.5',
+        ]
+
+    def test_strings_split_across_chunks(self):
+        """Testa strings e escapes cortados na fronteira dos blocos."""
+        assert json_lines('{"texto": "a\\u00e7\\u00e3o \\"citada\\""}', chunk_size=3) == [
+            'texto: ação "citada"'
+        ]
+
+    def test_text_mode_and_multiple_values(self):
+        """Testa o modo text e vários valores de nível superior (NDJSON)."""
+        ndjson = '{"msg": "um", "n": 1}\n{"msg": "dois", "ok": true}\n'
+        assert json_lines(ndjson, mode='text') == ["um", "dois"]
+
+    def test_preserves_number_precision(self):
+        """Testa se números são mantidos como no arquivo."""
+        assert json_lines('[12345678901234567890.123456789]') == [
+            '[0]: 12345678901234567890.123456789'
+        ]
+
+    def test_long_string_is_linear(self):
+        """Testa que strings de vários MB são lidas em tempo linear."""
+        def elapsed(megabytes):
+            value = 'ação \\ "x" ' * (megabytes * 1024 * 1024 // 12)
+            document = json.dumps({"texto": value}, ensure_ascii=False)
+            started = time.perf_counter()
+            lines = list(iter_json_lines(io.StringIO(document)))
+            assert lines == [f'texto: {value}']
+            return time.perf_counter() - started
+
+        small, large = elapsed(2), elapsed(16)
+        # Linear: 8 vezes o tamanho custa ~8 vezes o tempo (quadrático seria ~64)
+        assert large < small * 24 + 0.5
+
+    def test_token_limit(self):
+        """Testa que strings e literais acima do limite levantam ValueError."""
+        with pytest.raises(ValueError, match="caracteres"):
+            list(iter_json_lines(io.StringIO('["' + 'a' * 100), chunk_size=8, max_token_chars=50))
+        with pytest.raises(ValueError, match="caracteres"):
+            list(iter_json_lines(io.StringIO('[' + '1' * 100 + ']'), chunk_size=8, max_token_chars=50))
+        assert list(iter_json_lines(io.StringIO('["' + 'a' * 50 + '"]'), chunk_size=8,
+                                    max_token_chars=50)) == ['[0]: ' + 'a' * 50]
+
+    @pytest.mark.parametrize("invalid", [
+        '{"a" 1}', '{"a": 1,}', '[1 2]', '{"a": 1', '[tru]', '["sem fim', '["a\\x"]', '["a\nb"]',
+    ])
+    def test_invalid_json(self, invalid):
+        """Testa se JSON inválido levanta ValueError."""
+        with pytest.raises(ValueError):
+            json_lines(invalid)
+
+
+class TestYamlLines:
+    """Testes para o achatamento de YAML."""
+
+    def test_paths_mode(self):
+        """Testa linhas caminho: valor, aliases e vários documentos."""
+        document = "a: 1\nb:\n  - x\n  - {c: d}\nbase: &B valor\nref: *B\n---\n- z\n"
+        assert yaml_lines(document) == [
+            'a: 1', 'b[0]: x', 'b[1].c: d', 'base: valor', 'ref: *B', '---', '[0]: z',
+        ]
+
+    def test_text_mode_skips_non_strings(self):
+        """Testa se o modo text mantém só escalares de texto."""
+        assert yaml_lines("a: texto\nb: [1, 2.5, true, null]\nc: '3'\n", 'text') == ['texto', '3']
+
+
+def test_format_path():
+    """Testa a formatação de caminhos."""
+    assert format_path(['a', 0, 'b.c', 2]) == 'a[0]."b.c"[2]'
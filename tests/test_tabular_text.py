@@ -0,0 +1,164 @@
+"""
+Testes para a leitura em fluxo de formatos tabulares.
+"""
+
+import pytest
+import sys
+import os
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import zipfile
+
+from tabular_text import iter_csv_rows, iter_ods_rows, iter_xls_rows, sniff_encoding
+
+ODS_CONTENT = '''<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content
+    xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">
+  <office:body><office:spreadsheet>
+    <table:table table:name="Vendas">
+      <table:table-row>
+        <table:table-cell><text:p>Produto</text:p></table:table-cell>
+        <table:table-cell table:number-columns-repeated="2"/>
+        <table:table-cell><text:p>Valor</text:p></table:table-cell>
+        <table:table-cell table:number-columns-repeated="16380"/>
+      </table:table-row>
+      <table:table-row table:number-rows-repeated="2">
+        <table:table-cell><text:p>a<text:s text:c="2"/>b</text:p></table:table-cell>
+        <table:table-cell office:value-type="float" office:value="3"/>
+      </table:table-row>
+      <table:table-row table:number-rows-repeated="1048570">
+        <table:table-cell table:number-columns-repeated="16384"/>
+      </table:table-row>
+    </table:table>
+    <table:table table:name="Resumo">
+      <table:table-row>
+        <table:table-cell><text:p>linha 1</text:p><text:p>linha 2</text:p></table:table-cell>
+      </table:table-row>
+    </table:table>
+  </office:spreadsheet></office:body>
+</office:document-content>
+'''
+
+
+def write_ods(path, content=ODS_CONTENT):
+    """Monta um ODS mínimo com o content.xml informado."""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet')
+        archive.writestr('content.xml', content)
+
+
+class TestCsvRows:
+    """Testes para a conversão de CSV em fluxo."""
+
+    def test_latin1_semicolon_export(self, tmp_path):
+        """Testa exportação latin-1 com ponto e vírgula (ERP)."""
+        path = tmp_path / "erp.csv"
+        path.write_bytes("código;descrição;preço\n1;Ação;10,5\n2;\"Maçã; verde\";3\n".encode('cp1252'))
+        assert list(iter_csv_rows(str(path))) == [
+            "código\tdescrição\tpreço",
+            "1\tAção\t10,5",
+            "2\tMaçã; verde\t3",
+        ]
+
+    def test_utf8_with_bom(self, tmp_path):
+        """Testa UTF-8 com BOM."""
+        path = tmp_path / "bom.csv"
+        path.write_bytes("﻿a,b\nç,ã\n".encode('utf-8'))
+        assert list(iter_csv_rows(str(path))) == ["a\tb", "ç\tã"]
+
+    def test_max_rows_and_lazy_iteration(self, tmp_path):
+        """Testa o limite de linhas."""
+        path = tmp_path / "grande.csv"
+        path.write_text("".join(f"{i},valor\n" for i in range(1000)), encoding='utf-8')
+        assert list(iter_csv_rows(str(path), max_rows=3)) == ["0\tvalor", "1\tvalor", "2\tvalor"]
+
+    def test_explicit_delimiter(self, tmp_path):
+        """Testa delimitador informado explicitamente."""
+        path = tmp_path / "pipe.csv"
+        path.write_text("a|b,c\n", encoding='utf-8')
+        assert list(iter_csv_rows(str(path), delimiter='|')) == ["a\tb,c"]
+
+    def test_pandas_engine_matches_python(self, tmp_path):
+        """Testa o leitor vetorizado em blocos."""
+        pytest.importorskip("pandas")
+        path = tmp_path / "largo.csv"
+        rows = [",".join(f"c{r}_{c}" for c in range(300)) for r in range(5)]
+        path.write_text("\n".join(rows) + "\n", encoding='utf-8')
+
+        python_rows = list(iter_csv_rows(str(path), engine='python'))
+        pandas_blocks = list(iter_csv_rows(str(path), engine='pandas'))
+        assert "\n".join(pandas_blocks) == "\n".join(python_rows)
+        assert list(iter_csv_rows(str(path))) == pandas_blocks
+        assert "\n".join(iter_csv_rows(str(path), engine='pandas', max_rows=2)).count("\n") == 1
+
+
+class TestSpreadsheetRows:
+    """Testes para a leitura de planilhas XLS/ODS linha a linha."""
+
+    def test_ods_repeated_cells_and_rows(self, tmp_path):
+        """Testa a expansão de repetições sem materializar células vazias."""
+        path = tmp_path / "planilha.ods"
+        write_ods(path)
+        assert list(iter_ods_rows(str(path))) == [
+            "=== Planilha: Vendas ===",
+            "Produto\t\t\tValor",
+            "a  b\t3",
+            "a  b\t3",
+            "=== Planilha: Resumo ===",
+            "linha 1\nlinha 2",
+        ]
+
+    def test_ods_written_by_pandas(self, tmp_path):
+        """Testa um ODS gerado pelo odfpy, incluindo números e datas."""
+        pd = pytest.importorskip("pandas")
+        pytest.importorskip("odf")
+        path = tmp_path / "pandas.ods"
+        frame = pd.DataFrame({"nome": ["Ana", "Bruno"], "idade": [30, 41]})
+        with pd.ExcelWriter(path, engine='odf') as writer:
+            frame.to_excel(writer, sheet_name="Pessoas", index=False)
+
+        assert list(iter_ods_rows(str(path))) == [
+            "=== Planilha: Pessoas ===",
+            "nome\tidade",
+            "Ana\t30",
+            "Bruno\t41",
+        ]
+
+    def test_xls_sheets(self, tmp_path):
+        """Testa a leitura folha a folha de XLS."""
+        xlwt = pytest.importorskip("xlwt")
+        pytest.importorskip("xlrd")
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet("Dados")
+        sheet.write(0, 0, "nome")
+        sheet.write(0, 1, "total")
+        sheet.write(1, 0, "Ana")
+        sheet.write(1, 1, 2.0)
+        sheet.write(2, 1, 2.5)
+        workbook.add_sheet("Vazia")
+        path = tmp_path / "dados.xls"
+        workbook.save(str(path))
+
+        assert list(iter_xls_rows(str(path))) == [
+            "=== Planilha: Dados ===",
+            "nome\ttotal",
+            "Ana\t2",
+            "\t2.5",
+            "=== Planilha: Vazia ===",
+        ]
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ("ação".encode('utf-8'), 'utf-8'),
+    ("ação".encode('utf-8')[:4], 'utf-8'),
+    ("ação".encode('cp1252'), 'cp1252'),
+    (b"\x81abc\xe7", 'latin-1'),
+    (b"\xff\xfea\x00", 'utf-16'),
+])
+def test_sniff_encoding(prefix, expected):
+    """Testa a detecção de codificação pelo prefixo."""
+    assert sniff_encoding(prefix) == expected
@@ -0,0 +1,106 @@
+"""
+Testes para a extração de texto em fluxo de HTML e XML.
+"""
+
+import sys
+import os
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from bs4 import BeautifulSoup
+
+from text_extractors import extract_html_text, extract_xml_text, iter_html_text, iter_xml_text
+
+
+class TestHtmlText:
+    """Testes para a extração de texto de HTML."""
+
+    def test_matches_beautifulsoup_and_skips_scripts(self, tmp_path):
+        """Testa equivalência com get_text, sem script e style."""
+        html_content = (
+            "<html><head><title>Título</title><style>p {color: red}</style></head>"
+            "<body><h1>Cabeçalho</h1><p>Um <b>texto</b> &amp; mais</p>"
+            "<script>var x = '<p>não</p>';</script><!-- comentário --><p>fim</p></body></html>"
+        )
+        path = tmp_path / "pagina.html"
+        path.write_text(html_content, encoding='utf-8')
+
+        soup = BeautifulSoup(html_content, 'html.parser')
+        for element in soup(['script', 'style']):
+            element.decompose()
+        expected = soup.get_text(separator='\n', strip=True)
+
+        assert extract_html_text(str(path)) == expected
+
+    def test_small_chunks(self, tmp_path):
+        """Testa leitura em blocos que cortam tags e nós de texto."""
+        path = tmp_path / "pagina.html"
+        path.write_text("<p>" + "palavra " * 200 + "</p><p>Ação</p>", encoding='utf-8')
+        texts = list(iter_html_text(str(path), chunk_size=7))
+        assert texts == [("palavra " * 200).strip(), "Ação"]
+
+    def test_meta_charset(self, tmp_path):
+        """Testa detecção de codificação pela tag meta."""
+        path = tmp_path / "latin.html"
+        path.write_bytes(
+            '<html><head><meta charset="iso-8859-1"></head><body><p>Ação</p></body></html>'
+            .encode('iso-8859-1')
+        )
+        assert extract_html_text(str(path)) == "Ação"
+
+    def test_unknown_meta_charset_falls_back_to_utf8(self, tmp_path):
+        """Testa que uma codificação desconhecida na tag meta não impede a conversão."""
+        for charset in ("x-unknown-cs", "utf-88", "euc_jp"):
+            path = tmp_path / "pagina.html"
+            path.write_bytes(
+                f'<html><head><meta charset="{charset}"></head><body><p>Ação</p></body></html>'
+                .encode('utf-8')
+            )
+            assert extract_html_text(str(path)) == "Ação"
+
+
+class TestXmlText:
+    """Testes para a extração de texto de XML."""
+
+    def test_matches_beautifulsoup(self, tmp_path):
+        """Testa equivalência com get_text em texto misto."""
+        xml_content = (
+            '<?xml version="1.0"?><root>início<item a="1">Texto <b>XML</b> cauda</item>'
+            '<!-- c --><item><![CDATA[dados]]></item>fim</root>'
+        )
+        path = tmp_path / "dados.xml"
+        path.write_text(xml_content, encoding='utf-8')
+        expected = BeautifulSoup(xml_content, 'xml').get_text(separator='\n', strip=True)
+        assert extract_xml_text(str(path)) == expected
+
+    def test_include_and_exclude_tags(self, tmp_path):
+        """Testa filtros de inclusão e exclusão de tags, com namespace."""
+        path = tmp_path / "dados.xml"
+        path.write_text(
+            '<root xmlns:n="urn:n">cabeçalho<item>um<n:nota>interna</n:nota>dois</item>'
+            '<meta>ignorar</meta><item>três</item></root>',
+            encoding='utf-8',
+        )
+        assert extract_xml_text(str(path), include_tags=['item']) == "um\ninterna\ndois\ntrês"
+        assert extract_xml_text(str(path), exclude_tags=['meta', '{urn:n}nota']) == (
+            "cabeçalho\num\ndois\ntrês"
+        )
+        assert extract_xml_text(str(path), include_tags=['item'], exclude_tags=['nota']) == (
+            "um\ndois\ntrês"
+        )
+
+    def test_generator_over_many_siblings(self, tmp_path):
+        """Testa o gerador sobre muitos irmãos, que são descartados durante o percurso."""
+        path = tmp_path / "grande.xml"
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("<root>")
+            for i in range(20000):
+                file.write(f"<r><v>{i}</v></r>")
+            file.write("</root>")
+
+        texts = iter_xml_text(str(path))
+        assert next(texts) == "0"
+        remaining = list(texts)
+        assert len(remaining) == 19999
+        assert remaining[-1] == "19999"
@@ -0,0 +1,97 @@
+"""
+Testes para a medição das fases de uma requisição.
+"""
+
+import asyncio
+import cProfile
+import os
+import sys
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import tracing
+from file_converter import FileConverter
+
+
+def traced(function):
+    """Executa ``function`` dentro de um rastro e retorna o rastro."""
+    trace, token = tracing.start_trace()
+    try:
+        function()
+    finally:
+        tracing.end_trace(token)
+    return trace
+
+
+class TestTrace:
+    """Testes para o registro das fases."""
+
+    def test_spans_with_same_name_are_summed(self):
+        """Testa a soma das fases repetidas e a contagem de ocorrências."""
+        def phases():
+            for _ in range(3):
+                with tracing.span('extract'):
+                    pass
+            tracing.record('clean', 0.25)
+
+        trace = traced(phases)
+        assert trace.spans['extract'][1] == 3
+        assert trace.spans['clean'] == [0.25, 1]
+
+    def test_record_without_count(self):
+        """Testa que count=0 soma a duração sem nova ocorrência."""
+        def phases():
+            tracing.record('extract', 0.1)
+            tracing.record('extract', 0.1, count=0)
+
+        assert traced(phases).spans['extract'] == [0.2, 1]
+
+    def test_no_trace_outside_request(self):
+        """Testa que fora de um rastro as fases são ignoradas."""
+        with tracing.span('extract'):
+            pass
+        tracing.record('clean', 1.0)
+        assert tracing.current_trace() is None
+
+    def test_server_timing_header(self):
+        """Testa o formato do cabeçalho Server-Timing."""
+        def phases():
+            tracing.record('open', 0.0125)
+            tracing.record('extract', 0.5)
+            tracing.record('extract', 0.5)
+
+        header = traced(phases).server_timing()
+        parts = header.split(', ')
+        assert parts[0] == 'open;dur=12.5'
+        assert parts[1] == 'extract;dur=1000.0;desc="2x"'
+        assert parts[2].startswith('total;dur=')
+
+    def test_spans_reach_the_file_converter(self, tmp_path):
+        """Testa que o conversor registra detecção, abertura e extração."""
+        path = tmp_path / "dados.csv"
+        path.write_text("a,b\n1,2\n", encoding='utf-8')
+        converter = FileConverter()
+
+        trace = traced(lambda: asyncio.run(converter.convert_segments(str(path), "dados.csv", clean=True)))
+        assert list(trace.spans) == ['sniff', 'open', 'clean']
+
+        trace = traced(lambda: asyncio.run(converter.convert_file(str(path), "dados.csv")))
+        assert list(trace.spans) == ['sniff', 'extract']
+
+
+def test_profile_summary():
+    """Testa o resumo do cProfile ordenado por tempo acumulado."""
+    def work():
+        return sorted(range(10000), key=lambda value: -value)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    work()
+    profiler.disable()
+
+    summary = tracing.profile_summary(profiler, limit=3)
+    assert len(summary['functions']) <= 3
+    cumulative = [function['cumulative_seconds'] for function in summary['functions']]
+    assert cumulative == sorted(cumulative, reverse=True)
+    assert any('work' in function['function'] for function in summary['functions'])
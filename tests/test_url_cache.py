@@ -0,0 +1,101 @@
+"""
+Testes para o cache de conversões de URLs.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Adiciona o diretório src ao path para importar os módulos
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from url_cache import MemoryCacheBackend, SQLiteCacheBackend, UrlCache
+
+URL = "http://storage/relatorio.pdf"
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        yield MemoryCacheBackend(max_entries=2)
+    else:
+        sqlite_backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), max_entries=2)
+        yield sqlite_backend
+        sqlite_backend.close()
+
+
+class TestUrlCache:
+    """Testes da política do cache sobre os dois armazenamentos."""
+
+    def test_store_and_lookup(self, backend):
+        """Testa que a entrada guarda o texto e os validadores."""
+        cache = UrlCache(backend)
+        cache.store(URL, "relatorio.pdf", "texto", etag='"v1"',
+                    last_modified="Mon, 01 Jan 2024 00:00:00 GMT",
+                    content_hash="abc", content_type="application/pdf", file_size=10)
+        entry = cache.lookup(URL, "relatorio.pdf")
+        assert entry.text == "texto"
+        assert entry.etag == '"v1"'
+        assert entry.file_size == 10
+        # O nome informado faz parte da chave
+        assert cache.lookup(URL, "outro.pdf") is None
+
+    def test_ttl_expires_entries(self, backend):
+        """Testa que a entrada não revalidada dentro do TTL expira."""
+        cache = UrlCache(backend, ttl_seconds=60)
+        entry = cache.store(URL, "a.pdf", "texto")
+        entry.validated_at = time.time() - 120
+        backend.put(entry)
+        assert cache.lookup(URL, "a.pdf") is None
+        assert len(backend) == 0
+
+    def test_revalidation_extends_entry(self, backend):
+        """Testa que a revalidação renova a entrada e atualiza o ETag."""
+        cache = UrlCache(backend, ttl_seconds=60, fresh_seconds=30)
+        entry = cache.store(URL, "a.pdf", "texto", etag='"v1"')
+        entry.validated_at = time.time() - 50
+        backend.put(entry)
+        entry = cache.lookup(URL, "a.pdf")
+        assert not cache.is_fresh(entry)
+
+        cache.revalidated(entry, etag='"v2"')
+        entry = cache.lookup(URL, "a.pdf")
+        assert cache.is_fresh(entry)
+        assert entry.etag == '"v2"'
+
+    def test_lru_eviction(self, backend):
+        """Testa o descarte da entrada usada há mais tempo."""
+        cache = UrlCache(backend)
+        cache.store("http://storage/1", "", "um")
+        time.sleep(0.01)
+        cache.store("http://storage/2", "", "dois")
+        time.sleep(0.01)
+        assert cache.lookup("http://storage/1", "") is not None
+        time.sleep(0.01)
+        cache.store("http://storage/3", "", "três")
+
+        assert cache.lookup("http://storage/2", "") is None
+        assert cache.lookup("http://storage/1", "").text == "um"
+        assert cache.lookup("http://storage/3", "").text == "três"
+
+    def test_large_texts_are_not_stored(self, backend):
+        """Testa o limite de tamanho do texto guardado."""
+        cache = UrlCache(backend, max_text_chars=3)
+        assert cache.store(URL, "a.pdf", "texto longo") is None
+        assert cache.lookup(URL, "a.pdf") is None
+
+    def test_namespace_isolates_entries(self, backend):
+        """Testa que outra configuração do conversor não reaproveita entradas."""
+        UrlCache(backend, namespace="a").store(URL, "a.pdf", "texto")
+        assert UrlCache(backend, namespace="b").lookup(URL, "a.pdf") is None
+
+
+def test_sqlite_backend_is_shared(tmp_path):
+    """Testa que duas conexões ao mesmo arquivo veem as mesmas entradas."""
+    path = str(tmp_path / "cache.db")
+    writer = UrlCache(SQLiteCacheBackend(path))
+    reader = UrlCache(SQLiteCacheBackend(path))
+    writer.store(URL, "a.pdf", "compartilhado")
+    assert reader.lookup(URL, "a.pdf").text == "compartilhado"